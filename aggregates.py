@@ -0,0 +1,339 @@
+"""Materialized aggregates for the GROUP BY queries, maintained by triggers.
+
+Each aggregate table keeps running counts and sums per group, so averages stay
+exact and revenue is summed in integer cents. SQLite triggers on the fact
+tables (Watch_History, Payment, Review) and on Content_Actor apply every
+insert or delete as a delta, and the dashboard reads the rollups in
+O(groups) instead of rescanning the fact tables.
+
+The same triggers keep per-user and global rating/progress totals for the
+user dashboard, so its metrics are single-row lookups, and each user's
+favourite genre: ``agg_user_genre`` counts a user's views per genre and
+``agg_favourite_genre`` holds the winner, re-picked from the user's few genre
+rows whenever they watch something. Its (genre_name, user_id) index is the
+genre -> users posting list, read a page at a time, and ``agg_genre_fans``
+keeps the length of each list.
+
+Changes to dimension rows (a title moving genre, a subscription changing
+plan) are not tracked incrementally; call ``refresh`` after those.
+"""
+
+from catalog import query_number
+
+
+TABLES = {
+    "agg_genre_watch": """CREATE TABLE IF NOT EXISTS agg_genre_watch (
+    genre_name VARCHAR(100) PRIMARY KEY,
+    views INT NOT NULL,
+    progress_sum INT NOT NULL,
+    progress_count INT NOT NULL
+)""",
+    "agg_actor_watch": """CREATE TABLE IF NOT EXISTS agg_actor_watch (
+    actor_name VARCHAR(100) PRIMARY KEY,
+    views INT NOT NULL
+)""",
+    "agg_plan_revenue": """CREATE TABLE IF NOT EXISTS agg_plan_revenue (
+    plan_name VARCHAR(100) PRIMARY KEY,
+    revenue_cents INT NOT NULL,
+    payments INT NOT NULL
+)""",
+    "agg_content_rating": """CREATE TABLE IF NOT EXISTS agg_content_rating (
+    title VARCHAR(100) PRIMARY KEY,
+    rating_sum INT NOT NULL,
+    rating_count INT NOT NULL
+)""",
+    "agg_user_stats": """CREATE TABLE IF NOT EXISTS agg_user_stats (
+    user_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL,
+    rating_count INT NOT NULL,
+    progress_sum INT NOT NULL,
+    progress_count INT NOT NULL
+)""",
+    "agg_user_genre": """CREATE TABLE IF NOT EXISTS agg_user_genre (
+    user_id INT NOT NULL,
+    genre_name VARCHAR(100) NOT NULL,
+    views INT NOT NULL,
+    progress_sum INT NOT NULL,
+    progress_count INT NOT NULL,
+    PRIMARY KEY (user_id, genre_name)
+)""",
+    "agg_favourite_genre": """CREATE TABLE IF NOT EXISTS agg_favourite_genre (
+    user_id INT PRIMARY KEY,
+    genre_name VARCHAR(100) NOT NULL
+)""",
+    "agg_genre_fans": """CREATE TABLE IF NOT EXISTS agg_genre_fans (
+    genre_name VARCHAR(100) PRIMARY KEY,
+    users INT NOT NULL
+)""",
+    "agg_global_stats": """CREATE TABLE IF NOT EXISTS agg_global_stats (
+    id INT PRIMARY KEY CHECK (id = 1),
+    rating_sum INT NOT NULL,
+    rating_count INT NOT NULL,
+    progress_sum INT NOT NULL,
+    progress_count INT NOT NULL
+)""",
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_favourite_genre ON agg_favourite_genre (genre_name, user_id)",
+]
+
+# Base tables each aggregate is derived from, for cache invalidation
+SOURCES = {
+    "agg_genre_watch": ["watch_history", "content", "genre"],
+    "agg_actor_watch": ["watch_history", "content_actor", "actor"],
+    "agg_plan_revenue": ["payment", "subscription", "plan"],
+    "agg_content_rating": ["review", "content"],
+    "agg_user_stats": ["review", "watch_history"],
+    "agg_user_genre": ["watch_history", "content", "genre"],
+    "agg_favourite_genre": ["watch_history", "content", "genre"],
+    "agg_genre_fans": ["watch_history", "content", "genre"],
+    "agg_global_stats": ["review", "watch_history"],
+}
+
+# Delta statements for one fact row; {row} is NEW or OLD and {sign} is 1 or -1
+DELTAS = {
+    "Watch_History": [
+        """INSERT INTO agg_genre_watch (genre_name, views, progress_sum, progress_count)
+    SELECT g.genre_name, {sign}, {sign} * COALESCE({row}.progress, 0), {sign} * ({row}.progress IS NOT NULL)
+    FROM Content c JOIN Genre g ON c.genre_id = g.genre_id
+    WHERE c.content_id = {row}.content_id
+    ON CONFLICT (genre_name) DO UPDATE SET
+        views = views + excluded.views,
+        progress_sum = progress_sum + excluded.progress_sum,
+        progress_count = progress_count + excluded.progress_count""",
+        """INSERT INTO agg_actor_watch (actor_name, views)
+    SELECT a.actor_name, {sign}
+    FROM Content_Actor ca JOIN Actor a ON ca.actor_id = a.actor_id
+    WHERE ca.content_id = {row}.content_id
+    ON CONFLICT (actor_name) DO UPDATE SET views = views + excluded.views""",
+        """INSERT INTO agg_user_stats (user_id, rating_sum, rating_count, progress_sum, progress_count)
+    VALUES ({row}.user_id, 0, 0, {sign} * COALESCE({row}.progress, 0), {sign} * ({row}.progress IS NOT NULL))
+    ON CONFLICT (user_id) DO UPDATE SET
+        progress_sum = progress_sum + excluded.progress_sum,
+        progress_count = progress_count + excluded.progress_count""",
+        """INSERT INTO agg_user_genre (user_id, genre_name, views, progress_sum, progress_count)
+    SELECT {row}.user_id, g.genre_name, {sign},
+           {sign} * COALESCE({row}.progress, 0), {sign} * ({row}.progress IS NOT NULL)
+    FROM Content c JOIN Genre g ON c.genre_id = g.genre_id
+    WHERE c.content_id = {row}.content_id
+    ON CONFLICT (user_id, genre_name) DO UPDATE SET
+        views = views + excluded.views,
+        progress_sum = progress_sum + excluded.progress_sum,
+        progress_count = progress_count + excluded.progress_count""",
+        """INSERT INTO agg_global_stats (id, rating_sum, rating_count, progress_sum, progress_count)
+    VALUES (1, 0, 0, {sign} * COALESCE({row}.progress, 0), {sign} * ({row}.progress IS NOT NULL))
+    ON CONFLICT (id) DO UPDATE SET
+        progress_sum = progress_sum + excluded.progress_sum,
+        progress_count = progress_count + excluded.progress_count""",
+    ],
+    "Content_Actor": [
+        """INSERT INTO agg_actor_watch (actor_name, views)
+    SELECT a.actor_name, {sign} * (SELECT COUNT(*) FROM Watch_History wh WHERE wh.content_id = {row}.content_id)
+    FROM Actor a
+    WHERE a.actor_id = {row}.actor_id
+      -- an unwatched title adds no views, and must not create a zero row GROUP BY would not return
+      AND EXISTS (SELECT 1 FROM Watch_History wh WHERE wh.content_id = {row}.content_id)
+    ON CONFLICT (actor_name) DO UPDATE SET views = views + excluded.views""",
+    ],
+    "Payment": [
+        """INSERT INTO agg_plan_revenue (plan_name, revenue_cents, payments)
+    SELECT p.plan_name, {sign} * CAST(ROUND({row}.amount * 100) AS INT), {sign} * ({row}.amount IS NOT NULL)
+    FROM Subscription s JOIN Plan p ON s.plan_id = p.plan_id
+    WHERE s.subscription_id = {row}.subscription_id
+    ON CONFLICT (plan_name) DO UPDATE SET
+        revenue_cents = revenue_cents + excluded.revenue_cents,
+        payments = payments + excluded.payments""",
+    ],
+    "Review": [
+        """INSERT INTO agg_content_rating (title, rating_sum, rating_count)
+    SELECT c.title, {sign} * COALESCE({row}.rating, 0), {sign} * ({row}.rating IS NOT NULL)
+    FROM Content c
+    WHERE c.content_id = {row}.content_id
+    ON CONFLICT (title) DO UPDATE SET
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_count = rating_count + excluded.rating_count""",
+        """INSERT INTO agg_user_stats (user_id, rating_sum, rating_count, progress_sum, progress_count)
+    VALUES ({row}.user_id, {sign} * COALESCE({row}.rating, 0), {sign} * ({row}.rating IS NOT NULL), 0, 0)
+    ON CONFLICT (user_id) DO UPDATE SET
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_count = rating_count + excluded.rating_count""",
+        """INSERT INTO agg_global_stats (id, rating_sum, rating_count, progress_sum, progress_count)
+    VALUES (1, {sign} * COALESCE({row}.rating, 0), {sign} * ({row}.rating IS NOT NULL), 0, 0)
+    ON CONFLICT (id) DO UPDATE SET
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_count = rating_count + excluded.rating_count""",
+    ],
+}
+
+# After a delete, groups it emptied are removed so the rollups match what
+# GROUP BY would return; only the groups the row touched are checked
+CLEANUP = {
+    "Watch_History": [
+        """DELETE FROM agg_genre_watch WHERE views <= 0 AND genre_name IN (
+        SELECT g.genre_name FROM Content c JOIN Genre g ON c.genre_id = g.genre_id
+        WHERE c.content_id = OLD.content_id)""",
+        """DELETE FROM agg_actor_watch WHERE views <= 0 AND actor_name IN (
+        SELECT a.actor_name FROM Content_Actor ca JOIN Actor a ON ca.actor_id = a.actor_id
+        WHERE ca.content_id = OLD.content_id)""",
+        "DELETE FROM agg_user_stats WHERE user_id = OLD.user_id AND rating_count <= 0 AND progress_count <= 0",
+        "DELETE FROM agg_user_genre WHERE user_id = OLD.user_id AND views <= 0",
+    ],
+    "Content_Actor": [
+        """DELETE FROM agg_actor_watch WHERE views <= 0 AND actor_name IN (
+        SELECT actor_name FROM Actor WHERE actor_id = OLD.actor_id)""",
+    ],
+    "Payment": [
+        """DELETE FROM agg_plan_revenue WHERE payments <= 0 AND plan_name IN (
+        SELECT p.plan_name FROM Subscription s JOIN Plan p ON s.plan_id = p.plan_id
+        WHERE s.subscription_id = OLD.subscription_id)""",
+    ],
+    "Review": [
+        """DELETE FROM agg_content_rating WHERE rating_count <= 0 AND title IN (
+        SELECT title FROM Content WHERE content_id = OLD.content_id)""",
+        "DELETE FROM agg_user_stats WHERE user_id = OLD.user_id AND rating_count <= 0 AND progress_count <= 0",
+    ],
+}
+
+# Run last on either event: re-pick the user's favourite genre the way
+# UserStore.favourite_genre used to (most views, then most progress, then name),
+# moving the user from the old genre's fan count to the new one's
+REPICK = {
+    "Watch_History": [
+        """UPDATE agg_genre_fans SET users = users - 1
+    WHERE genre_name = (SELECT genre_name FROM agg_favourite_genre WHERE user_id = {row}.user_id)""",
+        "DELETE FROM agg_favourite_genre WHERE user_id = {row}.user_id",
+        """INSERT INTO agg_favourite_genre (user_id, genre_name)
+    SELECT user_id, genre_name FROM agg_user_genre
+    WHERE user_id = {row}.user_id
+    ORDER BY views DESC, CASE WHEN progress_count > 0 THEN progress_sum END DESC, genre_name
+    LIMIT 1""",
+        """INSERT INTO agg_genre_fans (genre_name, users)
+    SELECT genre_name, 1 FROM agg_favourite_genre WHERE user_id = {row}.user_id
+    ON CONFLICT (genre_name) DO UPDATE SET users = users + 1""",
+        "DELETE FROM agg_genre_fans WHERE users <= 0",
+    ],
+}
+
+BACKFILL = {
+    "agg_genre_watch": """INSERT INTO agg_genre_watch
+SELECT g.genre_name, COUNT(wh.content_id), COALESCE(SUM(wh.progress), 0), COUNT(wh.progress)
+FROM Watch_History wh
+JOIN Content c ON wh.content_id = c.content_id
+JOIN Genre g ON c.genre_id = g.genre_id
+GROUP BY g.genre_name""",
+    "agg_actor_watch": """INSERT INTO agg_actor_watch
+SELECT a.actor_name, COUNT(wh.content_id)
+FROM Actor a
+JOIN Content_Actor ca ON a.actor_id = ca.actor_id
+JOIN Watch_History wh ON ca.content_id = wh.content_id
+GROUP BY a.actor_name""",
+    "agg_plan_revenue": """INSERT INTO agg_plan_revenue
+SELECT p.plan_name, SUM(CAST(ROUND(pay.amount * 100) AS INT)), COUNT(pay.amount)
+FROM Payment pay
+JOIN Subscription s ON pay.subscription_id = s.subscription_id
+JOIN Plan p ON s.plan_id = p.plan_id
+GROUP BY p.plan_name""",
+    "agg_content_rating": """INSERT INTO agg_content_rating
+SELECT c.title, COALESCE(SUM(r.rating), 0), COUNT(r.rating)
+FROM Review r
+JOIN Content c ON r.content_id = c.content_id
+GROUP BY c.title""",
+    "agg_user_stats": """INSERT INTO agg_user_stats
+SELECT user_id, SUM(rating_sum), SUM(rating_count), SUM(progress_sum), SUM(progress_count)
+FROM (
+    SELECT user_id, COALESCE(SUM(rating), 0) AS rating_sum, COUNT(rating) AS rating_count,
+           0 AS progress_sum, 0 AS progress_count
+    FROM Review GROUP BY user_id
+    UNION ALL
+    SELECT user_id, 0, 0, COALESCE(SUM(progress), 0), COUNT(progress)
+    FROM Watch_History GROUP BY user_id
+)
+GROUP BY user_id""",
+    "agg_user_genre": """INSERT INTO agg_user_genre
+SELECT wh.user_id, g.genre_name, COUNT(*), COALESCE(SUM(wh.progress), 0), COUNT(wh.progress)
+FROM Watch_History wh
+JOIN Content c ON wh.content_id = c.content_id
+JOIN Genre g ON c.genre_id = g.genre_id
+GROUP BY wh.user_id, g.genre_name""",
+    "agg_favourite_genre": """INSERT INTO agg_favourite_genre
+SELECT user_id, genre_name
+FROM (
+    SELECT user_id, genre_name,
+           ROW_NUMBER() OVER (
+               PARTITION BY user_id
+               ORDER BY views DESC, CASE WHEN progress_count > 0 THEN progress_sum END DESC, genre_name
+           ) AS pick
+    FROM agg_user_genre
+)
+WHERE pick = 1""",
+    "agg_genre_fans": """INSERT INTO agg_genre_fans
+SELECT genre_name, COUNT(*)
+FROM agg_favourite_genre
+GROUP BY genre_name""",
+    "agg_global_stats": """INSERT INTO agg_global_stats
+SELECT 1,
+       (SELECT COALESCE(SUM(rating), 0) FROM Review), (SELECT COUNT(rating) FROM Review),
+       (SELECT COALESCE(SUM(progress), 0) FROM Watch_History), (SELECT COUNT(progress) FROM Watch_History)""",
+}
+
+# Reads that answer the catalog queries from the rollups, keyed by query number
+MATERIALIZED = {
+    1: """SELECT genre_name, views AS total_views
+FROM agg_genre_watch
+ORDER BY total_views DESC""",
+    2: """SELECT plan_name, revenue_cents / 100.0 AS total_revenue
+FROM agg_plan_revenue
+ORDER BY total_revenue DESC""",
+    3: """SELECT title, CAST(rating_sum AS REAL) / rating_count AS avg_rating
+FROM agg_content_rating
+ORDER BY avg_rating DESC""",
+    7: """SELECT genre_name, CASE WHEN progress_count > 0 THEN CAST(progress_sum AS REAL) / progress_count END AS avg_completion
+FROM agg_genre_watch
+ORDER BY avg_completion DESC""",
+    9: """SELECT actor_name, views AS total_views
+FROM agg_actor_watch
+ORDER BY total_views DESC""",
+}
+
+
+def trigger_statements(prefix="agg", deltas=DELTAS, cleanup=CLEANUP, repick=REPICK):
+    """DDL for the insert and delete triggers applying ``deltas`` (also used by ``cubes``)."""
+    for table, statements_for in deltas.items():
+        for event, row, sign in (("INSERT", "NEW", "1"), ("DELETE", "OLD", "-1")):
+            statements = [d.format(row=row, sign=sign) for d in statements_for]
+            if event == "DELETE":
+                statements += cleanup.get(table, [])
+            statements += [r.format(row=row) for r in repick.get(table, [])]
+            body = ";\n    ".join(statements)
+            name = f"{prefix}_{table.lower()}_{event.lower()}"
+            yield f"DROP TRIGGER IF EXISTS {name}"
+            yield f"CREATE TRIGGER {name} AFTER {event} ON {table}\nBEGIN\n    {body};\nEND"
+
+
+def install(engine):
+    """Create the rollup tables and triggers on ``engine``, backfilling any new rollup."""
+    with engine.lock, engine.conn:
+        existing = {r[0] for r in engine.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for name, ddl in TABLES.items():
+            engine.conn.execute(ddl)
+            if name not in existing:
+                engine.conn.execute(BACKFILL[name])
+        for statement in INDEXES + list(trigger_statements()):
+            engine.conn.execute(statement)
+    for name, sources in SOURCES.items():
+        engine.derive(name, sources)
+
+
+def refresh(engine):
+    """Rebuild every rollup from the base tables."""
+    with engine.lock, engine.conn:
+        for name in TABLES:
+            engine.conn.execute(f"DELETE FROM {name}")
+            engine.conn.execute(BACKFILL[name])
+    engine.touch(*TABLES)
+
+
+def materialized(title):
+    """The rollup query answering catalog query ``title``, or None if there is none."""
+    return MATERIALIZED.get(query_number(title))
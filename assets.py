@@ -0,0 +1,159 @@
+"""Startup manifest of the posters and headshots used by the dashboard.
+
+The manifest is built once per process: it indexes the files in ``images/``,
+verifies every declared title/actor image and records its dimensions. A
+declared path that does not exist is matched to the closest file name, and
+anything that still cannot be found resolves to a placeholder generated
+locally, so a render never probes the filesystem or fetches a remote image.
+Titles and actors that were not declared are resolved on first use and kept
+in a bounded LRU cache.
+"""
+
+import difflib
+import functools
+import glob
+import os
+import re
+
+from PIL import Image, ImageDraw
+
+from thumbnails import CACHE_DIR
+
+
+IMAGE_DIR = "images"
+
+POSTERS = {
+    "Shadow Protocol": "images/shadowprotocol.jpeg",
+    "Echoes of Silence": "images/echoesofsilencw.jpeg",
+    "Laugh Lines": "images/laughlines.jpeg",
+    "Whispers in the Dark": "images/whispersinthedark.jpeg",
+    "Forever and Always": "images/foreverandalways.jpeg",
+    "Crimson Vengeance": "images/crimsonvengeance.jpeg",
+    "The Weight of Truth": "images/theweightoftruth.jpeg",
+    "Accidentally Perfect": "images/accidentallyperfect.jpeg",
+    "The Hollow Manor": "images/thehallowmanor.jpeg",
+    "Hearts Entwined": "images/heartsentwined.jpeg",
+    "The Haunted Hour": "images/thehauntinghour.jpeg",
+    "Gemini Force": "images/geminiman.jpeg",
+    "Men in Black": "images/meninblack.jpeg",
+    "I Am Legend": "images/iamlegend.jpeg",
+    "Gemini Man": "images/geminiman.jpeg",
+    "The Iron Lady": "images/theironlady.jpeg",
+    "Kramer vs Kramer": "images/kramervskramer.jpeg",
+    "The Devil Wears Prada": "images/thedevilwearsprada.jpeg",
+    "Fight Club": "images/thefightclub.jpeg",
+    "World War Z": "images/worldwarz.jpeg",
+    "Once Upon a Time in Hollywood": "images/onceuponatimeinhollywood.jpeg",
+    "Lucy": "images/lucy.jpeg",
+    "Marriage Story": "images/marriagestory.jpeg",
+    "Lost in Translation": "images/lostintranslation.jpeg",
+    "Inception": "images/inception.jpeg",
+    "Titanic": "images/titanic.jpeg",
+    "The Revenant": "images/therevenant.jpeg",
+    "La La Land": "images/lalaland.jpeg",
+    "Easy A": "images/easya.jpeg",
+    "The Favourite": "images/thefavourite.jpeg",
+    "Forrest Gump": "images/forrestgump.jpeg",
+    "Cast Away": "images/castaway.jpeg",
+    "Saving Private Ryan": "images/savingprivateryan.jpeg",
+    "Pretty Woman": "images/prettywoman.jpeg",
+    "Erin Brockovich": "images/erinbrockovich.jpeg",
+    "My Best Friend's Wedding": "images/mybsfsbody.jpeg",
+    "Halloween": "images/halloweem.jpeg",
+    "Freaky Friday": "images/freakyfriday.jpeg",
+    "True Lies": "images/truelies.jpeg",
+    "The Mask": "images/themask.jpeg",
+    "Ace Ventura": "images/aceventura.jpeg",
+    "Dumb and Dumber": "images/dumbanddumber.jpeg",
+}
+
+HEADSHOTS = {
+    "Will Smith": "images/willsmith.jpeg",
+    "Meryl Streep": "images/merylstreep.jpeg",
+    "Jim Carrey": "images/jimcarrey.jpeg",
+    "Jamie Lee Curtis": "images/jamieleecurtis.jpeg",
+    "Julia Roberts": "images/juliaroberts.jpeg",
+    "Tom Hanks": "images/tomhanks.jpeg",
+    "Emma Stone": "images/emmastoen.jpeg",
+    "Leonardo DiCaprio": "images/leodicap.jpeg",
+    "Scarlett Johansson": "images/scarlettjohanson.jpeg",
+    "Brad Pitt": "images/bradpitt.jpeg",
+    "Natalie Portman": "images/natalieportman.jpeg",
+    "Johnny Depp": "images/johnnydepp.jpeg",
+    "Jennifer Lawrence": "images/jenniferlawrence.jpeg",
+}
+
+PLACEHOLDER_SIZE = (300, 440)
+MAX_UNDECLARED = 1024
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def placeholder(text="No Poster", size=PLACEHOLDER_SIZE):
+    """Path of a locally generated placeholder image, drawing it if needed."""
+    path = os.path.join(CACHE_DIR, f"placeholder-{slug(text)}-{size[0]}x{size[1]}.png")
+    if not os.path.exists(path):
+        image = Image.new("RGB", size, "#cfd8dc")
+        draw = ImageDraw.Draw(image)
+        left, top, right, bottom = draw.textbbox((0, 0), text)
+        draw.text(((size[0] - right + left) / 2, (size[1] - bottom + top) / 2), text, fill="#455a64")
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        image.save(path)
+    return path
+
+
+class AssetManifest:
+    """Verified image paths and dimensions for titles, actors and other dashboard images."""
+
+    def __init__(self, posters=POSTERS, headshots=HEADSHOTS, image_dir=IMAGE_DIR):
+        self.files = {}
+        for path in glob.glob(os.path.join(image_dir, "*")):
+            with Image.open(path) as image:
+                self.files[path.replace(os.sep, "/")] = image.size
+        self.stems = {slug(os.path.splitext(os.path.basename(p))[0]): p for p in self.files}
+        self.placeholder = placeholder()
+        self.problems = []
+        self.undeclared = functools.lru_cache(maxsize=MAX_UNDECLARED)(self.resolve)
+        self.posters = {title: self.resolve(title, path) for title, path in posters.items()}
+        self.headshots = {actor: self.resolve(actor, path) for actor, path in headshots.items()}
+
+    def resolve(self, name, declared=None):
+        """Find the local file for ``name``, preferring the declared path."""
+        if declared in self.files:
+            return declared
+        candidates = [slug(name)]
+        if declared:
+            stem = slug(os.path.basename(declared))
+            candidates.append(stem[:-4] if stem.endswith("jpeg") else stem)
+        for candidate in candidates:
+            if candidate in self.stems:
+                return self.note(name, declared, self.stems[candidate])
+        for candidate in candidates:
+            match = difflib.get_close_matches(candidate, self.stems, n=1, cutoff=0.85)
+            if match:
+                return self.note(name, declared, self.stems[match[0]])
+        return self.note(name, declared, self.placeholder)
+
+    def note(self, name, declared, resolved):
+        if declared is not None:
+            self.problems.append((name, declared, resolved))
+        return resolved
+
+    def poster(self, title):
+        return self._lookup(self.posters, title)
+
+    def headshot(self, actor):
+        return self._lookup(self.headshots, actor)
+
+    def image(self, path):
+        """Verify a plain image path, falling back to the placeholder."""
+        return path if path in self.files else self.placeholder
+
+    def size(self, path):
+        return self.files.get(path, PLACEHOLDER_SIZE)
+
+    def _lookup(self, table, name):
+        path = table.get(name)
+        return path if path is not None else self.undeclared(name)
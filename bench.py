@@ -0,0 +1,225 @@
+"""Headless benchmark for the analytical queries in ``catalog.queries``.
+
+Builds a synthetic database at each requested scale, runs every query a few
+times and reports p50/p95 latency, rows scanned per second and the peak
+Python memory allocated by one run of the query (tracemalloc; SQLite's own
+page cache is not visible to it and is reported as the database size
+instead). Peak RSS is a high-water mark of the whole process, so it is
+reported once per scale, after all of its queries. Results are written as
+JSON so runs can be compared between releases.
+
+With ``--frames`` every query is also run through the pandas plans in
+``frames`` on the same data, reporting their latency and peak allocation and
+whether both engines return the same rows, plus the time to reopen the tables
+from ``columnar`` Arrow files.
+
+    python bench.py --scales 1000,10000,100000 --repeat 5 --out bench.json
+    python bench.py --out new.json --baseline bench.json
+    python bench.py --scales 100000 --frames
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import aggregates
+import columnar
+import datagen
+from catalog import queries
+from engine import referenced_tables
+from frames import Frames
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (not of any one query), in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def time_query(engine, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, rows = engine.execute(sql)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings), len(rows)
+
+
+def peak_alloc_mb(run):
+    """Peak Python memory allocated while calling ``run``, in MB."""
+    tracemalloc.start()
+    try:
+        run()
+        return round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def time_plan(frames, title, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = frames.query(title)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings), len(result)
+
+
+def database_mb(engine):
+    _, [(pages,)] = engine.execute("PRAGMA page_count")
+    _, [(page_size,)] = engine.execute("PRAGMA page_size")
+    return round(pages * page_size / 1e6, 2)
+
+
+def same_rows(expected, actual):
+    """Whether two results hold the same rows, ignoring row order, dtypes and float summation order."""
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    numeric = [c for c in expected.columns if pd.api.types.is_numeric_dtype(expected[c].dtype)]
+    normalized = []
+    for frame in (expected, actual):
+        frame = frame.copy()
+        for column in frame.columns:
+            if column in numeric:
+                frame[column] = pd.to_numeric(frame[column]).astype(float)
+            elif str(frame[column].dtype).startswith("datetime64"):
+                frame[column] = frame[column].dt.strftime("%Y-%m-%d")
+            else:
+                frame[column] = frame[column].astype(str)
+        order = frame[numeric].round(4).assign(**{c: frame[c] for c in frame.columns if c not in numeric})
+        normalized.append(frame.iloc[order.sort_values(list(order.columns)).index].reset_index(drop=True))
+    expected, actual = normalized
+    text = [c for c in expected.columns if c not in numeric]
+    return (expected[text].equals(actual[text])
+            and np.allclose(expected[numeric].to_numpy(), actual[numeric].to_numpy(), rtol=1e-9, equal_nan=True))
+
+
+def run_scale(users, repeat, seed, selected, materialized=False, frames=False):
+    start = time.perf_counter()
+    engine, counts = datagen.build(users=users, contents=max(100, users // 5), actors=max(50, users // 10),
+                                   seed=seed)
+    if materialized:
+        aggregates.install(engine)
+    build_s = time.perf_counter() - start
+    sizes = {t.lower(): n for t, n in counts.items()}
+    scale = {"users": users, "rows": counts, "build_s": round(build_s, 2), "database_mb": database_mb(engine)}
+    if frames:
+        start = time.perf_counter()
+        frames = Frames.from_engine(engine)
+        scale["frames_load_s"] = round(time.perf_counter() - start, 2)
+        scale["frames_loaded_mb"] = round(sum(frames.loaded_bytes.values()) / 1e6, 2)
+        scale["frames_mb"] = round(sum(frames.memory_bytes().values()) / 1e6, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            columnar.save(frames, directory)
+            start = time.perf_counter()
+            columnar.open_frames(directory)
+            scale["columnar_open_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    results = []
+    for name, sql in selected.items():
+        if materialized:
+            sql = aggregates.materialized(name) or sql
+        timings, result_rows = time_query(engine, sql, repeat)
+        scanned = sum(sizes.get(t.lower(), 0) for t in referenced_tables(sql))
+        p50 = float(np.percentile(timings, 50))
+        results.append({
+            "query": name,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+            "result_rows": result_rows,
+            "rows_scanned": scanned,
+            "rows_per_s": round(scanned / p50) if p50 else None,
+            "peak_alloc_mb": peak_alloc_mb(lambda: engine.execute(sql)),
+        })
+        print(f"  {name[:60]:<60} p50 {results[-1]['p50_ms']:>10.2f} ms  p95 {results[-1]['p95_ms']:>10.2f} ms",
+              file=sys.stderr)
+        if frames:
+            timings, result_rows = time_plan(frames, name, repeat)
+            results[-1]["frames"] = {
+                "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 3),
+                "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+                "result_rows": result_rows,
+                "peak_alloc_mb": peak_alloc_mb(lambda: frames.query(name)),
+                "same_rows": same_rows(engine.query(sql), frames.query(name)),
+            }
+            print(f"  {'  pandas plan':<60} p50 {results[-1]['frames']['p50_ms']:>10.2f} ms  "
+                  f"p95 {results[-1]['frames']['p95_ms']:>10.2f} ms"
+                  f"{'' if results[-1]['frames']['same_rows'] else '  RESULTS DIFFER'}", file=sys.stderr)
+    scale["queries"] = results
+    scale["peak_rss_mb"] = peak_rss_mb()
+    return scale
+
+
+def compare(report, baseline, threshold):
+    """Print queries whose p50 grew by more than ``threshold``x against a previous report."""
+    previous = {(scale["users"], q["query"]): q["p50_ms"] for scale in baseline["scales"] for q in scale["queries"]}
+    regressions = 0
+    for scale in report["scales"]:
+        for q in scale["queries"]:
+            before = previous.get((scale["users"], q["query"]))
+            if before and q["p50_ms"] > before * threshold:
+                regressions += 1
+                print(f"REGRESSION {scale['users']:,} users, {q['query']}: "
+                      f"{before:.2f} ms -> {q['p50_ms']:.2f} ms", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,100000",
+                        help="comma-separated user counts; other tables scale with them")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--query", default="", help="only run queries whose title contains this text")
+    parser.add_argument("--materialized", action="store_true",
+                        help="answer queries from the trigger-maintained rollups where available")
+    parser.add_argument("--frames", action="store_true",
+                        help="also run the pandas plans from frames.py and compare them with SQL")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to check for p50 regressions")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50 ratio counted as a regression")
+    args = parser.parse_args()
+
+    selected = {k: v for k, v in queries.items() if args.query.lower() in k.lower()}
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "materialized": args.materialized,
+        "frames": args.frames,
+        "scales": [],
+    }
+    for users in (int(s) for s in args.scales.split(",")):
+        print(f"Scale: {users:,} users", file=sys.stderr)
+        report["scales"].append(run_scale(users, args.repeat, args.seed, selected, args.materialized, args.frames))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            sys.exit(1 if compare(report, json.load(f), args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
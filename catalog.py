@@ -0,0 +1,442 @@
+"""Static data for the dashboard: schema scripts, queries and page content.
+
+Everything here is built once when the module is first imported and exposed
+read-only (see ``freeze``), so Streamlit reruns and sessions share one copy
+instead of re-allocating the literals on every widget interaction.
+
+The scripts are kept in the Oracle dialect they were written in; ``engine``
+translates them for the embedded database.
+"""
+
+import re
+from types import MappingProxyType
+
+sql_scripts = {
+    "User": """CREATE TABLE User1(
+    user_id INT PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100) UNIQUE,
+    password VARCHAR(100),
+    age INT
+)
+
+Insert all
+INTO User1 VALUES(1, 'John Doe', 'john@example.com', 'password123', 28)
+INTO User1 VALUES(2, 'Jane Smith', 'jane.smith@example.com', 'password456', 34)
+INTO User1 VALUES(3, 'Emily Brown', 'emily@example.com', 'password789', 22)
+INTO User1 VALUES(4, 'Michael Johnson', 'michael.johnson@example.com', 'password000', 30)
+INTO User1 VALUES(5, 'Sarah Williams', 'sarah@example.com', 'password111', 25)
+INTO User1 VALUES(6, 'David Miller', 'david.miller@example.com', 'password222', 40)
+INTO User1 VALUES(7, 'Olivia Davis', 'olivia.davis@example.com', 'password333', 33)
+INTO User1 VALUES(8, 'Lucas Martinez', 'lucas.martinez@example.com', 'password444', 27)
+INTO User1 VALUES(9, 'Sophia Garcia', 'sophia@example.com', 'password555', 38)
+INTO User1 VALUES(10, 'Ethan Lee', 'ethan.lee@example.com', 'password666', 29)
+select * from dual
+select * from User1
+""",
+    "Plan": """CREATE TABLE Plan (
+    plan_id INT PRIMARY KEY,
+    plan_name VARCHAR(100),
+    price DECIMAL(10, 2),
+    duration INT)
+Insert all
+INTO Plan Values (101, 'Basic', 9.99, 12)
+INTO Plan Values(102, 'Standard', 14.99, 12)
+INTO Plan Values(103, 'Premium', 19.99, 12)
+select * from dual
+select * from Plan
+""",
+    "Subscription": """CREATE TABLE Subscription (
+    subscription_id INT PRIMARY KEY,
+    user_id INT,
+    plan_id INT,
+    start_date DATE,
+    end_date DATE,
+    FOREIGN KEY (user_id) REFERENCES User1(user_id),
+    FOREIGN KEY (plan_id) REFERENCES Plan(plan_id)
+)
+
+Insert all 
+INTO Subscription Values(1001, 1, 101, '01-JAN-2023', '31-DEC-2024')
+INTO Subscription Values(1002, 2, 102, '01-JAN-2023', '31-DEC-2024')
+INTO Subscription Values(1003, 3, 101, '01-FEB-2023', '31-JAN-2024')
+INTO Subscription Values(1004, 4, 103, '01-MAR-2023', '28-FEB-2024')
+INTO Subscription Values(1005, 5, 101, '01-APR-2023', '31-MAR-2024')
+INTO Subscription Values(1006, 6, 102, '01-FEB-2023', '31-JAN-2024')
+INTO Subscription Values(1007, 7, 103, '01-MAY-2023', '30-APR-2024')
+INTO Subscription Values(1008, 8, 101, '01-JUL-2023', '30-JUN-2024')
+INTO Subscription Values(1009, 9, 102, '01-JAN-2023', '31-DEC-2024')
+INTO Subscription Values(1010,10, 103, '01-JUN-2023', '31-MAY-2024')
+select * from dual
+select * from Subscription
+
+""",
+    "Genre": """CREATE TABLE Genre (
+    genre_id INT PRIMARY KEY,
+    genre_name VARCHAR(100)
+)
+
+
+INSERT all
+INTO Genre values(11, 'Action')
+INTO Genre values(22, 'Drama')
+INTO Genre values(33, 'Comedy')
+INTO Genre values(44, 'Horror')
+INTO Genre values(55, 'Romance')
+select * from dual
+select * from genre
+
+""",
+    "Content": """CREATE TABLE Content (
+    content_id INT PRIMARY KEY,
+    title VARCHAR(100),
+    genre_id INT,
+    release_date DATE,
+    type VARCHAR(20), 
+    FOREIGN KEY (genre_id) REFERENCES Genre(genre_id)
+)
+
+INSERT all
+INTO Content VALUES (201, 'Shadow Protocol', 11, '10-JAN-2025', 'movie')
+INTO Content VALUES (202, 'Echoes of Silence', 22, '14-FEB-2025', 'series')
+INTO Content VALUES (203, 'Laugh Lines', 33, '20-MAR-2025', 'movie')
+INTO Content VALUES (204, 'Whispers in the Dark', 44, '18-APR-2025', 'series')
+INTO Content VALUES (205, 'Forever and Always', 55, '09-MAY-2025', 'movie')
+INTO Content VALUES (206, 'Crimson Vengeance', 11, '13-JUN-2025', 'movie')
+INTO Content VALUES (207, 'The Weight of Truth', 22, '25-JUL-2025', 'series')
+INTO Content VALUES (208, 'Accidentally Perfect', 33, '22-AUG-2025', 'movie')
+INTO Content VALUES (209, 'The Hollow Manor', 44, '19-SEP-2025', 'movie')
+INTO Content VALUES (210, 'Hearts Entwined', 55, '14-NOV-2025', 'series')
+SELECT * FROM dual
+SELECT * FROM Content
+""",
+    "Review": """CREATE TABLE Review(
+    review_id INT PRIMARY KEY,
+    user_id INT,
+    content_id INT,
+    rating INT,
+    commentt VARCHAR2(500),
+    FOREIGN KEY (user_id) REFERENCES User1(user_id),
+    FOREIGN KEY (content_id) REFERENCES content(content_id)
+)
+
+Insert all
+INTO Review VALUES(901, 1, 201, 4, 'Great action movie!')
+INTO Review VALUES(902, 2, 202, 5, 'Amazing drama series, must watch!')
+INTO Review VALUES(903, 3, 203, 3, 'It was a decent comedy movie.')
+INTO Review VALUES(904, 4, 204, 2, 'Not scary at all, disappointing.')
+INTO Review VALUES(905, 5, 205, 5, 'Loved the romance, very touching!')
+INTO Review VALUES(906, 6, 206, 4, 'Action-packed and fun.')
+INTO Review VALUES(907, 7, 207, 4, 'Really emotional and well acted.')
+INTO Review VALUES(908, 8, 208, 3, 'Funny but predictable.')
+INTO Review VALUES(909, 9, 209, 4, 'Great horror movie, very intense!')
+INTO Review VALUES(910, 10, 210, 4, 'Nice romantic series, great chemistry!')
+SELECT * FROM dual
+SELECT * FROM Review
+
+""",
+    "Watch_History": """CREATE TABLE Watch_History (
+    history_id INT PRIMARY KEY,
+    user_id INT,
+    content_id INT,
+    watch_date DATE,
+    progress INT, -- Percentage of completion
+    FOREIGN KEY (user_id) REFERENCES User1(user_id),
+    FOREIGN KEY (content_id) REFERENCES Content(content_id)
+);
+
+INSERT ALL
+INTO Watch_History VALUES(701, 1, 201, '10-JAN-2023', 100)
+INTO Watch_History VALUES(702, 2, 202, '14-FEB-2023', 80)
+INTO Watch_History VALUES(703, 3, 203, '25-MAR-2023', 50)
+INTO Watch_History VALUES(704, 4, 204, '10-APR-2023', 20)
+INTO Watch_History VALUES(705, 5, 205, '12-MAY-2023', 100)
+INTO Watch_History VALUES(706, 6, 206, '18-JUN-2023', 30)
+INTO Watch_History VALUES(707, 7, 207, '02-JUL-2023', 100)
+INTO Watch_History VALUES(708, 8, 208, '15-AUG-2023', 60)
+INTO Watch_History VALUES(709, 9, 209, '01-SEP-2023', 90)
+INTO Watch_History VALUES(710, 10, 210, '05-OCT-2023', 40)
+SELECT * FROM dual
+Select * from Watch_History
+""",
+    "Device": """CREATE TABLE Device (
+    device_id INT PRIMARY KEY,
+    user_id INT,
+    device_type VARCHAR(50),
+    device_name VARCHAR(100),
+    FOREIGN KEY (user_id) REFERENCES User1(user_id)
+);
+
+Insert all
+INTO Device VALUES(801, 1, 'Mobile', 'iPhone 13')
+INTO Device VALUES(802, 2, 'Laptop', 'Dell XPS 13')
+INTO Device VALUES(803, 3, 'Tablet', 'Samsung Galaxy Tab S7')
+INTO Device VALUES(804, 4, 'Smart TV', 'Sony Bravia')
+INTO Device VALUES(805, 5, 'Mobile', 'Samsung Galaxy S21')
+INTO Device VALUES(806, 6, 'Laptop', 'MacBook Pro')
+INTO Device VALUES(807, 7, 'Smart TV', 'LG OLED')
+INTO Device VALUES(808, 8, 'Laptop', 'HP Spectre x360')
+INTO Device VALUES(809, 9, 'Mobile', 'Google')
+Select * from dual
+Select * from Device
+
+""",
+    "Payment": """CREATE TABLE Payment (
+    payment_id INT PRIMARY KEY,
+    subscription_id INT,
+    amount DECIMAL(10, 2),
+    payment_date DATE,
+    method VARCHAR(50), -- Payment method (e.g., Credit Card, PayPal)
+    FOREIGN KEY (subscription_id) REFERENCES Subscription(subscription_id)
+);
+
+INSERT ALL
+INTO Payment VALUES(901, 1001, 9.99, '01-JAN-2023', 'Credit Card')
+INTO Payment VALUES(902, 1002, 14.99, '01-FEB-2023', 'PayPal')
+INTO Payment VALUES(903, 1003, 9.99, '01-MAR-2023', 'Credit Card')
+INTO Payment VALUES(904, 1004, 19.99, '01-APR-2023', 'PayPal')
+INTO Payment VALUES(905, 1005, 9.99, '01-MAY-2023', 'Credit Card')
+INTO Payment VALUES(906, 1006, 14.99, '01-JUN-2023', 'PayPal')
+INTO Payment VALUES(907, 1007, 19.99, '01-JUL-2023', 'Credit Card')
+INTO Payment VALUES(908, 1008, 9.99, '01-AUG-2023', 'PayPal')
+INTO Payment VALUES(909, 1009, 14.99, '01-SEP-2023', 'Credit Card')
+INTO Payment VALUES(910, 1010, 19.99, '01-OCT-2023', 'PayPal')
+SELECT * FROM dual
+Select * from Payment
+""",
+    "Actor": """CREATE TABLE Actor (
+    actor_id INT PRIMARY KEY,
+    actor_name VARCHAR(100),
+    dob DATE -- Date of birth
+);
+INSERT ALL
+  INTO Actor VALUES(301, 'Will Smith', '25-SEP-1968')
+  INTO Actor VALUES(302, 'Meryl Streep', '22-JUN-1949')
+  INTO Actor VALUES(303, 'Tom Hanks', '09-JUL-1956')
+  INTO Actor VALUES(304, 'Emma Stone', '06-NOV-1988')
+  INTO Actor VALUES(305, 'Leonardo DiCaprio', '11-NOV-1974')
+  INTO Actor VALUES(306, 'Scarlett Johansson', '22-NOV-1984')
+  INTO Actor VALUES(307, 'Brad Pitt', '18-DEC-1963')
+  INTO Actor VALUES(308, 'Natalie Portman', '09-JUN-1981')
+  INTO Actor VALUES(309, 'Johnny Depp', '09-JUN-1963')
+  INTO Actor VALUES(310, 'Jennifer Lawrence', '15-AUG-1990')
+SELECT * FROM dual;
+Select * from Actor
+
+""",
+    "Content_Actor": """CREATE TABLE Content_Actor (
+    content_id INT,
+    actor_id INT,
+    PRIMARY KEY (content_id, actor_id),
+    FOREIGN KEY (content_id) REFERENCES Content(content_id),
+    FOREIGN KEY (actor_id) REFERENCES Actor(actor_id)
+)
+
+INSERT all 
+INTO Content_Actor values(201, 301)
+INTO Content_Actor values(202, 302)
+INTO Content_Actor values(203, 303)
+INTO Content_Actor values(204, 304)
+INTO Content_Actor values(205, 305)
+INTO Content_Actor values(206, 306)
+INTO Content_Actor values(207, 307)
+INTO Content_Actor values (208, 308)
+INTO Content_Actor values (209, 309)
+INTO Content_Actor values (210, 310)
+Select * from dual
+Select * from Content_Actor
+"""
+}
+
+queries = {
+    "QUERY 1 — Top 3 Most Popular Genres Based on Watch Count": """
+SELECT g.genre_name, COUNT(wh.content_id) AS total_views
+FROM Watch_History wh
+JOIN Content c ON wh.content_id = c.content_id
+JOIN Genre g ON c.genre_id = g.genre_id
+GROUP BY g.genre_name
+ORDER BY total_views DESC;
+""",
+
+    "QUERY 2 — Total Revenue Generated by Each Subscription Plan": """
+SELECT p.plan_name, SUM(pay.amount) AS total_revenue
+FROM Payment pay
+JOIN Subscription s ON pay.subscription_id = s.subscription_id
+JOIN Plan p ON s.plan_id = p.plan_id
+GROUP BY p.plan_name
+ORDER BY total_revenue DESC;
+""",
+
+    "QUERY 3 — Highest Rated Content Titles": """
+SELECT c.title, AVG(r.rating) AS avg_rating
+FROM Review r
+JOIN Content c ON r.content_id = c.content_id
+GROUP BY c.title
+ORDER BY avg_rating DESC;
+""",
+
+    "QUERY 4 — Actor-Wise Average Content Rating": """
+SELECT a.actor_name, AVG(r.rating) AS avg_actor_rating
+FROM Actor a
+JOIN Content_Actor ca ON a.actor_id = ca.actor_id
+JOIN Review r ON ca.content_id = r.content_id
+GROUP BY a.actor_name
+ORDER BY avg_actor_rating DESC;
+""",
+
+    "QUERY 5 — Average Revenue Per User (ARPU)": """
+SELECT SUM(pay.amount) / COUNT(DISTINCT u.user_id) AS avg_revenue_per_user
+FROM User1 u
+JOIN Subscription s ON u.user_id = s.user_id
+JOIN Payment pay ON s.subscription_id = pay.subscription_id;
+""",
+
+    "QUERY 6 — Users Whose Subscription Expires Within 60 Days": """
+SELECT u.user_id, u.name, s.end_date
+FROM User1 u
+JOIN Subscription s ON u.user_id = s.user_id
+WHERE s.end_date BETWEEN SYSDATE AND ADD_MONTHS(SYSDATE, 2)
+ORDER BY s.end_date;
+""",
+
+    "QUERY 7 — Average Watch Completion (%) per Genre": """
+SELECT g.genre_name, AVG(wh.progress) AS avg_completion
+FROM Watch_History wh
+JOIN Content c ON wh.content_id = c.content_id
+JOIN Genre g ON c.genre_id = g.genre_id
+GROUP BY g.genre_name
+ORDER BY avg_completion DESC;
+""",
+
+    "QUERY 8 — Find Users Who Posted More Than or equal to One Review": """
+SELECT u.name, COUNT(r.review_id) AS review_count
+FROM User1 u
+JOIN Review r ON u.user_id = r.user_id
+GROUP BY u.name
+HAVING COUNT(r.review_id) > 1;
+""",
+
+    "QUERY 9 — Most Popular Actor (Based on Number of Watched Contents)": """
+SELECT a.actor_name, COUNT(wh.content_id) AS total_views
+FROM Actor a
+JOIN Content_Actor ca ON a.actor_id = ca.actor_id
+JOIN Watch_History wh ON ca.content_id = wh.content_id
+GROUP BY a.actor_name
+ORDER BY total_views DESC;
+""",
+
+    "QUERY 10 — Genre-Wise Revenue (Advanced Multi-Join)": """
+SELECT g.genre_name, SUM(p.amount) AS total_genre_revenue
+FROM Payment p
+JOIN Subscription s ON p.subscription_id = s.subscription_id
+JOIN User1 u ON s.user_id = u.user_id
+JOIN Watch_History wh ON u.user_id = wh.user_id
+JOIN Content c ON wh.content_id = c.content_id
+JOIN Genre g ON c.genre_id = g.genre_id
+GROUP BY g.genre_name
+ORDER BY total_genre_revenue DESC;
+""",
+
+    "QUERY 11 — Most Popular Content Type (Movie or Series) by Average User Rating": """
+SELECT 
+    c.type AS content_type,
+    AVG(r.rating) AS avg_rating,
+    COUNT(DISTINCT c.content_id) AS total_titles,
+    COUNT(r.review_id) AS total_reviews
+FROM Content c
+JOIN Review r ON c.content_id = r.content_id
+GROUP BY c.type
+ORDER BY avg_rating DESC;
+""",
+
+    "QUERY 12 — Users Who Have Rated Content Above the Average Rating (Subquery)": """
+SELECT 
+    u.user_id, 
+    u.name, 
+    r.content_id, 
+    r.rating
+FROM Review r
+JOIN User1 u ON r.user_id = u.user_id
+WHERE r.rating > (
+    SELECT AVG(rating) 
+    FROM Review
+)
+ORDER BY r.rating DESC;
+"""
+}
+
+
+roadmap = {
+    "📥 Entities & Attributes": "Detailed description of all entities and attributes used in the database.",
+    "🔗 Relationships (ER Diagram)": "ER relationships between entities with diagram upload option.",
+    "📑 Create Tables & Inserts": "SQL table creation statements, insert values, and execution proofs.",
+    "📊 SQL Queries": "Interactive visualization of analytical SQL queries."
+}
+
+entities = {
+    "User1": ["user_id (PK)", "name", "email", "password", "age"],
+    "Subscription": ["subscription_id (PK)", "user_id (FK → User.user_id)", "plan_id (FK → Plan.plan_id)", "start_date", "end_date"],
+    "Plan": ["plan_id (PK)", "plan_name", "price", "duration"],
+    "Content": ["content_id (PK)", "title", "genre_id (FK → Genre.genre_id)", "release_date", "type (movie/series)"],
+    "Genre": ["genre_id (PK)", "genre_name"],
+    "Review": ["review_id (PK)", "user_id (FK → User.user_id)", "content_id (FK → Content.content_id)", "rating", "comment"],
+    "Watch_History": ["history_id (PK)", "user_id (FK → User.user_id)", "content_id (FK → Content.content_id)", "watch_date", "progress"],
+    "Device": ["device_id (PK)", "user_id (FK → User.user_id)", "device_type", "device_name"],
+    "Payment": ["payment_id (PK)", "subscription_id (FK → Subscription.subscription_id)", "amount", "payment_date", "method"],
+    "Actor": ["actor_id (PK)", "actor_name", "dob"],
+    "Content_Actor": ["content_id (FK → Content.content_id, PK)", "actor_id (FK → Actor.actor_id, PK)"]
+}
+
+# Screenshot of each table in Oracle, keyed like sql_scripts
+table_images = {
+    "User": "images/table1.jpeg",
+    "Plan": "images/table2.jpeg",
+    "Subscription": "images/table3.jpeg",
+    "Genre": "images/table4.jpeg",
+    "Content": "images/table5.jpeg",
+    "Review": "images/table6.jpeg",
+    "Watch_History": "images/table7.jpeg",
+    "Device": "images/table8.jpeg",
+    "Payment": "images/table9.jpeg",
+    "Actor": "images/table10.jpeg",
+    "Content_Actor": "images/table11.jpeg"
+}
+
+# Oracle result and explanation screenshots for each query
+query_images = dict(zip(queries, [
+    ["images/table12.jpeg", "images/query1explain.jpeg"],
+    ["images/query2ans.jpeg", "images/query2explain.jpeg"],
+    ["images/query3ans.jpeg", "images/query3explain.jpeg"],
+    ["images/query4ans.jpeg", "images/query4explain.jpeg"],
+    ["images/query5ans.jpeg", "images/query5explain.jpeg"],
+    ["images/query6ans.jpeg", "images/query6explain.jpeg"],
+    ["images/query7ans.jpeg", "images/query7explain.jpeg"],
+    ["images/query8ans.jpeg", "images/query8explain.jpeg"],
+    ["images/query9ans.jpeg", "images/query9explain.jpeg"],
+    ["images/query10ans.jpeg", "images/query10explain.jpeg"],
+    ["images/query11ans.jpeg", "images/query11explain.jpeg"],
+    ["images/query12ans.jpeg", "images/query12explain.jpeg"],
+]))
+
+
+def query_number(title):
+    """The N of a "QUERY N — ..." title, or None."""
+    match = re.match(r"QUERY (\d+)\b", title)
+    return int(match.group(1)) if match else None
+
+
+def freeze(value):
+    """Read-only copy of nested dict/list literal data."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+sql_scripts = freeze(sql_scripts)
+queries = freeze(queries)
+roadmap = freeze(roadmap)
+entities = freeze(entities)
+table_images = freeze(table_images)
+query_images = freeze(query_images)
@@ -0,0 +1,90 @@
+"""Bounded chart data for the dashboard.
+
+A result may have one row per title or per user, far more than a chart can
+show or the browser should receive. ``reduce`` cuts any (label, value) pair of
+columns down to a fixed number of marks before it is charted: categorical
+results keep their ``MAX_BARS - 1`` largest values and fold the rest into one
+"Other" bar, and time series are downsampled with Largest-Triangle-Three-
+Buckets (LTTB), which keeps the peaks and troughs that give a line its shape.
+The minimum and maximum of the full column are computed alongside, since a
+reduced chart may no longer contain them.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+MAX_BARS = 25
+MAX_POINTS = 500
+ISO_DATE = r"^\d{4}-\d{2}-\d{2}"
+
+
+def as_dates(series):
+    """``series`` as datetime64 if it holds dates (or ISO date strings), else None."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if series.dtype != object:
+        return None
+    # Check a few values before all of them; most label columns are not dates
+    sample = series.head(20).dropna()
+    if len(sample) and sample.astype(str).str.match(ISO_DATE).all() \
+            and series.dropna().astype(str).str.match(ISO_DATE).all():
+        return pd.to_datetime(series, errors="coerce")
+    return None
+
+
+def lttb(x, y, points):
+    """Positions of the ``points`` samples LTTB keeps from the series ``x``, ``y`` (x ascending)."""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (points - 2)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        following = slice(end, min(int((i + 2) * every) + 1, n))
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        # Twice the area of the triangle (a, candidate, mean of the next bucket)
+        area = np.abs((x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def top_n(frame, label, value, bars=MAX_BARS, how="sum"):
+    """The ``bars - 1`` largest rows, plus an "Other (k)" row aggregating the rest with ``how``."""
+    if len(frame) <= bars:
+        return frame[[label, value]]
+    values = frame[value].reset_index(drop=True)
+    keep = values.nlargest(bars - 1).index.to_numpy()
+    folded = np.ones(len(values), dtype=bool)
+    folded[keep] = False
+    rest = values[folded]
+    top = frame[[label, value]].iloc[keep].astype({label: str})
+    other = pd.DataFrame({label: [f"Other ({len(rest):,})"], value: [rest.agg(how)]})
+    return pd.concat([top, other], ignore_index=True)
+
+
+def downsample(frame, x, value, points=MAX_POINTS):
+    """``frame`` sorted on ``x`` (datetime64) and thinned to ``points`` rows with LTTB."""
+    frame = frame.dropna(subset=[x, value]).sort_values(x)
+    kept = lttb(frame[x].to_numpy().astype("datetime64[ns]").astype(np.int64), frame[value].to_numpy(), points)
+    return frame.iloc[kept]
+
+
+def reduce(frame, label, value, how="sum"):
+    """Chart data for ``value`` by ``label``: ``(data indexed by label, "line" or "bar", extent)``.
+
+    ``extent`` holds the row count and the minimum and maximum of the full
+    column. ``how`` aggregates the "Other" bar: "sum" for totals and counts,
+    "mean" for averages.
+    """
+    extent = {"rows": len(frame), "min": frame[value].min(), "max": frame[value].max()}
+    dates = as_dates(frame[label])
+    if dates is not None:
+        data = downsample(pd.DataFrame({label: dates, value: frame[value]}), label, value)
+        return data.set_index(label)[value], "line", extent
+    return top_n(frame, label, value, how=how).set_index(label)[value], "bar", extent
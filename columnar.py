@@ -0,0 +1,275 @@
+"""Arrow files of the ``Frames`` tables, memory-mapped at startup.
+
+``save`` writes each table of a ``Frames`` as an uncompressed Arrow IPC
+(Feather v2) file holding one record batch, keeping its compact dtypes:
+categoricals become dictionaries, amounts stay fixed point, dates stay
+datetime64. ``load`` memory-maps the files and hands pandas only the columns
+asked for. Numeric, date and categorical columns of unpartitioned tables
+come back as views of the mapped pages, so opening them copies nothing and
+the OS reads only the pages a query touches; free-text columns are still
+turned into Python strings when they are selected.
+
+Watch_History and Payment are partitioned by the month of watch_date and
+payment_date: each month is a directory of part files. ``append`` routes new
+rows to their months as new parts, ``compact`` merges a month's parts back
+into one file, and loads bounded by ``since``/``until`` open only the months
+in range. The months read are concatenated, which copies them.
+
+Convert the Oracle scripts (or generated data) once, then open the result:
+
+    python columnar.py --out .columnar
+    python columnar.py --users 1000000 --out big.columnar --query "QUERY 1 " --since 2025-01-01
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+import datagen
+from catalog import queries, query_number, sql_scripts
+from frames import COLUMNS, SCHEMA, Frames, typed
+
+
+DIRECTORY = ".columnar"
+SUFFIX = ".arrow"
+
+# Tables stored as one directory per month of this date column
+PARTITIONED = {"Watch_History": "watch_date", "Payment": "payment_date"}
+NO_DATE = "none"
+SCHEMA_FILE = "schema" + SUFFIX
+
+TABLES = {name.lower(): name for name in SCHEMA}
+
+
+def table_path(directory, table):
+    return os.path.join(directory, table + SUFFIX)
+
+
+def months(directory, table):
+    """Month partitions (``"2025-01"``, ..., ``NO_DATE``) of a partitioned table, in order."""
+    folder = os.path.join(directory, table)
+    return sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name)))
+
+
+def part_paths(directory, table, month):
+    folder = os.path.join(directory, table, month)
+    return [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith(SUFFIX)]
+
+
+def write(path, frame):
+    arrow = pa.Table.from_pandas(frame, preserve_index=True).combine_chunks()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    feather.write_feather(arrow, path + ".tmp", compression="uncompressed", chunksize=max(1, len(arrow)))
+    os.replace(path + ".tmp", path)
+
+
+def unlink(table, frame):
+    """``frame`` with categorical foreign keys turned back into key values.
+
+    Parts of partitioned tables store keys this way, so each does not carry
+    a copy of the referenced keys; ``link`` restores the categoricals.
+    """
+    frame = frame.copy(deep=False)
+    for column in SCHEMA[table][2]:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            keys = frame[column]
+            frame[column] = keys.astype(float if keys.isna().any() else keys.cat.categories.dtype)
+    return frame
+
+
+def write_parts(directory, table, frame):
+    """Route the rows of a partitioned table to their months, as a new part file in each."""
+    month = frame[PARTITIONED[table]].to_numpy().astype("datetime64[M]")
+    order = np.argsort(month, kind="stable")
+    keys, starts = np.unique(month[order], return_index=True)
+    for key, rows in zip(keys, np.split(order, starts[1:])):
+        month = NO_DATE if np.isnat(key) else str(key)
+        paths = part_paths(directory, table, month) if os.path.isdir(os.path.join(directory, table, month)) else []
+        number = int(os.path.basename(paths[-1])[5:-len(SUFFIX)]) + 1 if paths else 0
+        write(os.path.join(directory, table, month, f"part-{number:05d}{SUFFIX}"), frame.iloc[rows])
+
+
+def save(frames, directory=DIRECTORY):
+    """Write every table of ``frames`` to ``directory``, replacing what is stored there."""
+    os.makedirs(directory, exist_ok=True)
+    for table, frame in frames.tables.items():
+        if table in PARTITIONED:
+            folder = os.path.join(directory, table)
+            if os.path.isdir(folder):
+                for month in months(directory, table):
+                    for path in part_paths(directory, table, month):
+                        os.remove(path)
+                    os.rmdir(os.path.join(folder, month))
+            frame = unlink(table, frame)
+            write(os.path.join(folder, SCHEMA_FILE), frame.iloc[:0])
+            write_parts(directory, table, frame)
+        else:
+            write(table_path(directory, table), frame)
+
+
+def convert(scripts=sql_scripts, directory=DIRECTORY):
+    """One-shot conversion of the ``INSERT ALL`` scripts to Arrow files."""
+    save(Frames.from_scripts(scripts), directory)
+
+
+def append(directory, table, rows):
+    """Add ``rows`` (tuples in column order) to a partitioned table; each lands in its month."""
+    if table not in PARTITIONED:
+        raise ValueError(f"{table} is not partitioned; save() the frames again to change it")
+    columns = [c for c, _ in SCHEMA[table][0]]
+    frame = typed(table, pd.DataFrame.from_records(rows, columns=columns))
+    stored = ipc.open_file(pa.memory_map(os.path.join(directory, table, SCHEMA_FILE))).schema
+    for field in stored:
+        categorical = pa.types.is_dictionary(field.type)
+        if field.name in frame and categorical != isinstance(frame[field.name].dtype, pd.CategoricalDtype):
+            frame[field.name] = frame[field.name].astype("category" if categorical else object)
+    write_parts(directory, table, frame)
+
+
+def compact(directory, table, max_parts=1):
+    """Merge the part files of every month holding more than ``max_parts``; returns the months merged."""
+    merged = 0
+    for month in months(directory, table):
+        paths = part_paths(directory, table, month)
+        if len(paths) <= max_parts:
+            continue
+        frame = concat([read(path) for path in paths]).to_pandas().sort_index()
+        staged = os.path.join(directory, table, month, "compacted")  # not a part until renamed
+        write(staged, frame)
+        for path in paths:
+            os.remove(path)
+        os.replace(staged, os.path.join(directory, table, month, f"part-00000{SUFFIX}"))
+        merged += 1
+    return merged
+
+
+def read(path, table=None, wanted=None):
+    """Memory-mapped Arrow table at ``path``, keeping only ``wanted`` columns and the primary key."""
+    arrow = ipc.open_file(pa.memory_map(path)).read_all()
+    if wanted is None:
+        return arrow
+    primary_key = SCHEMA[table][1]
+    keep = set(wanted) | set(primary_key if len(primary_key) == 1 else [])
+    return arrow.select([c for c in arrow.column_names if c in keep])
+
+
+def concat(parts):
+    # parts written at different times may have chosen different integer widths
+    return pa.concat_tables(parts, promote_options="permissive")
+
+
+def primary_keys(directory, table):
+    table = TABLES[table.lower()]
+    return read(table_path(directory, table), table, []).to_pandas(split_blocks=True).index
+
+
+def link(directory, table, frame):
+    """Turn the key values in ``frame`` into categoricals of the stored referenced tables; sort by key."""
+    for column, target in SCHEMA[table][2].items():
+        if column in frame:
+            frame[column] = pd.Categorical(frame[column], categories=primary_keys(directory, target))
+    return frame if frame.index.is_monotonic_increasing else frame.sort_index()
+
+
+def load_partitioned(directory, table, wanted=None, since=None, until=None):
+    """A partitioned table read from the months overlapping ``since``..``until`` (inclusive dates)."""
+    date = PARTITIONED[table]
+    bounded = since is not None or until is not None
+    first = str(since)[:7] if since is not None else ""
+    last = str(until)[:7] if until is not None else "9999-12"
+    if bounded and wanted is not None:
+        wanted = set(wanted) | {date}
+    parts = [read(os.path.join(directory, table, SCHEMA_FILE), table, wanted)]
+    for month in months(directory, table):
+        if not bounded or (month != NO_DATE and first <= month <= last):
+            parts += [read(path, table, wanted) for path in part_paths(directory, table, month)]
+    frame = concat(parts).to_pandas(split_blocks=True)
+    if bounded:
+        dates = frame[date]
+        inside = dates.notna()
+        if since is not None:
+            inside &= dates >= pd.Timestamp(since)
+        if until is not None:
+            inside &= dates <= pd.Timestamp(until)
+        frame = frame[inside.to_numpy()]
+    return link(directory, table, frame)
+
+
+def load(directory=DIRECTORY, columns=None, since=None, until=None):
+    """``{table: DataFrame}`` read from ``directory``.
+
+    ``columns`` maps a table to the columns to read besides its primary key;
+    by default every table is read whole. Unpartitioned tables, and
+    partitioned ones whose rows sit in a single file, are read without
+    copying. ``since`` and ``until`` bound the dates of the partitioned
+    tables; months outside them are not opened.
+    """
+    tables = {}
+    for table, wanted in (columns or dict.fromkeys(SCHEMA)).items():
+        if table in PARTITIONED:
+            tables[table] = load_partitioned(directory, table, wanted, since, until)
+        else:
+            tables[table] = read(table_path(directory, table), table, wanted).to_pandas(split_blocks=True)
+    return tables
+
+
+def open_frames(directory=DIRECTORY, titles=None, since=None, until=None):
+    """``Frames`` over the Arrow files, holding only the columns the queries in ``titles`` read.
+
+    With ``titles=None`` every column is loaded. ``since``/``until`` restrict
+    Watch_History and Payment to those dates.
+    """
+    if titles is None:
+        return Frames(load(directory, since=since, until=until), stored=True)
+    columns = {}
+    for title in titles:
+        for table, names in COLUMNS[query_number(title)].items():
+            columns.setdefault(table, set()).update(names)
+    return Frames(load(directory, columns, since, until), stored=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the catalogue tables to memory-mapped Arrow files")
+    parser.add_argument("--out", default=DIRECTORY, help="directory to write the .arrow files to")
+    parser.add_argument("--users", type=int, default=0, help="convert generated data instead of the scripts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--query", default="", help="then open and run queries whose title contains this text")
+    parser.add_argument("--since", help="first watch/payment date the queries see (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last watch/payment date the queries see (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.users:
+        frames = Frames.from_rows(datagen.generate(users=args.users, contents=max(100, args.users // 5),
+                                                   actors=max(50, args.users // 10), seed=args.seed))
+    else:
+        frames = Frames.from_scripts()
+    loaded_s = time.perf_counter() - start
+    save(frames, args.out)
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(args.out) for name in names)
+    print(f"Parsed in {loaded_s:.2f} s, wrote {len(frames.tables)} tables ({size / 1e6:.1f} MB) to {args.out} "
+          f"in {time.perf_counter() - loaded_s - start:.2f} s; "
+          + ", ".join(f"{t} in {len(months(args.out, t))} months" for t in PARTITIONED), file=sys.stderr)
+
+    start = time.perf_counter()
+    open_frames(args.out)
+    print(f"Opened all tables in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    for title in (t for t in queries if args.query and args.query.lower() in t.lower()):
+        start = time.perf_counter()
+        frames = open_frames(args.out, [title], args.since, args.until)
+        opened = time.perf_counter()
+        result = frames.query(title)
+        print(f"\n{title} (open {(opened - start) * 1000:.1f} ms, "
+              f"query {(time.perf_counter() - opened) * 1000:.1f} ms, {len(result)} rows)")
+        print(result.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Rollup cubes of watches and revenue by day, week and month, for the trend charts.
+
+``cube_watch`` keeps views and progress totals per period x genre x plan x
+device type, and ``cube_revenue`` keeps revenue and payment counts per
+period x plan x device type (a payment has no genre). Each cube holds day,
+week (starting Monday) and month cells side by side, told apart by ``grain``,
+so a trend reads only the cells of its grain. Triggers on Watch_History and
+Payment apply each insert or delete as a delta to the row's day, week and
+month cells, the same way as ``aggregates``; the trend charts then group a
+few thousand cells instead of scanning the fact tables.
+
+A watch counts under the plan of the subscription the user held on the watch
+date ("No plan" if none), and a user's device type is that of their first
+registered device ("Unknown" if none): Watch_History does not record the
+device, and counting every device a user owns would count a watch more than
+once. As with ``aggregates``, changes to subscriptions or devices are not
+tracked incrementally; call ``refresh`` after those.
+"""
+
+from aggregates import trigger_statements
+from user_store import SUBSCRIPTION_INDEX
+
+
+# Modifiers of DATE() taking a day to the first day of its period
+GRAINS = {
+    "day": "",
+    "week": ", '-6 days', 'weekday 1'",
+    "month": ", 'start of month'",
+}
+GRAIN_ROWS = " UNION ALL ".join(f"SELECT '{grain}' AS grain" for grain in GRAINS)
+
+
+def period(day, grain="grains.grain"):
+    """SQL for the first day of the ``grain`` period holding ``day``."""
+    cases = " ".join(f"WHEN '{name}' THEN DATE({day}{modifiers})" for name, modifiers in GRAINS.items())
+    return f"CASE {grain} {cases} END"
+
+
+TABLES = {
+    "cube_watch": """CREATE TABLE IF NOT EXISTS cube_watch (
+    grain VARCHAR(5) NOT NULL,
+    period DATE NOT NULL,
+    genre_name VARCHAR(100) NOT NULL,
+    plan_name VARCHAR(100) NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    views INT NOT NULL,
+    progress_sum INT NOT NULL,
+    progress_count INT NOT NULL,
+    PRIMARY KEY (grain, period, genre_name, plan_name, device_type)
+)""",
+    "cube_revenue": """CREATE TABLE IF NOT EXISTS cube_revenue (
+    grain VARCHAR(5) NOT NULL,
+    period DATE NOT NULL,
+    plan_name VARCHAR(100) NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    revenue_cents INT NOT NULL,
+    payments INT NOT NULL,
+    PRIMARY KEY (grain, period, plan_name, device_type)
+)""",
+}
+
+# Lookups the triggers make for every row
+INDEXES = [
+    SUBSCRIPTION_INDEX,
+    "CREATE INDEX IF NOT EXISTS idx_device_user ON Device (user_id, device_id)",
+]
+
+SOURCES = {
+    "cube_watch": ["watch_history", "content", "genre", "subscription", "plan", "device"],
+    "cube_revenue": ["payment", "subscription", "plan", "device"],
+}
+
+NO_PLAN = "No plan"
+NO_DEVICE = "Unknown"
+
+# Dimension lookups; {user}, {day} and {subscription} are SQL expressions
+PLAN_ON = f"""COALESCE((
+        SELECT p.plan_name FROM Subscription s JOIN Plan p ON s.plan_id = p.plan_id
+        WHERE s.user_id = {{user}} AND s.start_date <= {{day}} AND (s.end_date IS NULL OR s.end_date >= {{day}})
+        ORDER BY s.start_date DESC LIMIT 1), '{NO_PLAN}')"""
+PLAN_OF = f"""COALESCE((
+        SELECT p.plan_name FROM Subscription s JOIN Plan p ON s.plan_id = p.plan_id
+        WHERE s.subscription_id = {{subscription}}), '{NO_PLAN}')"""
+DEVICE_OF = f"""COALESCE((
+        SELECT d.device_type FROM Device d WHERE d.user_id = {{user}}
+        ORDER BY d.device_id LIMIT 1), '{NO_DEVICE}')"""
+
+# One fact row's delta, once per grain; {row} is NEW or OLD and {sign} is 1 or -1
+DELTAS = {
+    "Watch_History": [
+        """INSERT INTO cube_watch (grain, period, genre_name, plan_name, device_type, views, progress_sum, progress_count)
+    SELECT grains.grain, {period}, g.genre_name, {plan}, {device},
+           {{sign}}, {{sign}} * COALESCE({{row}}.progress, 0), {{sign}} * ({{row}}.progress IS NOT NULL)
+    FROM Content c JOIN Genre g ON c.genre_id = g.genre_id CROSS JOIN ({grains}) grains
+    WHERE c.content_id = {{row}}.content_id AND {{row}}.watch_date IS NOT NULL
+    ON CONFLICT (grain, period, genre_name, plan_name, device_type) DO UPDATE SET
+        views = views + excluded.views,
+        progress_sum = progress_sum + excluded.progress_sum,
+        progress_count = progress_count + excluded.progress_count""".format(
+            period=period("{row}.watch_date"), grains=GRAIN_ROWS,
+            plan=PLAN_ON.format(user="{row}.user_id", day="{row}.watch_date"),
+            device=DEVICE_OF.format(user="{row}.user_id")),
+    ],
+    "Payment": [
+        """INSERT INTO cube_revenue (grain, period, plan_name, device_type, revenue_cents, payments)
+    SELECT grains.grain, {period}, {plan}, {device},
+           {{sign}} * COALESCE(CAST(ROUND({{row}}.amount * 100) AS INT), 0), {{sign}}
+    FROM ({grains}) grains
+    WHERE {{row}}.payment_date IS NOT NULL
+    ON CONFLICT (grain, period, plan_name, device_type) DO UPDATE SET
+        revenue_cents = revenue_cents + excluded.revenue_cents,
+        payments = payments + excluded.payments""".format(
+            period=period("{row}.payment_date"), grains=GRAIN_ROWS,
+            plan=PLAN_OF.format(subscription="{row}.subscription_id"),
+            device=DEVICE_OF.format(
+                user="(SELECT user_id FROM Subscription WHERE subscription_id = {row}.subscription_id)")),
+    ],
+}
+
+# Cells a delete emptied, among the row's day, week and month cells
+CLEANUP = {
+    "Watch_History": [
+        f"DELETE FROM cube_watch WHERE grain = '{grain}' AND period = DATE(OLD.watch_date{modifiers}) AND views <= 0"
+        for grain, modifiers in GRAINS.items()
+    ],
+    "Payment": [
+        f"DELETE FROM cube_revenue WHERE grain = '{grain}' AND period = DATE(OLD.payment_date{modifiers}) "
+        "AND payments <= 0"
+        for grain, modifiers in GRAINS.items()
+    ],
+}
+
+# Daily cells first, with the dimension lookups made once per fact row, then each grain rolled up from them
+BACKFILL = {
+    "cube_watch": """INSERT INTO cube_watch
+SELECT grains.grain, {period} AS at, genre_name, plan_name, device_type,
+       SUM(views), SUM(progress_sum), SUM(progress_count)
+FROM (
+    SELECT day, genre_name, plan_name, device_type,
+           COUNT(*) AS views, COALESCE(SUM(progress), 0) AS progress_sum, COUNT(progress) AS progress_count
+    FROM (
+        SELECT DATE(wh.watch_date) AS day, g.genre_name, wh.progress,
+               {plan} AS plan_name, {device} AS device_type
+        FROM Watch_History wh
+        JOIN Content c ON wh.content_id = c.content_id
+        JOIN Genre g ON c.genre_id = g.genre_id
+        WHERE wh.watch_date IS NOT NULL
+    )
+    GROUP BY day, genre_name, plan_name, device_type
+) CROSS JOIN ({grains}) grains
+GROUP BY grains.grain, at, genre_name, plan_name, device_type""".format(
+        period=period("day"), grains=GRAIN_ROWS,
+        plan=PLAN_ON.format(user="wh.user_id", day="wh.watch_date"), device=DEVICE_OF.format(user="wh.user_id")),
+    "cube_revenue": """INSERT INTO cube_revenue
+SELECT grains.grain, {period} AS at, plan_name, device_type, SUM(revenue_cents), SUM(payments)
+FROM (
+    SELECT day, plan_name, device_type,
+           COALESCE(SUM(CAST(ROUND(amount * 100) AS INT)), 0) AS revenue_cents, COUNT(*) AS payments
+    FROM (
+        SELECT DATE(pay.payment_date) AS day, pay.amount,
+               {plan} AS plan_name, {device} AS device_type
+        FROM Payment pay
+        LEFT JOIN Subscription sub ON pay.subscription_id = sub.subscription_id
+        WHERE pay.payment_date IS NOT NULL
+    )
+    GROUP BY day, plan_name, device_type
+) CROSS JOIN ({grains}) grains
+GROUP BY grains.grain, at, plan_name, device_type""".format(
+        period=period("day"), grains=GRAIN_ROWS,
+        plan=PLAN_OF.format(subscription="pay.subscription_id"), device=DEVICE_OF.format(user="sub.user_id")),
+}
+
+# measure -> (cube, SQL over the cube cells of a period)
+MEASURES = {
+    "views": ("cube_watch", "SUM(views)"),
+    "completion": ("cube_watch", "CAST(SUM(progress_sum) AS REAL) / NULLIF(SUM(progress_count), 0)"),
+    "revenue": ("cube_revenue", "SUM(revenue_cents) / 100.0"),
+}
+
+DIMENSIONS = {
+    "cube_watch": ["genre_name", "plan_name", "device_type"],
+    "cube_revenue": ["plan_name", "device_type"],
+}
+
+
+def install(engine):
+    """Create the cubes, their indexes and triggers on ``engine``, backfilling any new cube."""
+    with engine.lock, engine.conn:
+        existing = {r[0] for r in engine.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for statement in INDEXES:
+            engine.conn.execute(statement)
+        for name, ddl in TABLES.items():
+            engine.conn.execute(ddl)
+            if name not in existing:
+                engine.conn.execute(BACKFILL[name])
+        for statement in trigger_statements("cube", DELTAS, CLEANUP, {}):
+            engine.conn.execute(statement)
+    for name, sources in SOURCES.items():
+        engine.derive(name, sources)
+
+
+def refresh(engine):
+    """Rebuild the cubes from the base tables."""
+    with engine.lock, engine.conn:
+        for name in TABLES:
+            engine.conn.execute(f"DELETE FROM {name}")
+            engine.conn.execute(BACKFILL[name])
+    engine.touch(*TABLES)
+
+
+def trend(source, measure, grain="week", by=None, since=None, until=None):
+    """``measure`` per ``grain`` period (and per ``by`` dimension), oldest first.
+
+    Columns are ``period``, then ``by`` if given, then ``measure``. ``since``
+    and ``until`` are ISO dates; the periods holding them are included.
+    ``source`` is an ``Engine`` or a ``QueryCache`` in front of one.
+    """
+    cube, value = MEASURES[measure]
+    if by is not None and by not in DIMENSIONS[cube]:
+        raise ValueError(f"{measure} cannot be broken down by {by}; use one of {DIMENSIONS[cube]}")
+    group = f", {by}" if by else ""
+    return source.query(f"""
+SELECT period{group}, {value} AS {measure}
+FROM {cube}
+WHERE grain = ? AND period BETWEEN DATE(?{GRAINS[grain]}) AND ?
+GROUP BY period{group}
+ORDER BY period{group}""", (grain, str(since or "0001-01-01"), str(until or "9999-12-31")))
@@ -0,0 +1,218 @@
+"""Seedable synthetic data for the streaming platform schema.
+
+Generates the 11 tables at any scale with realistic skew: content popularity
+follows a Zipf law, a few actors appear in most titles and users hold one or
+more subscriptions. Rows are produced in fixed-size chunks, parents before
+children, so every foreign key resolves and memory stays bounded.
+
+    python datagen.py --users 1000000 --seed 7 --out streaming.db
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from catalog import sql_scripts
+from engine import Engine, parse_script
+
+
+FIRST_NAMES = ["John", "Jane", "Emily", "Michael", "Sarah", "David", "Olivia", "Lucas", "Sophia", "Ethan",
+               "Ava", "Noah", "Mia", "Liam", "Isabella", "James", "Amelia", "Aarav", "Priya", "Chen"]
+LAST_NAMES = ["Doe", "Smith", "Brown", "Johnson", "Williams", "Miller", "Davis", "Martinez", "Garcia", "Lee",
+              "Wilson", "Taylor", "Anderson", "Thomas", "Moore", "Patel", "Sharma", "Kim", "Nguyen", "Lopez"]
+TITLE_WORDS = ["Shadow", "Echoes", "Laugh", "Whispers", "Forever", "Crimson", "Truth", "Perfect", "Hollow",
+               "Hearts", "Silent", "Midnight", "Broken", "Golden", "Last", "Hidden", "Wild", "Frozen"]
+DEVICES = {
+    "Mobile": ["iPhone 13", "Samsung Galaxy S21", "Google Pixel 7"],
+    "Laptop": ["Dell XPS 13", "MacBook Pro", "HP Spectre x360"],
+    "Tablet": ["Samsung Galaxy Tab S7", "iPad Air"],
+    "Smart TV": ["Sony Bravia", "LG OLED"],
+}
+METHODS = ["Credit Card", "PayPal", "Debit Card", "UPI"]
+METHOD_WEIGHTS = [0.45, 0.3, 0.15, 0.1]
+RATING_WEIGHTS = [0.05, 0.1, 0.2, 0.4, 0.25]
+PLAN_WEIGHTS = [0.5, 0.3, 0.2]
+
+EPOCH = np.datetime64("2022-01-01")
+
+
+def zipf_weights(n, a):
+    """Probabilities for ranks 1..n under a Zipf law with exponent ``a``."""
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return weights / weights.sum()
+
+
+def iso(days):
+    """Format day offsets from ``EPOCH`` as ISO date strings."""
+    return np.datetime_as_string(EPOCH + days.astype("timedelta64[D]")).tolist()
+
+
+def chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def reference_rows(table):
+    """Seed rows for the small lookup tables (Plan, Genre) from the catalog scripts."""
+    _, rows = parse_script(sql_scripts[table])
+    return next(iter(rows.values()))
+
+
+def generate(users=10_000, contents=2_000, actors=1_000, watches_per_user=20, reviews_per_user=3,
+             zipf_a=1.1, seed=0, chunk_size=100_000):
+    """Yield ``(table, rows)`` chunks for the whole schema in foreign-key order."""
+    rng = np.random.default_rng(seed)
+
+    plans = reference_rows("Plan")
+    genres = reference_rows("Genre")
+    yield "Plan", plans
+    yield "Genre", genres
+
+    for start, n in chunks(users, chunk_size):
+        ids = np.arange(start + 1, start + n + 1)
+        first = rng.integers(0, len(FIRST_NAMES), n)
+        last = rng.integers(0, len(LAST_NAMES), n)
+        ages = rng.integers(16, 75, n)
+        yield "User1", [(int(i), f"{FIRST_NAMES[f]} {LAST_NAMES[l]}", f"user{i}@example.com", f"password{i}", int(a))
+                        for i, f, l, a in zip(ids.tolist(), first.tolist(), last.tolist(), ages.tolist())]
+
+    # Content popularity and actor prominence are both Zipfian; the rank order
+    # is shuffled so popular ids are spread across the key range.
+    genre_ids = np.array([g[0] for g in genres])
+    content_rank = rng.permutation(contents) + 1
+    content_p = zipf_weights(contents, zipf_a)
+    actor_rank = rng.permutation(actors) + 1
+    actor_p = zipf_weights(actors, zipf_a)
+
+    for start, n in chunks(actors, chunk_size):
+        ids = np.arange(start + 1, start + n + 1)
+        first = rng.integers(0, len(FIRST_NAMES), n)
+        last = rng.integers(0, len(LAST_NAMES), n)
+        dob = rng.integers(-30_000, -8_000, n)
+        yield "Actor", [(int(i), f"{FIRST_NAMES[f]} {LAST_NAMES[l]}", d)
+                        for i, f, l, d in zip(ids.tolist(), first.tolist(), last.tolist(), iso(dob))]
+
+    for start, n in chunks(contents, chunk_size):
+        ids = np.arange(start + 1, start + n + 1)
+        words = rng.integers(0, len(TITLE_WORDS), (n, 2))
+        genre = rng.choice(genre_ids, n)
+        release = rng.integers(-8_000, 1_460, n)
+        kind = np.where(rng.random(n) < 0.65, "movie", "series")
+        yield "Content", [(int(i), f"{TITLE_WORDS[w[0]]} {TITLE_WORDS[w[1]]} {i}", int(g), r, k)
+                          for i, w, g, r, k in zip(ids.tolist(), words.tolist(), genre.tolist(),
+                                                   iso(release), kind.tolist())]
+
+        # One to four credited actors per title, drawn from the long tail and
+        # deduplicated so the composite primary key holds.
+        cast = rng.integers(1, 5, n)
+        content_ids = np.repeat(ids, cast)
+        actor_ids = actor_rank[rng.choice(actors, cast.sum(), p=actor_p)]
+        pairs = np.unique(np.stack([content_ids, actor_ids], axis=1), axis=0)
+        yield "Content_Actor", [tuple(p) for p in pairs.tolist()]
+
+    # Users hold a geometric number of subscriptions, each starting on an
+    # independent random day of the four-year span (so a user's subscriptions
+    # may overlap or leave gaps) and paid monthly for a random number of months.
+    plan_ids = np.array([p[0] for p in plans])
+    plan_price = {p[0]: p[2] for p in plans}
+    plan_months = {p[0]: p[3] for p in plans}
+    subscription_id = payment_id = 0
+    for start, n in chunks(users, chunk_size):
+        per_user = rng.geometric(0.6, n)
+        user_ids = np.repeat(np.arange(start + 1, start + n + 1), per_user)
+        m = len(user_ids)
+        ids = np.arange(subscription_id + 1, subscription_id + m + 1)
+        subscription_id += m
+        plan = rng.choice(plan_ids, m, p=PLAN_WEIGHTS)
+        begin = rng.integers(0, 1_460, m)
+        months = np.array([plan_months[p] for p in plan.tolist()])
+        end = begin + months * 30 + rng.integers(-1, 2, m)
+        yield "Subscription", list(zip(ids.tolist(), user_ids.tolist(), plan.tolist(), iso(begin), iso(end)))
+
+        paid = np.minimum(1 + rng.poisson(2, m), months)
+        sub_ids = np.repeat(ids, paid)
+        offset = np.concatenate([np.arange(k) for k in paid.tolist()]) * 30
+        pay_dates = np.repeat(begin, paid) + offset
+        amounts = [plan_price[p] for p in np.repeat(plan, paid).tolist()]
+        method = rng.choice(METHODS, len(sub_ids), p=METHOD_WEIGHTS)
+        pay_ids = np.arange(payment_id + 1, payment_id + len(sub_ids) + 1)
+        payment_id += len(sub_ids)
+        yield "Payment", list(zip(pay_ids.tolist(), sub_ids.tolist(), amounts, iso(pay_dates), method.tolist()))
+
+    device_id = 0
+    device_types = list(DEVICES)
+    for start, n in chunks(users, chunk_size):
+        per_user = rng.integers(1, 4, n)
+        user_ids = np.repeat(np.arange(start + 1, start + n + 1), per_user)
+        kind = rng.integers(0, len(device_types), len(user_ids))
+        model = rng.integers(0, 3, len(user_ids))
+        rows = []
+        for uid, k, mdl in zip(user_ids.tolist(), kind.tolist(), model.tolist()):
+            device_id += 1
+            names = DEVICES[device_types[k]]
+            rows.append((device_id, uid, device_types[k], names[mdl % len(names)]))
+        yield "Device", rows
+
+    for start, n in chunks(users * watches_per_user, chunk_size):
+        ids = np.arange(start + 1, start + n + 1)
+        user_ids = rng.integers(1, users + 1, n)
+        content_ids = content_rank[rng.choice(contents, n, p=content_p)]
+        watched = rng.integers(365, 1_460, n)
+        progress = np.where(rng.random(n) < 0.4, 100, rng.integers(1, 100, n))
+        yield "Watch_History", list(zip(ids.tolist(), user_ids.tolist(), content_ids.tolist(),
+                                        iso(watched), progress.tolist()))
+
+    for start, n in chunks(users * reviews_per_user, chunk_size):
+        ids = np.arange(start + 1, start + n + 1)
+        user_ids = rng.integers(1, users + 1, n)
+        content_ids = content_rank[rng.choice(contents, n, p=content_p)]
+        rating = rng.choice(5, n, p=RATING_WEIGHTS) + 1
+        yield "Review", [(i, u, c, r, None) for i, u, c, r in
+                         zip(ids.tolist(), user_ids.tolist(), content_ids.tolist(), rating.tolist())]
+
+
+def populate(engine, **params):
+    """Stream generated chunks into ``engine`` and return the row count per table."""
+    counts = {}
+    with engine.lock:
+        engine.conn.execute("PRAGMA synchronous = OFF")
+        engine.conn.execute("PRAGMA journal_mode = MEMORY")
+    for table, rows in generate(**params):
+        counts[table] = counts.get(table, 0) + engine.insert_rows(table, rows)
+    return counts
+
+
+def build(path=":memory:", **params):
+    """Create an empty schema at ``path``, fill it and return ``(engine, counts)``."""
+    engine = Engine.from_scripts(sql_scripts, path=path, with_rows=False)
+    return engine, populate(engine, **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="streaming.db", help="SQLite database file (replaced if it exists)")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--contents", type=int, default=2_000)
+    parser.add_argument("--actors", type=int, default=1_000)
+    parser.add_argument("--watches-per-user", type=int, default=20)
+    parser.add_argument("--reviews-per-user", type=int, default=3)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for content and actor popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if os.path.exists(args.out):
+        os.remove(args.out)
+    _, counts = build(args.out, users=args.users, contents=args.contents, actors=args.actors,
+                      watches_per_user=args.watches_per_user, reviews_per_user=args.reviews_per_user,
+                      zipf_a=args.zipf, seed=args.seed, chunk_size=args.chunk_size)
+    for table, count in counts.items():
+        print(f"{table:<15} {count:>12,}")
+    print(f"Wrote {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
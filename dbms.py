@@ -1,6 +1,27 @@
+import os
+import time
+from datetime import date
+
 import streamlit as st
 
 import pandas as pd
+import plotly.express as px
+
+import aggregates
+import charts
+import cubes
+import profiler
+import subscriptions
+from assets import AssetManifest
+from catalog import entities, queries, query_images, query_number, roadmap, sql_scripts, table_images
+from engine import Engine
+from query_cache import QueryCache
+from recommender import Recommender
+from result_grid import ResultGrid
+from sketches import Sketches
+from summary import summarize
+from thumbnails import thumbnail
+from user_store import PAGE_SIZE, UserStore
 
 
 # ============================
@@ -19,6 +40,63 @@ st.markdown(
     unsafe_allow_html=True)
 st.title("🎬 Online Streaming Platform — DBMS Dashboard")
 
+
+# Embedded database built once per process from the table scripts, or opened
+# from a file produced by datagen.py when STREAMING_DB points at one
+@st.cache_resource
+def get_engine():
+    if os.environ.get("STREAMING_DB"):
+        engine = Engine(os.environ["STREAMING_DB"])
+    else:
+        engine = Engine.from_scripts(sql_scripts)
+    aggregates.install(engine)
+    cubes.install(engine)
+    subscriptions.install(engine)
+    return engine
+
+
+# Query results shared by all sessions, invalidated per table on writes
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(get_engine())
+
+
+# Query results kept in the engine and read a page at a time by the SQL tab
+@st.cache_resource
+def get_result_grid():
+    return ResultGrid(get_engine())
+
+
+# Login index and per-user lookups shared by all sessions
+@st.cache_resource
+def get_user_store():
+    return UserStore(get_engine())
+
+
+# Neighbour index for recommendations and cast lookups, kept next to the
+# database file (or in .neighbour_index/) and patched in the background on writes
+@st.cache_resource
+def get_recommender():
+    path = os.environ["STREAMING_DB"] + ".neighbours" if os.environ.get("STREAMING_DB") else ".neighbour_index"
+    return Recommender(get_engine(), path)
+
+
+# HyperLogLog / t-digest sketches for the approximate mode of the SQL tab,
+# folded forward on inserts and rebuilt after updates or deletes
+@st.cache_resource
+def get_sketches():
+    return Sketches(get_engine())
+
+
+# Verified poster/headshot paths, resolved once at startup
+@st.cache_resource
+def get_asset_manifest():
+    return AssetManifest()
+
+
+manifest = get_asset_manifest()
+
+
 # Sidebar Navigation
 st.sidebar.title("Navigation")
 tabs = [
@@ -28,6 +106,7 @@ tabs = [
     "🔗 Relationships (ER Diagram)",
     "📑 Create Tables & Inserts",
     "📊 SQL Queries",
+    "📈 Trends",
     "👤 User Dashboard"
 ]
 if "selected_tab" not in st.session_state:
@@ -39,6 +118,23 @@ selected_tab = st.sidebar.radio(
 )
 
 st.session_state["selected_tab"] = selected_tab
+
+# Opt-in per-rerun stage timings, shown at the bottom of the sidebar
+profiling = st.sidebar.toggle("⏱ Profile reruns", value=profiler.enabled_by_default())
+profile = profiler.RerunProfile(selected_tab, profiling)
+
+
+def show_profile():
+    record = profile.finish()
+    if record is None:
+        return
+    with st.sidebar.expander("⏱ Rerun profile", expanded=True):
+        st.caption(f"{record['tab']} — {record['total_ms']:.1f} ms, "
+                   f"{record['alloc_kb']:+.0f} KB retained, {record['peak_kb']:.0f} KB peak")
+        if record["stages"]:
+            st.dataframe(pd.DataFrame.from_dict(record["stages"], orient="index"), use_container_width=True)
+
+
 # ============================
 # TAB 0 — PROJECT OVERVIEW
 # ============================
@@ -119,12 +215,6 @@ if selected_tab == "🔖 Roadmap / Index":
     Use this roadmap to navigate through different project components:
     """)
 
-    roadmap = {
-        "📥 Entities & Attributes": "Detailed description of all entities and attributes used in the database.",
-        "🔗 Relationships (ER Diagram)": "ER relationships between entities with diagram upload option.",
-        "📑 Create Tables & Inserts": "SQL table creation statements, insert values, and execution proofs.",
-        "📊 SQL Queries": "Interactive visualization of analytical SQL queries."
-    }
 
     for name, desc in roadmap.items():
         st.markdown(f"**{name}** — {desc}")
@@ -138,23 +228,6 @@ elif selected_tab == "📥 Entities & Attributes":
     st.header("📥 Entities & Attributes")
     st.write("Below are the entities and their corresponding attributes:")
 
-    entities = {
-        "User1": ["user_id (PK)", 
-                 "name", 
-                 "email", 
-                 "password", 
-                 "age"],
-        "Subscription": ["subscription_id (PK)", "user_id (FK → User.user_id)", "plan_id (FK → Plan.plan_id)", "start_date", "end_date"],
-        "Plan": ["plan_id (PK)", "plan_name", "price", "duration"],
-        "Content": ["content_id (PK)", "title", "genre_id (FK → Genre.genre_id)", "release_date", "type (movie/series)"],
-        "Genre": ["genre_id (PK)", "genre_name"],
-        "Review": ["review_id (PK)", "user_id (FK → User.user_id)", "content_id (FK → Content.content_id)", "rating", "comment"],
-        "Watch_History": ["history_id (PK)", "user_id (FK → User.user_id)", "content_id (FK → Content.content_id)", "watch_date", "progress"],
-        "Device": ["device_id (PK)", "user_id (FK → User.user_id)", "device_type", "device_name"],
-        "Payment": ["payment_id (PK)", "subscription_id (FK → Subscription.subscription_id)", "amount", "payment_date", "method"],
-        "Actor": ["actor_id (PK)", "actor_name", "dob"],
-        "Content_Actor": ["content_id (FK → Content.content_id, PK)", "actor_id (FK → Actor.actor_id, PK)"]
-    }
 
     for entity, attributes in entities.items():
         with st.expander(f"📍 {entity}"):
@@ -179,10 +252,11 @@ elif selected_tab == "🔗 Relationships (ER Diagram)":
     """)
 
 
-    st.image("images/erdiag1.jpeg", caption="Uploaded ER Diagram")
-    st.image("images/erdiag2.jpeg", caption="Uploaded ER Diagram")
-    st.image("images/extendeder1.jpeg", caption="Extended ER Diagram")
-    st.image("images/extendeder2.jpeg", caption="Extended ER Diagram")
+    with profile.span("st.image"):
+        st.image(thumbnail(manifest.image("images/erdiag1.jpeg"), "diagram"), caption="Uploaded ER Diagram")
+        st.image(thumbnail(manifest.image("images/erdiag2.jpeg"), "diagram"), caption="Uploaded ER Diagram")
+        st.image(thumbnail(manifest.image("images/extendeder1.jpeg"), "diagram"), caption="Extended ER Diagram")
+        st.image(thumbnail(manifest.image("images/extendeder2.jpeg"), "diagram"), caption="Extended ER Diagram")
 
 # ============================
 # TAB 4 — CREATE TABLES
@@ -191,274 +265,21 @@ elif selected_tab == "📑 Create Tables & Inserts":
     st.header("📑 Table Creation & Inserts")
 
     
-    table_tabs = [
-        "User", "Plan", "Subscription", "Genre", "Content",
-        "Review", "Watch_History", "Device", "Payment", "Actor", "Content_Actor"
-    ]
-    sub_tab = st.selectbox("Select Table:", table_tabs)
+    sub_tab = st.selectbox("Select Table:", list(sql_scripts))
 
     st.subheader(f"📄 SQL for {sub_tab} Table")
 
-    sql_scripts = {
-        "User": """CREATE TABLE User1(
-    user_id INT PRIMARY KEY,
-    name VARCHAR(100),
-    email VARCHAR(100) UNIQUE,
-    password VARCHAR(100),
-    age INT
-)
-
-Insert all
-INTO User1 VALUES(1, 'John Doe', 'john@example.com', 'password123', 28)
-INTO User1 VALUES(2, 'Jane Smith', 'jane.smith@example.com', 'password456', 34)
-INTO User1 VALUES(3, 'Emily Brown', 'emily@example.com', 'password789', 22)
-INTO User1 VALUES(4, 'Michael Johnson', 'michael.johnson@example.com', 'password000', 30)
-INTO User1 VALUES(5, 'Sarah Williams', 'sarah@example.com', 'password111', 25)
-INTO User1 VALUES(6, 'David Miller', 'david.miller@example.com', 'password222', 40)
-INTO User1 VALUES(7, 'Olivia Davis', 'olivia.davis@example.com', 'password333', 33)
-INTO User1 VALUES(8, 'Lucas Martinez', 'lucas.martinez@example.com', 'password444', 27)
-INTO User1 VALUES(9, 'Sophia Garcia', 'sophia@example.com', 'password555', 38)
-INTO User1 VALUES(10, 'Ethan Lee', 'ethan.lee@example.com', 'password666', 29)
-select * from dual
-select * from User1
-""",
-        "Plan": """CREATE TABLE Plan (
-    plan_id INT PRIMARY KEY,
-    plan_name VARCHAR(100),
-    price DECIMAL(10, 2),
-    duration INT)
-Insert all
-INTO Plan Values (101, 'Basic', 9.99, 12)
-INTO Plan Values(102, 'Standard', 14.99, 12)
-INTO Plan Values(103, 'Premium', 19.99, 12)
-select * from dual
-select * from Plan
-""",
-        "Subscription": """CREATE TABLE Subscription (
-    subscription_id INT PRIMARY KEY,
-    user_id INT,
-    plan_id INT,
-    start_date DATE,
-    end_date DATE,
-    FOREIGN KEY (user_id) REFERENCES User1(user_id),
-    FOREIGN KEY (plan_id) REFERENCES Plan(plan_id)
-)
-
-Insert all 
-INTO Subscription Values(1001, 1, 101, '01-JAN-2023', '31-DEC-2024')
-INTO Subscription Values(1002, 2, 102, '01-JAN-2023', '31-DEC-2024')
-INTO Subscription Values(1003, 3, 101, '01-FEB-2023', '31-JAN-2024')
-INTO Subscription Values(1004, 4, 103, '01-MAR-2023', '28-FEB-2024')
-INTO Subscription Values(1005, 5, 101, '01-APR-2023', '31-MAR-2024')
-INTO Subscription Values(1006, 6, 102, '01-FEB-2023', '31-JAN-2024')
-INTO Subscription Values(1007, 7, 103, '01-MAY-2023', '30-APR-2024')
-INTO Subscription Values(1008, 8, 101, '01-JUL-2023', '30-JUN-2024')
-INTO Subscription Values(1009, 9, 102, '01-JAN-2023', '31-DEC-2024')
-INTO Subscription Values(1010,10, 103, '01-JUN-2023', '31-MAY-2024')
-select * from dual
-select * from Subscription
-
-""",
-        "Genre": """CREATE TABLE Genre (
-    genre_id INT PRIMARY KEY,
-    genre_name VARCHAR(100)
-)
-
-
-INSERT all
-INTO Genre values(11, 'Action')
-INTO Genre values(22, 'Drama')
-INTO Genre values(33, 'Comedy')
-INTO Genre values(44, 'Horror')
-INTO Genre values(55, 'Romance')
-select * from dual
-select * from genre
-
-""",
-        "Content": """CREATE TABLE Content (
-    content_id INT PRIMARY KEY,
-    title VARCHAR(100),
-    genre_id INT,
-    release_date DATE,
-    type VARCHAR(20), 
-    FOREIGN KEY (genre_id) REFERENCES Genre(genre_id)
-)
-
-INSERT all
-INTO Content VALUES (201, 'Shadow Protocol', 11, '10-JAN-2025', 'movie')
-INTO Content VALUES (202, 'Echoes of Silence', 22, '14-FEB-2025', 'series')
-INTO Content VALUES (203, 'Laugh Lines', 33, '20-MAR-2025', 'movie')
-INTO Content VALUES (204, 'Whispers in the Dark', 44, '18-APR-2025', 'series')
-INTO Content VALUES (205, 'Forever and Always', 55, '09-MAY-2025', 'movie')
-INTO Content VALUES (206, 'Crimson Vengeance', 11, '13-JUN-2025', 'movie')
-INTO Content VALUES (207, 'The Weight of Truth', 22, '25-JUL-2025', 'series')
-INTO Content VALUES (208, 'Accidentally Perfect', 33, '22-AUG-2025', 'movie')
-INTO Content VALUES (209, 'The Hollow Manor', 44, '19-SEP-2025', 'movie')
-INTO Content VALUES (210, 'Hearts Entwined', 55, '14-NOV-2025', 'series')
-SELECT * FROM dual
-SELECT * FROM Content
-""",
-        "Review": """CREATE TABLE Review(
-    review_id INT PRIMARY KEY,
-    user_id INT,
-    content_id INT,
-    rating INT,
-    commentt VARCHAR2(500),
-    FOREIGN KEY (user_id) REFERENCES User1(user_id),
-    FOREIGN KEY (content_id) REFERENCES content(content_id)
-)
-
-Insert all
-INTO Review VALUES(901, 1, 201, 4, 'Great action movie!')
-INTO Review VALUES(902, 2, 202, 5, 'Amazing drama series, must watch!')
-INTO Review VALUES(903, 3, 203, 3, 'It was a decent comedy movie.')
-INTO Review VALUES(904, 4, 204, 2, 'Not scary at all, disappointing.')
-INTO Review VALUES(905, 5, 205, 5, 'Loved the romance, very touching!')
-INTO Review VALUES(906, 6, 206, 4, 'Action-packed and fun.')
-INTO Review VALUES(907, 7, 207, 4, 'Really emotional and well acted.')
-INTO Review VALUES(908, 8, 208, 3, 'Funny but predictable.')
-INTO Review VALUES(909, 9, 209, 4, 'Great horror movie, very intense!')
-INTO Review VALUES(910, 10, 210, 4, 'Nice romantic series, great chemistry!')
-SELECT * FROM dual
-SELECT * FROM Review
-
-""",
-        "Watch_History": """CREATE TABLE Watch_History (
-    history_id INT PRIMARY KEY,
-    user_id INT,
-    content_id INT,
-    watch_date DATE,
-    progress INT, -- Percentage of completion
-    FOREIGN KEY (user_id) REFERENCES User1(user_id),
-    FOREIGN KEY (content_id) REFERENCES Content(content_id)
-);
-
-INSERT ALL
-INTO Watch_History VALUES(701, 1, 201, '10-JAN-2023', 100)
-INTO Watch_History VALUES(702, 2, 202, '14-FEB-2023', 80)
-INTO Watch_History VALUES(703, 3, 203, '25-MAR-2023', 50)
-INTO Watch_History VALUES(704, 4, 204, '10-APR-2023', 20)
-INTO Watch_History VALUES(705, 5, 205, '12-MAY-2023', 100)
-INTO Watch_History VALUES(706, 6, 206, '18-JUN-2023', 30)
-INTO Watch_History VALUES(707, 7, 207, '02-JUL-2023', 100)
-INTO Watch_History VALUES(708, 8, 208, '15-AUG-2023', 60)
-INTO Watch_History VALUES(709, 9, 209, '01-SEP-2023', 90)
-INTO Watch_History VALUES(710, 10, 210, '05-OCT-2023', 40)
-SELECT * FROM dual
-Select * from Watch_History
-""",
-        "Device": """CREATE TABLE Device (
-    device_id INT PRIMARY KEY,
-    user_id INT,
-    device_type VARCHAR(50),
-    device_name VARCHAR(100),
-    FOREIGN KEY (user_id) REFERENCES User1(user_id)
-);
-
-Insert all
-INTO Device VALUES(801, 1, 'Mobile', 'iPhone 13')
-INTO Device VALUES(802, 2, 'Laptop', 'Dell XPS 13')
-INTO Device VALUES(803, 3, 'Tablet', 'Samsung Galaxy Tab S7')
-INTO Device VALUES(804, 4, 'Smart TV', 'Sony Bravia')
-INTO Device VALUES(805, 5, 'Mobile', 'Samsung Galaxy S21')
-INTO Device VALUES(806, 6, 'Laptop', 'MacBook Pro')
-INTO Device VALUES(807, 7, 'Smart TV', 'LG OLED')
-INTO Device VALUES(808, 8, 'Laptop', 'HP Spectre x360')
-INTO Device VALUES(809, 9, 'Mobile', 'Google')
-Select * from dual
-Select * from Device
-
-""",
-        "Payment": """CREATE TABLE Payment (
-    payment_id INT PRIMARY KEY,
-    subscription_id INT,
-    amount DECIMAL(10, 2),
-    payment_date DATE,
-    method VARCHAR(50), -- Payment method (e.g., Credit Card, PayPal)
-    FOREIGN KEY (subscription_id) REFERENCES Subscription(subscription_id)
-);
-
-INSERT ALL
-INTO Payment VALUES(901, 1001, 9.99, '01-JAN-2023', 'Credit Card')
-INTO Payment VALUES(902, 1002, 14.99, '01-FEB-2023', 'PayPal')
-INTO Payment VALUES(903, 1003, 9.99, '01-MAR-2023', 'Credit Card')
-INTO Payment VALUES(904, 1004, 19.99, '01-APR-2023', 'PayPal')
-INTO Payment VALUES(905, 1005, 9.99, '01-MAY-2023', 'Credit Card')
-INTO Payment VALUES(906, 1006, 14.99, '01-JUN-2023', 'PayPal')
-INTO Payment VALUES(907, 1007, 19.99, '01-JUL-2023', 'Credit Card')
-INTO Payment VALUES(908, 1008, 9.99, '01-AUG-2023', 'PayPal')
-INTO Payment VALUES(909, 1009, 14.99, '01-SEP-2023', 'Credit Card')
-INTO Payment VALUES(910, 1010, 19.99, '01-OCT-2023', 'PayPal')
-SELECT * FROM dual
-Select * from Payment
-""",
-        "Actor": """CREATE TABLE Actor (
-    actor_id INT PRIMARY KEY,
-    actor_name VARCHAR(100),
-    dob DATE -- Date of birth
-);
-INSERT ALL
-  INTO Actor VALUES(301, 'Will Smith', '25-SEP-1968')
-  INTO Actor VALUES(302, 'Meryl Streep', '22-JUN-1949')
-  INTO Actor VALUES(303, 'Tom Hanks', '09-JUL-1956')
-  INTO Actor VALUES(304, 'Emma Stone', '06-NOV-1988')
-  INTO Actor VALUES(305, 'Leonardo DiCaprio', '11-NOV-1974')
-  INTO Actor VALUES(306, 'Scarlett Johansson', '22-NOV-1984')
-  INTO Actor VALUES(307, 'Brad Pitt', '18-DEC-1963')
-  INTO Actor VALUES(308, 'Natalie Portman', '09-JUN-1981')
-  INTO Actor VALUES(309, 'Johnny Depp', '09-JUN-1963')
-  INTO Actor VALUES(310, 'Jennifer Lawrence', '15-AUG-1990')
-SELECT * FROM dual;
-Select * from Actor
-
-""",
-        "Content_Actor": """CREATE TABLE Content_Actor (
-    content_id INT,
-    actor_id INT,
-    PRIMARY KEY (content_id, actor_id),
-    FOREIGN KEY (content_id) REFERENCES Content(content_id),
-    FOREIGN KEY (actor_id) REFERENCES Actor(actor_id)
-)
-
-INSERT all 
-INTO Content_Actor values(201, 301)
-INTO Content_Actor values(202, 302)
-INTO Content_Actor values(203, 303)
-INTO Content_Actor values(204, 304)
-INTO Content_Actor values(205, 305)
-INTO Content_Actor values(206, 306)
-INTO Content_Actor values(207, 307)
-INTO Content_Actor values (208, 308)
-INTO Content_Actor values (209, 309)
-INTO Content_Actor values (210, 310)
-Select * from dual
-Select * from Content_Actor
-"""
-    }
 
     st.code(sql_scripts[sub_tab], language="sql")
 
-    # Add this dictionary to map each table to its image
-    table_images = {
-    "User": "images/table1.jpeg",
-    "Plan": "images/table2.jpeg",
-    "Subscription": "images/table3.jpeg",
-    "Genre": "images/table4.jpeg",
-    "Content": "images/table5.jpeg",
-    "Review": "images/table6.jpeg",
-    "Watch_History": "images/table7.jpeg",
-    "Device": "images/table8.jpeg",
-    "Payment": "images/table9.jpeg",
-    "Actor": "images/table10.jpeg",
-    "Content_Actor": "images/table11.jpeg"
-}
 
     # Display image for each table automatically
     if sub_tab in table_images:
-          st.image(
-            table_images[sub_tab],
-            caption=f"{sub_tab} Table Schema / ER Diagram",
-            use_column_width=True
+        with profile.span("st.image"):
+            st.image(
+                thumbnail(manifest.image(table_images[sub_tab]), "diagram"),
+                caption=f"{sub_tab} Table Schema / ER Diagram",
+                use_column_width=True
             )
 
 
@@ -468,184 +289,7 @@ Select * from Content_Actor
 elif selected_tab == "📊 SQL Queries":
     st.header("📊 SQL Query Execution & Analysis")
 
-    queries = {
-        "QUERY 1 — Top 3 Most Popular Genres Based on Watch Count": """
-SELECT g.genre_name, COUNT(wh.content_id) AS total_views
-FROM Watch_History wh
-JOIN Content c ON wh.content_id = c.content_id
-JOIN Genre g ON c.genre_id = g.genre_id
-GROUP BY g.genre_name
-ORDER BY total_views DESC;
-""",
-
-        "QUERY 2 — Total Revenue Generated by Each Subscription Plan": """
-SELECT p.plan_name, SUM(pay.amount) AS total_revenue
-FROM Payment pay
-JOIN Subscription s ON pay.subscription_id = s.subscription_id
-JOIN Plan p ON s.plan_id = p.plan_id
-GROUP BY p.plan_name
-ORDER BY total_revenue DESC;
-""",
-
-        "QUERY 3 — Highest Rated Content Titles": """
-SELECT c.title, AVG(r.rating) AS avg_rating
-FROM Review r
-JOIN Content c ON r.content_id = c.content_id
-GROUP BY c.title
-ORDER BY avg_rating DESC;
-""",
-
-        "QUERY 4 — Actor-Wise Average Content Rating": """
-SELECT a.actor_name, AVG(r.rating) AS avg_actor_rating
-FROM Actor a
-JOIN Content_Actor ca ON a.actor_id = ca.actor_id
-JOIN Review r ON ca.content_id = r.content_id
-GROUP BY a.actor_name
-ORDER BY avg_actor_rating DESC;
-""",
-
-        "QUERY 5 — Average Revenue Per User (ARPU)": """
-SELECT SUM(pay.amount) / COUNT(DISTINCT u.user_id) AS avg_revenue_per_user
-FROM User1 u
-JOIN Subscription s ON u.user_id = s.user_id
-JOIN Payment pay ON s.subscription_id = pay.subscription_id;
-""",
-
-        "QUERY 6 — Users Whose Subscription Expires Within 60 Days": """
-SELECT u.user_id, u.name, s.end_date
-FROM User1 u
-JOIN Subscription s ON u.user_id = s.user_id
-WHERE s.end_date BETWEEN SYSDATE AND ADD_MONTHS(SYSDATE, 2)
-ORDER BY s.end_date;
-""",
-
-        "QUERY 7 — Average Watch Completion (%) per Genre": """
-SELECT g.genre_name, AVG(wh.progress) AS avg_completion
-FROM Watch_History wh
-JOIN Content c ON wh.content_id = c.content_id
-JOIN Genre g ON c.genre_id = g.genre_id
-GROUP BY g.genre_name
-ORDER BY avg_completion DESC;
-""",
-
-        "QUERY 8 — Find Users Who Posted More Than or equal to One Review": """
-SELECT u.name, COUNT(r.review_id) AS review_count
-FROM User1 u
-JOIN Review r ON u.user_id = r.user_id
-GROUP BY u.name
-HAVING COUNT(r.review_id) > 1;
-""",
-
-        "QUERY 9 — Most Popular Actor (Based on Number of Watched Contents)": """
-SELECT a.actor_name, COUNT(wh.content_id) AS total_views
-FROM Actor a
-JOIN Content_Actor ca ON a.actor_id = ca.actor_id
-JOIN Watch_History wh ON ca.content_id = wh.content_id
-GROUP BY a.actor_name
-ORDER BY total_views DESC;
-""",
-
-        "QUERY 10 — Genre-Wise Revenue (Advanced Multi-Join)": """
-SELECT g.genre_name, SUM(p.amount) AS total_genre_revenue
-FROM Payment p
-JOIN Subscription s ON p.subscription_id = s.subscription_id
-JOIN User1 u ON s.user_id = u.user_id
-JOIN Watch_History wh ON u.user_id = wh.user_id
-JOIN Content c ON wh.content_id = c.content_id
-JOIN Genre g ON c.genre_id = g.genre_id
-GROUP BY g.genre_name
-ORDER BY total_genre_revenue DESC;
-""",
-
-        "QUERY 11 — Most Popular Content Type (Movie or Series) by Average User Rating": """
-SELECT 
-    c.type AS content_type,
-    AVG(r.rating) AS avg_rating,
-    COUNT(DISTINCT c.content_id) AS total_titles,
-    COUNT(r.review_id) AS total_reviews
-FROM Content c
-JOIN Review r ON c.content_id = r.content_id
-GROUP BY c.type
-ORDER BY avg_rating DESC;
-""",
-
-        "QUERY 12 — Users Who Have Rated Content Above the Average Rating (Subquery)": """
-SELECT 
-    u.user_id, 
-    u.name, 
-    r.content_id, 
-    r.rating
-FROM Review r
-JOIN User1 u ON r.user_id = u.user_id
-WHERE r.rating > (
-    SELECT AVG(rating) 
-    FROM Review
-)
-ORDER BY r.rating DESC;
-"""
-    }
-
 
-    query_images = {
-        "QUERY 1 — Top 3 Most Popular Genres Based on Watch Count": [
-            "images/table12.jpeg",
-            "images/query1explain.jpeg"
-        ],
-        "QUERY 2 — Total Revenue Generated by Each Subscription Plan": [
-            "images/query2ans.jpeg",
-            "images/query2explain.jpeg"
-        ],
-
-        "QUERY 3 — Highest Rated Content Titles": [
-            "images/query3ans.jpeg",
-            "images/query3explain.jpeg"
-            ],
-
-        "QUERY 4 — Actor-Wise Average Content Rating": [
-            "images/query4ans.jpeg",
-            "images/query4explain.jpeg"
-            ] ,
-
-        "QUERY 5 — Average Revenue Per User (ARPU)": [
-            "images/query5ans.jpeg",
-            "images/query5explain.jpeg"
-            ],
-
-        "QUERY 6 — Users Whose Subscription Expires Within 60 Days": [
-            "images/query6ans.jpeg",
-            "images/query6explain.jpeg"
-            ],
-
-        "QUERY 7 — Average Watch Completion (%) per Genre": [
-            "images/query7ans.jpeg",
-            "images/query7explain.jpeg"
-            ],
-
-        "QUERY 8 — Find Users Who Posted More Than or equal to One Review":[
-            "images/query8ans.jpeg",
-            "images/query8explain.jpeg"
-            ],
-
-        "QUERY 9 — Most Popular Actor (Based on Number of Watched Contents)": [
-            "images/query9ans.jpeg",
-            "images/query9explain.jpeg"
-            ],
-
-        "QUERY 10 — Genre-Wise Revenue (Advanced Multi-Join)": [
-            "images/query10ans.jpeg",
-            "images/query10explain.jpeg"
-            ],
-
-        "QUERY 11 — Most Popular Content Type (Movie or Series) by Average User Rating": [
-            "images/query11ans.jpeg",
-            "images/query11explain.jpeg"
-            ],
-
-        "QUERY 12 — Users Who Have Rated Content Above the Average Rating (Subquery)":[
-            "images/query12ans.jpeg",
-            "images/query12explain.jpeg"
-            ]
-       }
 
     selected_query = st.selectbox(
     "Select Query:", 
@@ -655,151 +299,171 @@ ORDER BY r.rating DESC;
 
     st.code(queries[selected_query], language="sql")
     
-    
-
-    queries_data = {
-    "QUERY 1 — Top 3 Most Popular Genres Based on Watch Count": pd.DataFrame({
-        "genre_name": ["Drama", "Comedy", "Action","Horror","Romance"],
-        "total_views": [2,2,2,2,2]
-    }),
-
-    "QUERY 2 — Total Revenue Generated by Each Subscription Plan": pd.DataFrame({
-        "plan_name": ["Basic", "Premium", "Standard"],
-        "total_revenue": [39.96,59.97,44.97]
-    }),
-
-    "QUERY 3 — Highest Rated Content Titles": pd.DataFrame({
-        "title": ["Echoes of Silence","Forever and Always","Crimson Vengeance","The Weight of Truth","The Hollow Manor","Hearts Entwined","Shadow Protocol","Laugh Lines","Accidentally Perfect","Whispers in the Dark"],
-        "avg_rating": [5,5,4,4,4,4,4,3,3,2]
-    }),
-
-    "QUERY 4 — Actor-Wise Average Content Rating": pd.DataFrame({
-        "actor_name": ["Will Smith",
-                       "Meryl Streep",
-                       "Tom Hanks",
-                       "Emma Stone",
-                       "Leonardo DiCaprio",
-                       "Scarlett Johansson",
-                       "Brad Pitt",
-                       "Natalie Portman",
-                       "Johnny Depp",
-                       "Jennifer Lawrence"],
-        "avg_actor_rating": [4,5,3,2,5,4,4,3,4,4]
-    }),
-
-    "QUERY 5 — Average Revenue Per User (ARPU)": pd.DataFrame({
-        "avg_revenue_per_user": [14.49]
-    }),
-
-    "QUERY 6 — Users Whose Subscription Expires Within 60 Days": pd.DataFrame({
-        "user_id": [8,6,3,1,7,4,5],
-        "name": ["Lucas Martinez","David Miller","Emily Brown","John Doe","Olivia Davis","Michael Johnson","Sarah Williams",],
-        "end_date": ["19/10/25","20/10/25","28/10/25","10/11/25","25/11/25","05/12/25","18/12/25"]
-    }),
-
-    "QUERY 7 — Average Watch Completion (%) per Genre": pd.DataFrame({
-        "genre_name": ["Drama", "Comedy", "Action","Horror","Romance"],
-        "avg_completion": [35,65,90,80,65]
-    }),
-
-    "QUERY 8 — Find Users Who Posted More Than or equal to One Review": pd.DataFrame({
-        "name": ["John Doe","Jane Smith","Emily Brown","Michael Johnson","Sarah Williams","David Miller","Olivia Davis","Lucas Martinez","Sophia Garcia","Ethan Lee"],
-        "review_count": [1,1,1,1,1,1,1,1,1,1]
-    }),
-
-    "QUERY 9 — Most Popular Actor (Based on Number of Watched Contents)": pd.DataFrame({
-        "actor_name": ["Will Smith","Meryl Streep","Tom Hanks","Emma Stone","Leonardo DiCaprio","Scarlett Johansson","Brad Pitt","Natalie Portman","Johnny Depp","Jennifer Lawrence"],
-        "total_views": [1,1,1,1,1,1,1,1,1,1]
-    }),
-
-    "QUERY 10 — Genre-Wise Revenue (Advanced Multi-Join)": pd.DataFrame({
-        "genre_name": ["Drama", "Comedy", "Action","Horror","Romance"],
-        "total_genre_revenue": [14.99,12.49,12.49,14.99,17.49]
-    }),
-
-    "QUERY 11 — Most Popular Content Type (Movie or Series) by Average User Rating": pd.DataFrame({
-        "content_type": ["Movie", "Series"],
-        "avg_rating": [3.833333333,3.75],
-        "total_titles": [6,4],
-        "total_reviews": [6,4]
-    }),
-
-    "QUERY 12 — Users Who Have Rated Content Above the Average Rating (Subquery)": pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "name": ["John Doe","Jane Smith","Emily Brown","Michael Johnson","Sarah Williams","David Miller","Olivia Davis","Lucas Martinez","Sophia Garcia","Ethan Lee"],
-        "content_id": [201,202,203,204,205,206,207,208,209,210],
-        "rating": [4,5,3,2,5,4,4,3,4,4]
-    })
-  }
-
-    
-    df = queries_data[selected_query]
-    st.dataframe(df)
-
-    try:
-            if selected_query in query_images:
-                for i, img_path in enumerate(query_images[selected_query], start=1):
-                    st.image(img_path, caption=f"{selected_query} - Image {i}", use_column_width=True)
-            
-                if df is not None and not df.empty:
-                    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-                    if numeric_cols:
-                        col_to_plot = numeric_cols[0]  # Choose first numeric column for visualization
-            
-            # Bar chart of the numeric column by first column (usually the category)
-                        st.bar_chart(data=df.set_index(df.columns[0])[col_to_plot])
-
-            # Highest and Lowest values
-                        max_val = df[col_to_plot].max()
-                        max_idx = df[df[col_to_plot] == max_val][df.columns[0]].values[0]
+    approximate = st.toggle("≈ Approximate mode", value=False,
+                            help="Estimate distinct counts with HyperLogLog and watch-progress percentiles with a t-digest")
+
+    window = ()
+    if query_number(selected_query) == 6:
+        window = st.date_input("Subscriptions ending between",
+                               value=tuple(date.fromisoformat(d) for d in subscriptions.default_window()),
+                               key="expiry_window")
+
+    start = time.perf_counter()
+    with profile.span("query"):
+        sketches = get_sketches().refresh() if approximate else None
+        estimate = sketches.query(selected_query) if sketches else None
+        rollup_sql = aggregates.materialized(selected_query)
+        if estimate is not None:
+            df, source = estimate, "HyperLogLog sketches"
+            grid_sql, grid_params = None, ()
+            rows, label_column = len(df), df.columns[0]
+        else:
+            df = None
+            if len(window) == 2:
+                source = "end_date index"
+                grid_sql, grid_params = subscriptions.EXPIRING, tuple(str(d) for d in window)
+            else:
+                source = "materialized aggregate" if rollup_sql else "embedded database"
+                grid_sql, grid_params = rollup_sql or queries[selected_query], ()
+            # Run once into the grid's table; the page, summary and chart below all read it
+            grid = get_result_grid()
+            columns = grid.columns(grid_sql, grid_params)
+            rows, label_column = grid.count(grid_sql, grid_params), columns[0]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    caption = f"Executed on the {source} in {elapsed_ms:.2f} ms — {rows} rows"
+    if grid_sql is not None:
+        grid_stats = grid.stats()
+        caption += (f" · results {grid_stats['hits']} hits / {grid_stats['misses']} misses, "
+                    f"{grid_stats['entries']} held ({grid_stats['rows']:,} of {grid.max_rows:,} rows)")
+    st.caption(caption)
+    if grid_sql is None:
+        with profile.span("st.dataframe"):
+            st.dataframe(df)
+    else:
+        # Only the visible page is sent to the browser; sorting and filtering run in the engine
+        col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+        sort = col1.selectbox("Sort by", ["(query order)"] + columns, key="grid_sort")
+        sort = None if sort == "(query order)" else sort
+        descending = col2.checkbox("Descending", key="grid_descending", disabled=sort is None)
+        filter_column = col3.selectbox("Filter column", columns, key="grid_filter_column")
+        filter_text = col4.text_input("Contains, or > < = value", key="grid_filter_text").strip()
+        where = (filter_column, filter_text) if filter_text else None
+        # Keyset cursors of the pages before the current one
+        grid_key = (grid_sql, grid_params, sort, descending, where)
+        if st.session_state.get("grid_key") != grid_key:
+            st.session_state.grid_key = grid_key
+            st.session_state.grid_pages = [None]
+        pages = st.session_state.grid_pages
+        with profile.span("query"):
+            page, cursor = grid.page(grid_sql, grid_params, sort, descending, where, after=pages[-1])
+            matching = grid.count(grid_sql, grid_params, where)
+        with profile.span("st.dataframe"):
+            st.dataframe(page, hide_index=True)
+        first = (len(pages) - 1) * grid.page_size
+        col1, col2, col3 = st.columns([2, 1, 1])
+        col1.caption(f"Rows {first + min(1, len(page))}–{first + len(page)} of {matching}")
+        if col2.button("← Previous", disabled=len(pages) == 1, key="grid_previous"):
+            pages.pop()
+            st.experimental_rerun()
+        if col3.button("Next →", disabled=cursor is None, key="grid_next"):
+            pages.append(cursor)
+            st.experimental_rerun()
 
-                        min_val = df[col_to_plot].min()
-                        min_idx = df[df[col_to_plot] == min_val][df.columns[0]].values[0]
-                    
+    if estimate is not None:
+        # ± is about two standard errors of the HyperLogLog estimate
+        errors = [c for c in df.columns if c.endswith("_error")]
+        cols = st.columns(max(1, min(4, len(df) * len(errors))))
+        for i, (row, column) in enumerate((r, c) for _, r in df.head(4).iterrows() for c in errors):
+            name = column[:-len("_error")]
+            label = f"≈ {name}" + (f" ({row[df.columns[0]]})" if len(df) > 1 else "")
+            digits = 0 if df[name].dtype.kind in "iu" else 2
+            cols[i % len(cols)].metric(label, f"{row[name]:,.{digits}f} ± {row[column]:,.{max(1, digits)}f}")
+    if sketches is not None and query_number(selected_query) == 7:
+        cols = st.columns(2)
+        for col, (q, (value, error)) in zip(cols, sketches.percentiles().items()):
+            col.metric(f"≈ p{q * 100:.0f} watch completion (%)", f"{value:.1f} ± {error:.1f}")
+
+    if selected_query in query_images:
+        for i, img_path in enumerate(query_images[selected_query], start=1):
+            with profile.span("st.image"):
+                st.image(thumbnail(manifest.image(img_path), "diagram"), caption=f"{selected_query} - Image {i}", use_column_width=True)
+
+        if rows:
+            # Count, mean, quantiles and extremes of every numeric column in one pass,
+            # kept with the grid's result so reruns reuse them
+            with profile.span("data"):
+                if grid_sql is None:
+                    stats = summarize(df[[c for c in df.columns if not c.endswith("_error")]])
+                else:
+                    stats = grid.summary(grid_sql, grid_params)
+            # Choose first numeric column (besides the labels) for visualization
+            plottable = [c for c in stats.index if c != label_column]
+            col_to_plot = (plottable or list(stats.index) or [None])[0]
+
+            # Bar chart of the numeric column by first column (usually the category),
+            # cut down to a bounded number of bars or points
+            if plottable:
+                how = "mean" if col_to_plot.startswith("avg") else "sum"
+                with profile.span("data"):
+                    if grid_sql is None:
+                        chart, kind, extent = charts.reduce(df, label_column, col_to_plot, how)
+                    else:
+                        chart, kind, extent = grid.chart(grid_sql, grid_params, label_column, col_to_plot, how)
+                if kind == "line":
+                    st.line_chart(data=chart)
+                else:
+                    st.bar_chart(data=chart)
+                if len(chart) < extent["rows"]:
+                    st.caption(f"Chart shows {len(chart)} of {extent['rows']:,} rows; "
+                               f"{col_to_plot} ranges from {extent['min']:,} to {extent['max']:,}")
+
+            # Highest and Lowest values, with the mean and median
+            if col_to_plot is not None:
+                column = stats.loc[col_to_plot]
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric(label="Highest Value", value=f"{column['max']}", delta=f"{column['max_at']}")
+                col2.metric(label="Lowest Value", value=f"{column['min']}", delta=f"{column['min_at']}")
+                col3.metric(label="Mean", value=f"{column['mean']:,.2f}")
+                col4.metric(label="Median", value=f"{column['p50']:,.2f}")
+                with st.expander("Summary of every numeric column"):
+                    st.dataframe(stats)
 
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric(label="Highest Value", value=f"{max_val}", delta=f"{max_idx}")
-                        with col2:
-                            st.metric(label="Lowest Value", value=f"{min_val}", delta=f"{min_idx}")
-    except:
-            ("-")
+# ============================
+# TAB 6 — TRENDS
+# ============================
+elif selected_tab == "📈 Trends":
+    st.header("📈 Viewing & Revenue Trends")
+
+    col1, col2, col3 = st.columns(3)
+    measure = col1.selectbox("Measure", list(cubes.MEASURES), format_func=str.capitalize, key="trend_measure")
+    grain = col2.radio("Per", list(cubes.GRAINS), index=1, horizontal=True, key="trend_grain")
+    dimensions = cubes.DIMENSIONS[cubes.MEASURES[measure][0]]
+    by = col3.selectbox("Split by", ["(none)"] + dimensions, key="trend_by")
+    by = None if by == "(none)" else by
+
+    start = time.perf_counter()
+    with profile.span("query"):
+        trend = cubes.trend(get_query_cache(), measure, grain, by)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    st.caption(f"Answered from the rollup cube in {elapsed_ms:.2f} ms — {len(trend)} rows")
+
+    if trend.empty:
+        st.info("No watch or payment dates recorded yet.")
+    else:
+        # At most charts.MAX_POINTS points per line
+        with profile.span("data"):
+            trend = trend.assign(period=pd.to_datetime(trend["period"]))
+            groups = trend.groupby(by) if by else [(None, trend)]
+            lines = pd.concat([charts.downsample(group, "period", measure) for _, group in groups])
+        st.line_chart(lines, x="period", y=measure, color=by)
 
 # ============================
-# TAB 6 — USER LOGIN & DASHBOARD
+# TAB 7 — USER LOGIN & DASHBOARD
 # ============================
 elif selected_tab == "👤 User Dashboard":
     st.header("👤 User Login / Signup Portal")
 
-    # Create dummy data
-    users_df = pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "name": ["John Doe","Jane Smith","Emily Brown","Michael Johnson","Sarah Williams","David Miller","Olivia Davis","Lucas Martinez","Sophia Garcia","Ethan Lee"],
-        "email": ["john@example.com","jane.smith@example.com","emily@example.com","michael.johnson@example.com","sarah@example.com","david.miller@example.com","olivia.davis@example.com","lucas.martinez@example.com","sophia@example.com","ethan.lee@example.com"],
-        "password": ["password123","password456","password789","password000","password111","password222","password333","password444","password555","password666"],
-        "age": [28,34,22,30,25,40,33,27,38,29]
-    })
-
-    review_df = pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "rating": [4,5,3,2,5,4,4,3,4,4]
-    })
-
-
-    watch_df = pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "progress": [100,80,50,20,100,30,100,60,90,40]
-    })
-
-    genre_df = pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "fav_genre": ["Action","Drama","Comedy","Horror","Romance","Action","Drama","Comedy","Horror","Romance"]
-    })
-
-    plan_df = pd.DataFrame({
-        "user_id": [1,2,3,4,5,6,7,8,9,10],
-        "plan": ["Basic","Standard","Basic","Premium","Basic","Standard","Premium","Basic","Standard","Premium"]
-    })
+    store = get_user_store()
 
     # SESSION STATE for login
     if "logged_in_user" not in st.session_state:
@@ -812,10 +476,10 @@ elif selected_tab == "👤 User Dashboard":
             email = st.text_input("Email")
             password = st.text_input("Password", type="password")
             if st.button("Login"):
-                user = users_df[(users_df["email"] == email) & (users_df["password"] == password)]
-                if not user.empty:
-                    st.session_state.logged_in_user = int(user.iloc[0]["user_id"])
-                    st.success(f"Welcome back, {user.iloc[0]['name']}! 🎉")
+                login_id = store.authenticate(email, password)
+                if login_id is not None:
+                    st.session_state.logged_in_user = int(login_id)
+                    st.success(f"Welcome back, {store.profile(login_id)['name']}! 🎉")
                     st.experimental_rerun()
                 else:
                     st.error("Invalid email or password 😕")
@@ -826,108 +490,61 @@ elif selected_tab == "👤 User Dashboard":
             new_password = st.text_input("Password", type="password")
             new_age = st.number_input("Age", 10, 100, 25)
             if st.button("Create Account"):
-                if new_email in users_df["email"].values:
+                if store.email_exists(new_email):
                     st.error("Email already exists.")
                 else:
-                    new_id = users_df["user_id"].max() + 1
-                    users_df.loc[len(users_df)] = [new_id, new_name, new_email, new_password, new_age]
+                    store.create_user(new_name, new_email, new_password, int(new_age))
                     st.success("Account created successfully! You can now log in.")
     else:
         # Fetch logged-in user data
         user_id = st.session_state.logged_in_user
-        user_info = users_df[users_df["user_id"] == user_id].iloc[0]
+        with profile.span("query"):
+            user_info = store.profile(user_id)
+            user_plan = store.plan(user_id) or "No active plan"
+            user_genre = store.favourite_genre(user_id)
+            user_stats = store.stats(user_id)
+            global_stats = store.global_stats()
 
         st.subheader(f"Welcome, {user_info['name']} 👋")
         st.markdown(f"**Age:** {user_info['age']} | **Email:** {user_info['email']}")
 
-        user_plan = plan_df[plan_df["user_id"] == user_id]["plan"].values[0]
-        user_genre = genre_df[genre_df["user_id"] == user_id]["fav_genre"].values[0]
-        user_rating = review_df[review_df["user_id"] == user_id]["rating"].mean()
-        user_progress = watch_df[watch_df["user_id"] == user_id]["progress"].mean()
+        user_rating = user_stats["rating"] if user_stats["rating"] is not None else float("nan")
+        user_progress = user_stats["progress"] if user_stats["progress"] is not None else float("nan")
             
-        user_content_data = {
-            1: {"movie": "Shadow Protocol",
- "actor": "Will Smith",
-        "movie_poster": "images/shadowprotocol.jpeg",
-        "actor_img": "images/willsmith.jpeg",
-        "actor_movies": ["Men in Black","I Am Legend","Gemini Man"],
-        "similar_movies": ["Crimson Vengeance","The Hollow Manor","Hearts Entwined"]},
-       
- 2: {"movie": "Echoes of Silence", "actor": "Meryl Streep",
-        "movie_poster": "images/echoesofsilencw.jpeg",
-        "actor_img": "images/merylstreep.jpeg",
-        "actor_movies": ["The Iron Lady","Kramer vs Kramer","The Devil Wears Prada"],
-        "similar_movies": ["Forever and Always","Whispers in the Dark","Accidentally Perfect"]},
-       
- 3: {"movie": "Laugh Lines", "actor": "Jim Carrey",
-        "movie_poster": "images/laughlines.jpeg",
-        "actor_img": "images/jimcarrey.jpeg",
-        "actor_movies": ["The Mask","Ace Ventura","Dumb and Dumber"],
-        "similar_movies": ["Accidentally Perfect","Whispers in the Dark","Forever and Always"]},
-      
-  4: {"movie": "The Haunted Hour", "actor": "Jamie Lee Curtis",
-        "movie_poster": "images/thehauntedhour.jpeg",
-        "actor_img": "images/jamieleecurtis.jpeg",
-        "actor_movies": ["Halloween","Freaky Friday","True Lies"],
-        "similar_movies": ["Crimson Vengeance","Whispers in the Dark","The Hollow Manor"]},
-    
-    5: {"movie": "Hearts Entwined", "actor": "Julia Roberts",
-        "movie_poster": "images/heartsentwined.jpeg",
-        "actor_img": "images/juliaroberts.jpeg",
-        "actor_movies": ["Pretty Woman","Erin Brockovich","My Best Friend's Wedding"],
-        "similar_movies": ["Forever and Always","The Hollow Manor","Accidentally Perfect"]},
-        6: {"movie": "Gemini Force", "actor": "Tom Hanks",
-        "movie_poster": "images/geminiman.jpeg",
-        "actor_img": "images/tomhanks.jpeg",
-        "actor_movies": ["Forrest Gump","Cast Away","Saving Private Ryan"],
-        "similar_movies": ["Shadow Protocol","Laugh Lines","Crimson Vengeance"]},
-        7: {"movie": "Forever and Always", "actor": "Emma Stone",
-        "movie_poster": "images/foreverandalways.jpeg",
-        "actor_img": "images/emmastoen.jpeg",
-        "actor_movies": ["La La Land","Easy A","The Favourite"],
-        "similar_movies": ["Hearts Entwined","Accidentally Perfect","The Hollow Manor"]},
-        8: {"movie": "Accidentally Perfect", "actor": "Leonardo DiCaprio",
-        "movie_poster": "images/accidentlyperfect.jpeg",
-        "actor_img": "images/leodicap.jpeg",
-        "actor_movies": ["Inception","Titanic","The Revenant"],
-        "similar_movies": ["Shadow Protocol","Laugh Lines","Forever and Always"]},
-        9: {"movie": "Whispers in the Dark", "actor": "Scarlett Johansson",
-        "movie_poster": "images/whispersinthedark.jpeg",
-        "actor_img": "images/scarlettjohanson.jpeg",
-        "actor_movies": ["Lucy","Marriage Story","Lost in Translation"],
-        "similar_movies": ["Echoes of Silence","Hearts Entwined","Accidentally Perfect"]},
-        10: {"movie": "Crimson Vengeance", "actor": "Brad Pitt",
-         "movie_poster": "images/crimsonvengeance.jpeg",
-         "actor_img": "images/bradpitt.jpeg",
-         "actor_movies": ["Fight Club","World War Z","Once Upon a Time in Hollywood"],
-         "similar_movies": ["Shadow Protocol","Gemini Force","Laugh Lines"]}
-}
 
         st.markdown(f"**Subscription Plan:** {user_plan}")
-        st.markdown(f"**Favourite Genre:** 🎞️ {user_genre}")
+        st.markdown(f"**Favourite Genre:** 🎞️ {user_genre or 'Not enough watch history yet'}")
         st.markdown("---")
 
         # Compare user stats with global averages
-        global_avg_rating = review_df["rating"].mean()
-        global_avg_progress = watch_df["progress"].mean()
+        global_avg_rating = global_stats["rating"] if global_stats["rating"] is not None else float("nan")
+        global_avg_progress = global_stats["progress"] if global_stats["progress"] is not None else float("nan")
         
 
 
         st.subheader("🎥 Currently Watching")
 
-        current = user_content_data[user_id]  # Fetch the logged-in user's current content
-
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.image(current["movie_poster"], caption=current["movie"], use_column_width=True)
-        with col2:
-            st.markdown(f"### {current['movie']}")
-            st.markdown(f"**Lead Actor:** {current['actor']}")
-            st.image(current["actor_img"], width=150, caption=f"{current['actor']}")
-            
-            col1, col2 = st.columns(2)
-            col1.metric("⭐ Your Avg Rating", f"{user_rating:.1f}", delta=f"{user_rating - global_avg_rating:+.1f} vs global")
-            col2.metric("📺 Your Watch Completion (%)", f"{user_progress:.1f}%", delta=f"{user_progress - global_avg_progress:+.1f}% vs global")
+        recommender = get_recommender()
+        with profile.span("query"):
+            current = store.currently_watching(user_id)  # the logged-in user's most recent title
+            lead = recommender.lead_actor(current["content_id"]) if current else None
+        if current is None:
+            # New accounts have no viewing data yet
+            st.info("Nothing watched yet — start a title to see it here.")
+        else:
+            col1, col2 = st.columns([1, 2])
+            with col1, profile.span("st.image"):
+                st.image(thumbnail(manifest.poster(current["title"]), "feature"), caption=current["title"], use_column_width=True)
+            with col2:
+                st.markdown(f"### {current['title']}")
+                if lead is not None:
+                    st.markdown(f"**Lead Actor:** {lead['actor_name']}")
+                    with profile.span("st.image"):
+                        st.image(thumbnail(manifest.headshot(lead["actor_name"]), "headshot"), width=150, caption=lead["actor_name"])
+
+                col1, col2 = st.columns(2)
+                col1.metric("⭐ Your Avg Rating", f"{user_rating:.1f}", delta=f"{user_rating - global_avg_rating:+.1f} vs global")
+                col2.metric("📺 Your Watch Completion (%)", f"{user_progress:.1f}%", delta=f"{user_progress - global_avg_progress:+.1f}% vs global")
 
 # ============================
 # RECOMMENDED CONTENT SECTION
@@ -935,98 +552,51 @@ elif selected_tab == "👤 User Dashboard":
         st.markdown("---")
         st.subheader("✨ Recommended For You")
 
-        recommended_titles = current["similar_movies"]
+        with profile.span("query"):
+            recommendations = recommender.recommend(user_id, k=3)
+        recommended_titles = recommendations["titles"]
         
-        poster_paths = {
-    "Crimson Vengeance": "images/crimsonvengeance.jpeg",
-    "The Hollow Manor": "images/thehallowmanor.jpeg",
-    "Hearts Entwined": "images/heartsentwined.jpeg",
-    "Forever and Always": "images/foreverandalways.jpeg",
-    "Whispers in the Dark": "images/whispersinthedark.jpeg",
-    "Accidentally Perfect": "images/accidentlyperfect.jpeg",
-    "Men in Black":"images/meninblack.jpeg",
-    "I Am Legend":"images/iamlegend.jpeg",
-    "Gemini Man":"images/geminiman.jpeg"
-}
-
-        st.write("Because you liked:", current["movie"])
-
-        cols = st.columns(len(recommended_titles))
-        for i, title in enumerate(recommended_titles):
-            with cols[i]:
-                if title in poster_paths:
-                    st.image(poster_paths[title], caption=title, use_column_width=True)
-                else:
-                    st.image("https://via.placeholder.com/150x220.png?text=No+Poster", caption=title, use_column_width=True)
+        if recommendations["because"]:
+            st.write("Because you liked:", recommendations["because"])
+        else:
+            st.write("Popular on the platform right now")
+
+        if recommended_titles:
+            cols = st.columns(len(recommended_titles))
+            for i, title in enumerate(recommended_titles):
+                with cols[i], profile.span("st.image"):
+                    st.image(thumbnail(manifest.poster(title), "poster"), caption=title, use_column_width=True)
+
+        if current is None:
+            if st.button("🔓 Logout"):
+                st.session_state.logged_in_user = None
+                st.experimental_rerun()
+            show_profile()
+            st.stop()
 
 # ============================
 # ACTOR'S OTHER MOVIES SECTION
 # ============================
-        st.markdown("---")
-        st.subheader(f"🎬 More from {current['actor']}")
-        
-        actor_movies = current["actor_movies"]
-        
-        poster={"Men in Black":"images/meninblack.jpeg",
-        "I Am Legend":"images/iamlegend.jpeg",
-        "Gemini Man":"images/geminiman.jpeg",
-        "The Iron Lady":"images/theironlady.jpeg",
-        "Kramer vs Kramer":"images/.jpeg",
-        "The Devil Wears Prada":"images/thedevilwearsprada.jpeg",
-"Fight Club":"images/thefightclub.jpeg",
-"World War Z":"images/worldwarz.jpeg",
-"Once Upon a Time in Hollywood":"images/onceuponatimeinhollywood.jpeg",
-" Lucy":"images/lucy.jpeg",
-"Marriage Story":"images/marriagestory.jpeg",
-"Lost in Translation":"images/lostintranslation.jpeg",
-"Inception":"images/inception.jpeg",
-"Titanic":"images/titanic.jpeg",
-"The Revenant":"images/therevenant.jpeg",
-"La La Land":"images/.lalalandjpeg",
-"Easy A":"images/.easyajpeg",
-"The Favourite":"images/.thefavouritejpeg",
-"Forrest Gump":"images/forrestgump.jpeg",
-"Cast Away":"images/castaway.jpeg",
-"Saving Private Ryan":"images/savingprivateryan.jpeg",
-"Pretty Woman":"images/prettywoman.jpeg"
-,"Erin Brockovich":"images/erinbrockovich.jpeg",
-"My Best Friend's Wedding":"images/mybsfsbody.jpeg",
-"Halloween":"images/halloweem.jpeg",
-"Freaky Friday":"images/freakyfriday.jpeg",
-"True Lies":"images/truelies.jpeg",
-"The Mask":"images/themask.jpeg",
-"Ace Ventura":"images/aceventura.jpeg",
-"Dumb and Dumber":"images/dumbanddumber.jpeg"
-
-        }
-        
-        cols = st.columns(len(actor_movies))
-        for i, title in enumerate(actor_movies):
-            with cols[i]:
-                if title in poster:
-                    st.image(poster[title], caption=title, use_column_width=True)
-                else:
-                    st.image("https://via.placeholder.com/150x220.png?text=No+Poster", caption=title, use_column_width=True)
-                
-
-      
-        plan_df = pd.DataFrame({
-    "user_id": [1,2,3,4,5,6,7,8,9,10],
-    "plan": ["Basic","Standard","Basic","Premium","Basic","Standard","Premium","Basic","Standard","Premium"],
-    "amount_paid": [39.96,44.97,39.96,59.97,39.96,44.97,59.97,39.96,44.97,59.97],
-    "perks": ["Ads","HD","Ads","Ultra HD + Offline","Ads","HD","Ultra HD + Offline","Ads","HD","Ultra HD + Offline"],
-    "next_payment_date": ["01/11/25"]*10,
-    "device_type": ["Mobile","Laptop","Tablet","Smart TV","Laptop","Mobile","Smart TV","Tablet","Laptop","Smart TV"]
-})
-    
-        
-        
-        import plotly.express as px
+        if lead is not None:
+            st.markdown("---")
+            st.subheader(f"🎬 More from {lead['actor_name']}")
+
+            with profile.span("query"):
+                actor_movies = recommender.more_from(lead["actor_id"], exclude=current["content_id"], k=3)
+
+            if actor_movies:
+                cols = st.columns(len(actor_movies))
+                for i, title in enumerate(actor_movies):
+                    with cols[i], profile.span("st.image"):
+                        st.image(thumbnail(manifest.poster(title), "poster"), caption=title, use_column_width=True)
+            else:
+                st.caption(f"No other titles from {lead['actor_name']} in the catalogue yet.")
 
         st.markdown("### 🍩 Your Stats vs Global Average")
 
 # Combine into a long-form dataframe for pie charts
-        comparison_long = pd.DataFrame({
+        with profile.span("data"):
+            comparison_long = pd.DataFrame({
     "Metric": ["Average Rating", "Average Rating", "Watch Progress", "Watch Progress"],
     "Type": ["You", "Global Avg", "You", "Global Avg"],
     "Value": [user_rating, global_avg_rating, user_progress, global_avg_progress]
@@ -1036,7 +606,8 @@ elif selected_tab == "👤 User Dashboard":
         col1, col2 = st.columns(2)
 
         with col1:
-            fig1 = px.pie(
+            with profile.span("px.pie"):
+                fig1 = px.pie(
         comparison_long[comparison_long["Metric"] == "Average Rating"],
         names="Type",
         values="Value",
@@ -1045,11 +616,12 @@ elif selected_tab == "👤 User Dashboard":
         color_discrete_map={"You": "#4CAF50", "Global Avg": "#FFC107"},
         hole=0.5
     )
-            fig1.update_traces(textinfo="label+percent", pull=[0.05, 0])
+                fig1.update_traces(textinfo="label+percent", pull=[0.05, 0])
             st.plotly_chart(fig1, use_container_width=True)
 
         with col2:
-            fig2 = px.pie(
+            with profile.span("px.pie"):
+                fig2 = px.pie(
         comparison_long[comparison_long["Metric"] == "Watch Progress"],
         names="Type",
         values="Value",
@@ -1058,24 +630,36 @@ elif selected_tab == "👤 User Dashboard":
         color_discrete_map={"You": "#4CAF50", "Global Avg": "#FFC107"},
         hole=0.5
     )
-            fig2.update_traces(textinfo="label+percent", pull=[0.05, 0])
+                fig2.update_traces(textinfo="label+percent", pull=[0.05, 0])
             st.plotly_chart(fig2, use_container_width=True)
 
         st.markdown("### 🎭 Other Users with Same Genre Preference")
-        same_genre_users = genre_df[genre_df["fav_genre"] == user_genre].merge(users_df, on="user_id")[["name", "age"]]
-        st.dataframe(same_genre_users)
+        # Keyset pages of the genre's posting list: the user_id each page starts after
+        if st.session_state.get("same_genre_key") != (user_id, user_genre):
+            st.session_state.same_genre_key = (user_id, user_genre)
+            st.session_state.same_genre_pages = [0]
+        pages = st.session_state.same_genre_pages
+        with profile.span("query"):
+            same_genre_users = store.same_genre_users(user_genre, after=pages[-1])
+            same_genre_total = store.same_genre_count(user_genre)
+        with profile.span("st.dataframe"):
+            st.dataframe(same_genre_users[["name", "age"]], hide_index=True)
+        first = (len(pages) - 1) * PAGE_SIZE
+        st.caption(f"Users {first + min(1, len(same_genre_users))}–{first + len(same_genre_users)} of {same_genre_total}")
+        col1, col2 = st.columns(2)
+        if col1.button("← Previous", disabled=len(pages) == 1):
+            pages.pop()
+            st.experimental_rerun()
+        if col2.button("Next →", disabled=first + len(same_genre_users) >= same_genre_total):
+            pages.append(int(same_genre_users["user_id"].iloc[-1]))
+            st.experimental_rerun()
 
         if st.button("🔓 Logout"):
             st.session_state.logged_in_user = None
             st.experimental_rerun()
 
 
-
-
-
-
-
-
-
-
-
+# ============================
+# RERUN PROFILE
+# ============================
+show_profile()
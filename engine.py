@@ -0,0 +1,232 @@
+"""Embedded SQLite engine for the streaming platform schema.
+
+The table scripts in ``catalog.sql_scripts`` are written for Oracle, so this
+module carries a small dialect shim: ``INSERT ALL ... SELECT * FROM dual``
+blocks become batched inserts, ``DD-MON-YYYY`` literals become ISO dates,
+``SYSDATE`` maps to the current date and ``ADD_MONTHS`` is registered as a
+SQL function with Oracle's end-of-month semantics.
+"""
+
+import calendar
+import re
+import sqlite3
+import threading
+from datetime import date
+
+import pandas as pd
+
+
+MONTHS = {name.upper(): i for i, name in enumerate(calendar.month_abbr) if name}
+
+ORACLE_DATE = re.compile(r"^(\d{2})-([A-Za-z]{3})-(\d{4})$")
+ORACLE_DATE_LITERAL = re.compile(r"'(\d{2})-([A-Za-z]{3})-(\d{4})'")
+CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(\w+)\s*\(", re.IGNORECASE)
+INTO_ROW = re.compile(r"^\s*INTO\s+(\w+)\s+VALUES\s*\((.*)\)\s*;?\s*$", re.IGNORECASE)
+LITERAL = re.compile(r"'(?:[^']|'')*'|-?\d+(?:\.\d+)?|NULL", re.IGNORECASE)
+SYSDATE = re.compile(r"\bSYSDATE\b", re.IGNORECASE)
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)", re.IGNORECASE)
+WRITE_TARGET = re.compile(r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+(\w+)", re.IGNORECASE)
+
+
+def oracle_date(text):
+    """Convert a ``DD-MON-YYYY`` string to ISO ``YYYY-MM-DD``, else return it unchanged."""
+    match = ORACLE_DATE.match(text)
+    if not match or match.group(2).upper() not in MONTHS:
+        return text
+    day, month, year = match.groups()
+    return f"{year}-{MONTHS[month.upper()]:02d}-{day}"
+
+
+def add_months(value, months):
+    """Oracle ``ADD_MONTHS``: shift by whole months, clamping to the month end."""
+    if value is None or months is None:
+        return None
+    start = date.fromisoformat(str(value)[:10])
+    index = start.month - 1 + int(months)
+    year, month = start.year + index // 12, index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    if start.day == calendar.monthrange(start.year, start.month)[1]:
+        day = last_day
+    else:
+        day = min(start.day, last_day)
+    return date(year, month, day).isoformat()
+
+
+def translate(sql):
+    """Rewrite an Oracle query so SQLite can run it."""
+    sql = ORACLE_DATE_LITERAL.sub(lambda m: "'" + oracle_date("-".join(m.groups())) + "'", sql)
+    sql = SYSDATE.sub("DATE('now')", sql)
+    return sql.strip().rstrip(";")
+
+
+def referenced_tables(sql):
+    """Names of the tables a query reads, lower-cased, in order of first use."""
+    return list(dict.fromkeys(t.lower() for t in TABLE_REF.findall(sql) if t.lower() != "dual"))
+
+
+def parse_literal(token):
+    if token.upper() == "NULL":
+        return None
+    if token.startswith("'"):
+        return oracle_date(token[1:-1].replace("''", "'"))
+    return float(token) if "." in token else int(token)
+
+
+def parse_script(script):
+    """Split a table script into its CREATE TABLE statements and row inserts.
+
+    Returns ``(ddl, rows)`` where ``rows`` maps each table name to a list of
+    value tuples taken from the ``INSERT ALL`` block.
+    """
+    script = re.sub(r"--[^\n]*", "", script)
+    ddl = []
+    for match in CREATE_TABLE.finditer(script):
+        depth, end = 0, match.end() - 1
+        for end in range(match.end() - 1, len(script)):
+            if script[end] == "(":
+                depth += 1
+            elif script[end] == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+        body = script[match.start():end + 1]
+        ddl.append(re.sub(r"\bVARCHAR2\b", "VARCHAR", body, flags=re.IGNORECASE))
+
+    rows = {}
+    for line in script.splitlines():
+        match = INTO_ROW.match(line)
+        if match:
+            table, values = match.groups()
+            rows.setdefault(table, []).append(tuple(parse_literal(t) for t in LITERAL.findall(values)))
+    return ddl, rows
+
+
+def split_top_level(text):
+    """Split on commas that are not inside parentheses."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def table_schema(ddl):
+    """Describe a CREATE TABLE statement.
+
+    Returns ``(table, columns, primary_key, foreign_keys)``: ``columns`` is a
+    list of ``(name, type)`` with the type upper-cased and any size kept
+    (``DECIMAL(10,2)``), ``primary_key`` a list of column names and
+    ``foreign_keys`` maps a column to the table it references.
+    """
+    table = CREATE_TABLE.match(ddl.strip()).group(1)
+    body = ddl[ddl.index("(") + 1:ddl.rindex(")")]
+    columns, primary_key, foreign_keys = [], [], {}
+    for part in split_top_level(body):
+        words = part.split()
+        keyword = words[0].upper()
+        if keyword == "PRIMARY":
+            primary_key = [c.strip() for c in part[part.index("(") + 1:part.index(")")].split(",")]
+        elif keyword == "FOREIGN":
+            match = re.match(r"FOREIGN\s+KEY\s*\((\w+)\)\s*REFERENCES\s+(\w+)", part, re.IGNORECASE)
+            foreign_keys[match.group(1)] = match.group(2)
+        elif keyword not in ("CONSTRAINT", "UNIQUE", "CHECK"):
+            kind = re.match(r"\s*\w+\s*(\([\d\s,]*\))?", part[len(words[0]):]).group(0)
+            columns.append((words[0], re.sub(r"\s", "", kind).upper()))
+            if "PRIMARY KEY" in part.upper():
+                primary_key = [words[0]]
+    return table, columns, primary_key, foreign_keys
+
+
+class Engine:
+    """A thread-safe SQLite database shared by every Streamlit session."""
+
+    def __init__(self, path=":memory:"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.create_function("ADD_MONTHS", 2, add_months, deterministic=True)
+        self.lock = threading.RLock()
+        # Per-table write counters; readers such as the query cache compare
+        # them to decide whether a stored result is still current.
+        self.versions = {}
+        self.listeners = []
+        self.dependents = {}
+
+    @classmethod
+    def from_scripts(cls, scripts, path=":memory:", with_rows=True):
+        """Build a database from a ``{table: script}`` mapping such as ``catalog.sql_scripts``."""
+        engine = cls(path)
+        for script in scripts.values():
+            engine.load_script(script, with_rows=with_rows)
+        return engine
+
+    def load_script(self, script, with_rows=True):
+        ddl, rows = parse_script(script)
+        with self.lock, self.conn:
+            for statement in ddl:
+                self.conn.execute(statement)
+        if with_rows:
+            for table, values in rows.items():
+                self.insert_rows(table, values)
+
+    def insert_rows(self, table, rows):
+        """Insert an iterable of value tuples into ``table`` in a single transaction."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" * len(rows[0]))
+        with self.lock, self.conn:
+            self.conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        self.touch(table)
+        return len(rows)
+
+    def write(self, sql, params=()):
+        """Run an INSERT, UPDATE or DELETE and return the number of affected rows."""
+        match = WRITE_TARGET.match(sql)
+        if not match:
+            raise ValueError(f"Not a write statement: {sql[:40]!r}")
+        with self.lock, self.conn:
+            count = self.conn.execute(translate(sql), params).rowcount
+        self.touch(match.group(1))
+        return count
+
+    def derive(self, table, sources):
+        """Declare that ``table`` is maintained from ``sources``, so writes to them touch it too."""
+        for source in sources:
+            self.dependents.setdefault(source.lower(), set()).add(table.lower())
+
+    def touch(self, *tables):
+        """Record a write to ``tables`` and notify listeners."""
+        names = [t.lower() for t in tables]
+        names += [d for t in names for d in sorted(self.dependents.get(t, ())) if d not in names]
+        with self.lock:
+            for name in names:
+                self.versions[name] = self.versions.get(name, 0) + 1
+        for listener in self.listeners:
+            listener(names)
+
+    def version(self, tables):
+        with self.lock:
+            return tuple(self.versions.get(t, 0) for t in tables)
+
+    def execute(self, sql, params=()):
+        """Run a (possibly Oracle-flavoured) query and return ``(columns, rows)``."""
+        with self.lock:
+            cursor = self.conn.execute(translate(sql), params)
+            columns = [d[0] for d in cursor.description or ()]
+            rows = cursor.fetchall()
+        return columns, rows
+
+    def query(self, sql, params=()):
+        """Run a query and return the result as a DataFrame."""
+        columns, rows = self.execute(sql, params)
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def tables(self):
+        _, rows = self.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        return [r[0] for r in rows]
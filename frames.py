@@ -0,0 +1,443 @@
+"""Pandas execution of the catalogue queries, without a database.
+
+``Frames`` holds one typed DataFrame per table, indexed and sorted by its
+primary key. Every foreign key column is a categorical whose categories are
+the referenced table's index, so its codes are row positions there: a join is
+an array lookup through the codes instead of a hash merge, and a chain of
+joins (watch -> content -> genre) is a chain of lookups. Name columns used as
+group keys are categoricals too and are grouped with ``observed=True``.
+
+Each of the 12 queries in ``catalog.queries`` has a vectorized plan in
+``PLANS`` returning the same columns as its SQL. Tables can come from the
+Oracle scripts, from ``datagen`` or from an existing ``Engine``, so the
+queries can be run on generated data without building a database:
+
+    python frames.py --users 100000 --query "QUERY 10"
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import datagen
+from catalog import queries, query_number, sql_scripts
+from engine import add_months, parse_script, table_schema
+
+
+def load_schema(scripts=sql_scripts):
+    """``{table: (columns, primary_key, foreign_keys)}`` from the CREATE TABLE statements."""
+    schema = {}
+    for script in scripts.values():
+        for ddl in parse_script(script)[0]:
+            table, columns, primary_key, foreign_keys = table_schema(ddl)
+            schema[table] = (columns, primary_key, foreign_keys)
+    return schema
+
+
+SCHEMA = load_schema()
+
+# Text columns the plans group by; always categorical
+GROUP_KEYS = {
+    "User1": ["name"],
+    "Plan": ["plan_name"],
+    "Genre": ["genre_name"],
+    "Content": ["title", "type"],
+    "Actor": ["actor_name"],
+}
+# Other text columns become categorical below this many distinct values per row
+CATEGORY_RATIO = 0.5
+
+
+def sql_type(kind):
+    """``("DECIMAL", [10, 2])`` from a declared type such as ``"DECIMAL(10,2)"``."""
+    base, _, size = kind.partition("(")
+    return base, [int(n) for n in size.rstrip(")").split(",") if n]
+
+
+def scale(table, column):
+    """10 ** s for a DECIMAL(p, s) column, which is stored as a count of 10 ** -s units; else 1."""
+    kind = dict(SCHEMA[table][0])[column]
+    base, size = sql_type(kind)
+    return 10 ** size[1] if base == "DECIMAL" and len(size) == 2 else 1
+
+
+def typed(table, frame):
+    """Cast the columns of ``frame`` to the smallest dtypes their declared SQL types allow.
+
+    Integers are downcast to the narrowest signed type holding their values,
+    DECIMAL(p, s) becomes fixed point (see ``scale``), DATE becomes datetime64
+    and text becomes categorical when its values repeat. Columns with missing
+    values stay float64.
+    """
+    columns, primary_key, _ = SCHEMA[table]
+    for name, kind in columns:
+        base, _ = sql_type(kind)
+        if base == "DATE":
+            frame[name] = pd.to_datetime(frame[name], format="%Y-%m-%d", errors="coerce")
+        elif base in ("INT", "INTEGER", "NUMBER", "DECIMAL"):
+            values = pd.to_numeric(frame[name]) * scale(table, name)
+            if base == "DECIMAL":
+                values = values.round()
+            frame[name] = values if values.isna().any() else pd.to_numeric(values, downcast="integer")
+        elif name in GROUP_KEYS.get(table, ()) or frame[name].nunique() <= CATEGORY_RATIO * len(frame):
+            frame[name] = frame[name].astype("category")
+    if len(primary_key) == 1:
+        frame = frame.set_index(primary_key[0]).sort_index()
+    return frame
+
+
+def hop(key, positions=None):
+    """Row positions in the referenced table of categorical foreign ``key``.
+
+    With ``positions``, follow the key from those rows only; -1 stays -1.
+    """
+    codes = key.cat.codes.to_numpy()
+    if positions is None:
+        return codes
+    result = np.full(len(positions), -1, codes.dtype)
+    found = positions >= 0
+    result[found] = codes[positions[found]]
+    return result
+
+
+def key_positions(keys, index):
+    """Positions of ``keys`` in the sorted key array ``index``; -1 where absent."""
+    if not len(index):
+        return np.full(len(keys), -1)
+    at = np.minimum(np.searchsorted(index, keys), len(index) - 1)
+    return np.where(index[at] == keys, at, -1)
+
+
+def labels(frame, column, positions):
+    """Values of ``frame[column]`` at row ``positions``, keeping a categorical a categorical."""
+    return frame[column].array.take(positions)
+
+
+def ranked(frame, column, ascending=False):
+    return frame.sort_values(column, ascending=ascending, kind="stable", ignore_index=True)
+
+
+def per_content(t, positions, values=None):
+    """Sum of ``values`` (or a row count) per Content position."""
+    return np.bincount(positions, values, minlength=len(t["Content"]))
+
+
+def by_actor(t, per_title, **columns):
+    """Sum per-title arrays over each actor's titles, grouped by actor_name."""
+    links = t["Content_Actor"]
+    content, actor = hop(links["content_id"]), hop(links["actor_id"])
+    found = (content >= 0) & (actor >= 0)
+    data = {"actor_name": labels(t["Actor"], "actor_name", actor[found]), "rows": per_title[content[found]]}
+    data.update({name: values[content[found]] for name, values in columns.items()})
+    summed = pd.DataFrame(data).groupby("actor_name", observed=True).sum().reset_index()
+    return summed[summed["rows"] > 0]
+
+
+def by_genre(t, per_title, **columns):
+    """Sum per-title arrays over each genre's titles, grouped by genre_name."""
+    genre = hop(t["Content"]["genre_id"])
+    found = genre >= 0
+    data = {"genre_name": labels(t["Genre"], "genre_name", genre[found]), "rows": per_title[found]}
+    data.update({name: values[found] for name, values in columns.items()})
+    summed = pd.DataFrame(data).groupby("genre_name", observed=True).sum().reset_index()
+    return summed[summed["rows"] > 0]
+
+
+def paid_by_user(t):
+    """``(spent, payments)`` per User1 position: total amount paid and number of payments."""
+    payments = t["Payment"]
+    payer = hop(t["Subscription"]["user_id"], hop(payments["subscription_id"]))
+    paid = payer >= 0
+    n_users = len(t["User1"])
+    amounts = np.nan_to_num(payments["amount"].to_numpy(dtype=float)[paid])
+    spent = np.bincount(payer[paid], amounts, minlength=n_users) / scale("Payment", "amount")
+    return spent, np.bincount(payer[paid], minlength=n_users)
+
+
+def watch_totals(titles, content, progress=None, viewer=None, paid=None):
+    """Per-title sums over a slice of Watch_History whose titles are Content positions ``content``.
+
+    Counts the watches of each of the ``titles`` titles ("views"). With
+    ``progress``, also sums it ("progress") and counts it where not null
+    ("progressed"); with ``viewer`` positions and ``paid`` from
+    ``paid_by_user``, sums what each watch's viewer paid ("spent",
+    "payments"). Totals of disjoint slices add up to those of the whole table.
+    """
+    known = content >= 0
+    totals = {"views": np.bincount(content[known], minlength=titles)}
+    if progress is not None:
+        progress = np.asarray(progress, dtype=float)[known]
+        rated = ~np.isnan(progress)
+        totals["progress"] = np.bincount(content[known][rated], progress[rated], minlength=titles)
+        totals["progressed"] = np.bincount(content[known][rated], minlength=titles)
+    if viewer is not None:
+        spent, payments = paid
+        both = known & (viewer >= 0)
+        totals["spent"] = np.bincount(content[both], spent[viewer[both]], minlength=titles)
+        totals["payments"] = np.bincount(content[both], payments[viewer[both]], minlength=titles)
+    return totals
+
+
+def table_totals(t, needs=()):
+    """``watch_totals`` of the whole Watch_History; ``needs`` may hold "progress" and "viewer"."""
+    watches = t["Watch_History"]
+    return watch_totals(len(t["Content"]), hop(watches["content_id"]),
+                        progress=watches["progress"].to_numpy() if "progress" in needs else None,
+                        viewer=hop(watches["user_id"]) if "viewer" in needs else None,
+                        paid=paid_by_user(t) if "viewer" in needs else None)
+
+
+def genre_views(t, totals):
+    summed = by_genre(t, totals["views"])
+    return ranked(summed.rename(columns={"rows": "total_views"}), "total_views")
+
+
+def genre_completion(t, totals):
+    summed = by_genre(t, totals["views"], progress=totals["progress"], progressed=totals["progressed"])
+    counted = summed["progressed"].where(summed["progressed"] > 0)
+    result = pd.DataFrame({"genre_name": summed["genre_name"], "avg_completion": summed["progress"] / counted})
+    return ranked(result, "avg_completion")
+
+
+def actor_views(t, totals):
+    summed = by_actor(t, totals["views"])
+    return ranked(summed[["actor_name", "rows"]].rename(columns={"rows": "total_views"}), "total_views")
+
+
+def genre_revenue(t, totals):
+    # Every payment of a user pairs with every watch of that user, so a genre
+    # earns sum(user's payments) once per watch the user made in it.
+    summed = by_genre(t, totals["payments"], total_genre_revenue=totals["spent"])
+    return ranked(summed.drop(columns="rows"), "total_genre_revenue")
+
+
+def query_1(t, today):
+    return genre_views(t, table_totals(t))
+
+
+def query_2(t, today):
+    payments = t["Payment"]
+    plan = hop(t["Subscription"]["plan_id"], hop(payments["subscription_id"]))
+    found = plan >= 0
+    result = pd.DataFrame({"plan_name": labels(t["Plan"], "plan_name", plan[found]),
+                           "total_revenue": payments["amount"].to_numpy()[found]})
+    result = result.groupby("plan_name", observed=True).sum().reset_index()
+    result["total_revenue"] /= scale("Payment", "amount")
+    return ranked(result, "total_revenue")
+
+
+def query_3(t, today):
+    reviews = t["Review"]
+    content = hop(reviews["content_id"])
+    found = content >= 0
+    result = pd.DataFrame({"title": labels(t["Content"], "title", content[found]),
+                           "avg_rating": reviews["rating"].to_numpy()[found]})
+    return ranked(result.groupby("title", observed=True).mean().reset_index(), "avg_rating")
+
+
+def query_4(t, today):
+    reviews = t["Review"]
+    content = hop(reviews["content_id"])
+    found = content >= 0
+    ratings = reviews["rating"].to_numpy(dtype=float)[found]
+    rated = ~np.isnan(ratings)
+    summed = by_actor(t, per_content(t, content[found]),
+                      total=per_content(t, content[found][rated], ratings[rated]),
+                      count=per_content(t, content[found][rated]))
+    result = pd.DataFrame({"actor_name": summed["actor_name"],
+                           "avg_actor_rating": summed["total"] / summed["count"].where(summed["count"] > 0)})
+    return ranked(result, "avg_actor_rating")
+
+
+def query_5(t, today):
+    payments = t["Payment"]
+    user = hop(t["Subscription"]["user_id"], hop(payments["subscription_id"]))
+    found = user >= 0
+    users = len(np.unique(user[found]))
+    total = payments["amount"].to_numpy()[found].sum() / scale("Payment", "amount")
+    return pd.DataFrame({"avg_revenue_per_user": [total / users if users else None]})
+
+
+def query_6(t, today):
+    subscriptions = t["Subscription"]
+    until = pd.Timestamp(add_months(today.isoformat(), 2))
+    ends = subscriptions["end_date"]
+    user = hop(subscriptions["user_id"])
+    found = ((ends >= pd.Timestamp(today)) & (ends <= until)).to_numpy() & (user >= 0)
+    users = t["User1"]
+    result = pd.DataFrame({"user_id": users.index.to_numpy()[user[found]],
+                           "name": np.asarray(labels(users, "name", user[found])),
+                           "end_date": ends.to_numpy()[found]})
+    return ranked(result, "end_date", ascending=True)
+
+
+def query_7(t, today):
+    return genre_completion(t, table_totals(t, ["progress"]))
+
+
+def query_8(t, today):
+    user = hop(t["Review"]["user_id"])
+    keys = labels(t["User1"], "name", user[user >= 0])
+    counts = pd.DataFrame({"name": keys}).groupby("name", observed=True).size()
+    result = counts.rename("review_count").reset_index()
+    return result[result["review_count"] > 1].reset_index(drop=True)
+
+
+def query_9(t, today):
+    return actor_views(t, table_totals(t))
+
+
+def query_10(t, today):
+    return genre_revenue(t, table_totals(t, ["viewer"]))
+
+
+def query_11(t, today):
+    reviews = t["Review"]
+    content = hop(reviews["content_id"])
+    found = content >= 0
+    joined = pd.DataFrame({"content_type": labels(t["Content"], "type", content[found]),
+                           "rating": reviews["rating"].to_numpy()[found],
+                           "content": content[found]})
+    result = joined.groupby("content_type", observed=True).agg(
+        avg_rating=("rating", "mean"),
+        total_titles=("content", "nunique"),
+        total_reviews=("content", "size"),
+    ).reset_index()
+    return ranked(result, "avg_rating")
+
+
+def query_12(t, today):
+    reviews = t["Review"]
+    user = hop(reviews["user_id"])
+    ratings = reviews["rating"].to_numpy(dtype=float)
+    found = (ratings > np.nanmean(ratings) if len(ratings) else ratings > 0) & (user >= 0)
+    users = t["User1"]
+    result = pd.DataFrame({"user_id": users.index.to_numpy()[user[found]],
+                           "name": np.asarray(labels(users, "name", user[found])),
+                           "content_id": np.asarray(reviews["content_id"])[found],
+                           "rating": reviews["rating"].to_numpy()[found]})
+    return ranked(result, "rating")
+
+
+PLANS = {
+    1: query_1, 2: query_2, 3: query_3, 4: query_4, 5: query_5, 6: query_6,
+    7: query_7, 8: query_8, 9: query_9, 10: query_10, 11: query_11, 12: query_12,
+}
+
+# Plans that are per-title sums over Watch_History: {query: (totals needed, finishing step)}
+WATCH_TOTALS = {
+    1: ((), genre_views),
+    7: (("progress",), genre_completion),
+    9: ((), actor_views),
+    10: (("viewer",), genre_revenue),
+}
+
+# Columns each plan reads besides primary keys, for stores that can load a subset (see columnar)
+COLUMNS = {
+    1: {"Watch_History": ["content_id"], "Content": ["genre_id"], "Genre": ["genre_name"]},
+    2: {"Payment": ["subscription_id", "amount"], "Subscription": ["plan_id"], "Plan": ["plan_name"]},
+    3: {"Review": ["content_id", "rating"], "Content": ["title"]},
+    4: {"Review": ["content_id", "rating"], "Content": [], "Content_Actor": ["content_id", "actor_id"],
+        "Actor": ["actor_name"]},
+    5: {"Payment": ["subscription_id", "amount"], "Subscription": ["user_id"]},
+    6: {"Subscription": ["user_id", "end_date"], "User1": ["name"]},
+    7: {"Watch_History": ["content_id", "progress"], "Content": ["genre_id"], "Genre": ["genre_name"]},
+    8: {"Review": ["user_id"], "User1": ["name"]},
+    9: {"Watch_History": ["content_id"], "Content": [], "Content_Actor": ["content_id", "actor_id"],
+        "Actor": ["actor_name"]},
+    10: {"Payment": ["subscription_id", "amount"], "Subscription": ["user_id"], "User1": [],
+         "Watch_History": ["user_id", "content_id"], "Content": ["genre_id"], "Genre": ["genre_name"]},
+    11: {"Review": ["content_id", "rating"], "Content": ["type"]},
+    12: {"Review": ["user_id", "content_id", "rating"], "User1": ["name"]},
+}
+
+
+class Frames:
+    """Typed, key-indexed DataFrames of every table, queried with ``PLANS``.
+
+    ``tables`` are DataFrames as loaded; with ``stored=True`` they are already
+    typed and linked (as ``columnar`` reads them back) and are used as given.
+    """
+
+    def __init__(self, tables, stored=False):
+        if stored:
+            self.tables = dict(tables)
+            self.loaded_bytes = self.memory_bytes()
+            return
+        tables = {name: tables.get(name, pd.DataFrame(columns=[c for c, _ in columns]))
+                  for name, (columns, _, _) in SCHEMA.items()}
+        self.loaded_bytes = {name: int(frame.memory_usage(index=True, deep=True).sum())
+                             for name, frame in tables.items()}
+        self.tables = {name: typed(name, frame) for name, frame in tables.items()}
+        names = {name.lower(): name for name in self.tables}
+        for name, (_, _, foreign_keys) in SCHEMA.items():
+            frame = self.tables[name]
+            for column, target in foreign_keys.items():
+                keys = self.tables[names[target.lower()]].index
+                frame[column] = pd.Categorical(frame[column], categories=keys)
+
+    @classmethod
+    def from_rows(cls, chunks):
+        """Build from ``(table, rows)`` pairs such as ``datagen.generate()`` yields."""
+        collected = {}
+        for table, rows in chunks:
+            collected.setdefault(table, []).extend(rows)
+        return cls({table: pd.DataFrame.from_records(rows, columns=[c for c, _ in SCHEMA[table][0]])
+                    for table, rows in collected.items()})
+
+    @classmethod
+    def from_scripts(cls, scripts=sql_scripts):
+        return cls.from_rows(pair for script in scripts.values() for pair in parse_script(script)[1].items())
+
+    @classmethod
+    def from_engine(cls, engine):
+        return cls({table: engine.query(f"SELECT * FROM {table}") for table in SCHEMA})
+
+    def query(self, title, today=None):
+        """Result of catalogue query ``title``; SYSDATE is ``today`` (default: the current date)."""
+        plan = PLANS[query_number(title)]
+        return plan(self.tables, today or date.today())
+
+    def memory_bytes(self):
+        return {name: int(frame.memory_usage(index=True, deep=True).sum()) for name, frame in self.tables.items()}
+
+    def memory_report(self):
+        """Rows and MB per table as loaded (int64/object columns) and as stored here."""
+        stored = self.memory_bytes()
+        report = pd.DataFrame({
+            "table": list(self.tables),
+            "rows": [len(frame) for frame in self.tables.values()],
+            "loaded_mb": [self.loaded_bytes[name] / 1e6 for name in self.tables],
+            "stored_mb": [stored[name] / 1e6 for name in self.tables],
+        })
+        report["ratio"] = report["loaded_mb"] / report["stored_mb"]
+        return report.round(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the catalogue queries on generated data with pandas only")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--query", default="", help="only run queries whose title contains this text")
+    parser.add_argument("--rows", type=int, default=10, help="result rows to print per query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frames = Frames.from_rows(datagen.generate(users=args.users, contents=max(100, args.users // 5),
+                                               actors=max(50, args.users // 10), seed=args.seed))
+    print(f"Loaded {args.users:,} users in {time.perf_counter() - start:.2f} s, "
+          f"{sum(frames.memory_bytes().values()) / 1e6:.1f} MB", file=sys.stderr)
+    print(frames.memory_report().to_string(index=False), file=sys.stderr)
+    for title in (t for t in queries if args.query.lower() in t.lower()):
+        start = time.perf_counter()
+        result = frames.query(title)
+        print(f"\n{title} ({(time.perf_counter() - start) * 1000:.2f} ms, {len(result)} rows)")
+        print(result.head(args.rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
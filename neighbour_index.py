@@ -0,0 +1,334 @@
+"""Persisted top-K neighbour index over the content catalogue.
+
+The index lives in a directory of ``.npy`` arrays that are memory-mapped on
+open, so a restart reuses it instead of recomputing similarities::
+
+    meta.json            current generation, K and the data fingerprint
+    <generation>/*.npy   the arrays below
+
+Positions index ``content_ids`` (every Content row, sorted):
+
+    content_ids    int64 (n)       content_id per position
+    neighbours     int32 (n, K)    positions of the K most similar titles, -1 for empty slots
+    similarity     float32 (n, K)  their cosine similarity, best first
+    norms          float32 (n)     L2 norm of each title's column of the user x content matrix
+    popularity     float32 (n)     column sums of that matrix
+    genres         int64 (n)       genre_id per title
+    actor_ids      int64 (m)       actor_id of every actor with a title, sorted
+    actor_offsets  int64 (m + 1)   CSR offsets into actor_titles
+    actor_titles   int32           positions of each actor's titles
+    title_offsets  int64 (n + 1)   CSR offsets into title_actors
+    title_actors   int32           positions into actor_ids of each title's cast, by actor_id
+
+The user x content matrix holds Review ratings / 5 plus Watch_History
+progress / 100. Triggers queue the content_id of every rating or watch that is
+written in ``neighbour_events``, and ``patch`` recomputes just those titles:
+their norm, popularity and neighbour row, and their entry in every row that
+lists them or shares a viewer with them. Dropping a title from another row's
+top K does not pull in the next best candidate, so rows can drift slightly
+below the true top K until the next full ``build``; new titles and cast
+changes always need one.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from scipy import sparse
+
+import user_store
+
+
+NEIGHBOURS = 50
+BLOCK_ENTRIES = 4_000_000  # dense similarity cells computed per block
+
+# Viewers of a title, and (from user_store) titles of a viewer
+INDEXES = user_store.INDEXES + [
+    "CREATE INDEX IF NOT EXISTS idx_review_content ON Review (content_id, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_watch_history_content ON Watch_History (content_id, user_id)",
+]
+
+EVENTS = "CREATE TABLE IF NOT EXISTS neighbour_events (content_id INT PRIMARY KEY)"
+
+# Tables whose rows the index is computed from, for the on-disk fingerprint
+FINGERPRINT = ("Content", "Content_Actor", "Review", "Watch_History")
+
+REVIEW_WEIGHT = "COALESCE(rating, 0) / 5.0"
+WATCH_WEIGHT = "COALESCE(progress, 0) / 100.0"
+
+INTERACTIONS = f"""
+SELECT user_id, content_id, {REVIEW_WEIGHT} FROM Review
+UNION ALL
+SELECT user_id, content_id, {WATCH_WEIGHT} FROM Watch_History"""
+
+USER_ITEMS = f"""
+SELECT content_id, SUM(w) FROM (
+    SELECT content_id, {REVIEW_WEIGHT} AS w FROM Review WHERE user_id = ?
+    UNION ALL
+    SELECT content_id, {WATCH_WEIGHT} FROM Watch_History WHERE user_id = ?
+) GROUP BY content_id"""
+
+# Column sum of one title and its dot product with every title sharing a viewer
+VIEWERS = f"""
+SELECT user_id, SUM(w) AS w FROM (
+    SELECT user_id, {REVIEW_WEIGHT} AS w FROM Review WHERE content_id = ?
+    UNION ALL
+    SELECT user_id, {WATCH_WEIGHT} FROM Watch_History WHERE content_id = ?
+) GROUP BY user_id"""
+
+POPULARITY = f"SELECT COALESCE(SUM(w), 0) FROM ({VIEWERS})"
+
+DOTS = f"""
+WITH viewers AS ({VIEWERS})
+SELECT content_id, SUM(dot) FROM (
+    SELECT r.content_id, v.w * COALESCE(r.rating, 0) / 5.0 AS dot
+    FROM viewers v JOIN Review r ON r.user_id = v.user_id
+    UNION ALL
+    SELECT wh.content_id, v.w * COALESCE(wh.progress, 0) / 100.0
+    FROM viewers v JOIN Watch_History wh ON wh.user_id = v.user_id
+) GROUP BY content_id"""
+
+
+def trigger_statements():
+    for table in ("Review", "Watch_History"):
+        for event, rows in (("INSERT", ["NEW"]), ("DELETE", ["OLD"]), ("UPDATE", ["OLD", "NEW"])):
+            body = "\n    ".join(f"INSERT OR IGNORE INTO neighbour_events VALUES ({row}.content_id);" for row in rows)
+            name = f"neighbours_{table.lower()}_{event.lower()}"
+            yield f"DROP TRIGGER IF EXISTS {name}"
+            yield f"CREATE TRIGGER {name} AFTER {event} ON {table}\nBEGIN\n    {body}\nEND"
+
+
+def install(engine):
+    """Create the lookup indexes, the event queue and its triggers on ``engine``."""
+    with engine.lock, engine.conn:
+        for statement in INDEXES + [EVENTS]:
+            engine.conn.execute(statement)
+        for statement in trigger_statements():
+            engine.conn.execute(statement)
+
+
+def drain(engine):
+    """Content ids written since the last call."""
+    with engine.lock, engine.conn:
+        ids = [r[0] for r in engine.conn.execute("SELECT content_id FROM neighbour_events")]
+        engine.conn.execute("DELETE FROM neighbour_events")
+    return ids
+
+
+def fingerprint(engine):
+    """Row count and last rowid of each source table."""
+    result = {}
+    for table in FINGERPRINT:
+        _, rows = engine.execute(f"SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM {table}")
+        result[table] = list(rows[0])
+    return result
+
+
+def top_k(similarity, k):
+    """Column indices and values of the ``k`` largest entries in each row, best first."""
+    k = min(k, similarity.shape[1])
+    if k == 0:
+        return np.empty((len(similarity), 0), np.int32), np.empty((len(similarity), 0), np.float32)
+    index = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(similarity, index, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(index, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def csr(keys, values, size):
+    """Offsets and values grouping ``values`` by integer ``keys`` in ``range(size)``."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(size + 1, np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values[order].astype(np.int32)
+
+
+def build(engine, k=NEIGHBOURS):
+    """Compute every array of the index from the database."""
+    drain(engine)  # everything queued so far is covered by this build
+    _, rows = engine.execute("SELECT content_id, genre_id FROM Content ORDER BY content_id")
+    content = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    content_ids, genres = content[:, 0], content[:, 1]
+    n_items = len(content_ids)
+
+    _, rows = engine.execute(INTERACTIONS)
+    events = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    user_ids, user_index = np.unique(events[:, 0].astype(np.int64), return_inverse=True)
+    item_index = np.searchsorted(content_ids, events[:, 1].astype(np.int64))
+    matrix = sparse.csr_matrix((events[:, 2], (user_index, item_index)),
+                               shape=(len(user_ids), n_items), dtype=np.float32)
+    matrix.sum_duplicates()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel()).astype(np.float32)
+    normalized = (matrix @ sparse.diags(1 / np.where(norms > 0, norms, 1))).tocsc()
+    k = min(k, max(n_items - 1, 0))
+    neighbours = np.full((n_items, k), -1, np.int32)
+    similarity = np.zeros((n_items, k), np.float32)
+    block = max(1, BLOCK_ENTRIES // max(n_items, 1))
+    for start in range(0, n_items, block):
+        stop = min(start + block, n_items)
+        dense = (normalized[:, start:stop].T @ normalized).toarray()
+        dense[np.arange(stop - start), np.arange(start, stop)] = 0  # never your own neighbour
+        neighbours[start:stop], similarity[start:stop] = top_k(dense, k)
+    neighbours[similarity <= 0] = -1
+    similarity[similarity <= 0] = 0
+
+    _, rows = engine.execute("SELECT content_id, actor_id FROM Content_Actor ORDER BY actor_id, content_id")
+    links = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    actor_ids, link_actor = np.unique(links[:, 1], return_inverse=True)
+    link_title = np.searchsorted(content_ids, links[:, 0])
+    actor_offsets, actor_titles = csr(link_actor, link_title, len(actor_ids))
+    title_offsets, title_actors = csr(link_title, link_actor, n_items)
+
+    return {
+        "content_ids": content_ids,
+        "neighbours": neighbours,
+        "similarity": similarity,
+        "norms": norms,
+        "popularity": np.asarray(matrix.sum(axis=0)).ravel().astype(np.float32),
+        "genres": genres,
+        "actor_ids": actor_ids,
+        "actor_offsets": actor_offsets,
+        "actor_titles": actor_titles,
+        "title_offsets": title_offsets,
+        "title_actors": title_actors,
+    }
+
+
+def save(path, arrays, k, source):
+    """Write ``arrays`` as a new generation under ``path`` and make it current."""
+    generation = f"{time.time_ns():x}"
+    os.makedirs(os.path.join(path, generation))
+    for name, array in arrays.items():
+        np.save(os.path.join(path, generation, f"{name}.npy"), array)
+    write_meta(path, {"generation": generation, "k": k, "fingerprint": source})
+    for entry in os.listdir(path):
+        if entry != generation and os.path.isdir(os.path.join(path, entry)):
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(path, meta):
+    tmp = os.path.join(path, f"meta.json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+class NeighbourIndex:
+    """Memory-mapped view of one generation of the index, patched in place."""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = read_meta(path)
+        folder = os.path.join(path, self.meta["generation"])
+        for name in os.listdir(folder):
+            if name.endswith(".npy"):
+                setattr(self, name[:-4], np.load(os.path.join(folder, name), mmap_mode="r+"))
+        self.k = self.neighbours.shape[1]
+
+    @classmethod
+    def open(cls, engine, path, k=NEIGHBOURS):
+        """The index at ``path``, rebuilt first if missing or out of date with ``engine``."""
+        source = fingerprint(engine)
+        meta = read_meta(path)
+        if meta is None or meta["k"] != k or meta["fingerprint"] != source:
+            save(path, build(engine, k), k, source)
+        return cls(path)
+
+    def positions(self, content_ids):
+        """Positions of ``content_ids``, -1 for titles not in the index."""
+        content_ids = np.asarray(content_ids, dtype=np.int64)
+        if len(self.content_ids) == 0:
+            return np.full(len(content_ids), -1)
+        found = np.searchsorted(self.content_ids, content_ids).clip(max=len(self.content_ids) - 1)
+        return np.where(self.content_ids[found] == content_ids, found, -1)
+
+    def cast(self, position):
+        """actor_ids of the title at ``position``."""
+        actors = self.title_actors[self.title_offsets[position]:self.title_offsets[position + 1]]
+        return [int(a) for a in self.actor_ids[actors]]
+
+    def filmography(self, actor_id):
+        """Positions of the titles ``actor_id`` appears in."""
+        found = np.searchsorted(self.actor_ids, actor_id)
+        if found == len(self.actor_ids) or self.actor_ids[found] != actor_id:
+            return np.empty(0, np.int32)
+        return np.asarray(self.actor_titles[self.actor_offsets[found]:self.actor_offsets[found + 1]])
+
+    def patch(self, engine, content_ids, lock=None):
+        """Recompute the rows affected by writes to ``content_ids``; False if a title is not indexed.
+
+        The queries run first; only the in-place update of the arrays holds
+        ``lock``, so readers sharing it wait for numpy work, not for SQL.
+        """
+        positions = self.positions(content_ids)
+        if (positions < 0).any():
+            return False
+        source = fingerprint(engine)
+        rows = {}
+        for position, content_id in zip(positions, content_ids):
+            _, [(total,)] = engine.execute(POPULARITY, (content_id, content_id))
+            _, dots = engine.execute(DOTS, (content_id, content_id))
+            ids = np.array([r[0] for r in dots], dtype=np.int64)
+            values = np.array([r[1] or 0 for r in dots], dtype=np.float64)
+            rows[position] = (total, np.sqrt(values[ids == content_id].sum()), self.positions(ids), values)
+
+        with lock or contextlib.nullcontext():
+            for position, (total, norm, _, _) in rows.items():
+                self.popularity[position] = total
+                self.norms[position] = norm
+            for position, (_, _, columns, values) in rows.items():
+                keep = (columns >= 0) & (columns != position)
+                columns, values = columns[keep], values[keep]
+                scale = self.norms[position] * self.norms[columns]
+                similarity = np.divide(values, scale, out=np.zeros_like(values), where=scale > 0)
+                self._set_row(position, columns, similarity)
+                self._set_column(position, columns, similarity)
+        for array in (self.neighbours, self.similarity, self.norms, self.popularity):
+            array.flush()
+        self.meta["fingerprint"] = source
+        write_meta(self.path, self.meta)
+        return True
+
+    def _set_row(self, position, columns, similarity):
+        best, values = top_k(similarity[None, :], self.k)
+        row = np.full(self.k, -1, np.int32)
+        scores = np.zeros(self.k, np.float32)
+        row[:best.shape[1]] = columns[best[0]]
+        scores[:best.shape[1]] = values[0]
+        row[scores <= 0] = -1
+        scores[scores <= 0] = 0
+        self.neighbours[position], self.similarity[position] = row, scores
+
+    def _set_column(self, position, columns, similarity):
+        """Update ``position``'s entry in the rows of ``columns`` and of every row listing it."""
+        listing = np.flatnonzero((self.neighbours == position).any(axis=1))
+        rows = np.union1d(columns, listing)
+        if len(rows) == 0 or self.k == 0:
+            return
+        lookup = dict(zip(columns.tolist(), similarity.tolist()))
+        new = np.array([lookup.get(r, 0.0) for r in rows.tolist()], np.float32)
+        block = np.array(self.neighbours[rows])
+        scores = np.array(self.similarity[rows])
+        present = block == position
+        has = present.any(axis=1)
+        scores[present] = np.repeat(new, present.sum(axis=1))
+        enters = ~has & (new > scores[:, -1])
+        block[enters, -1] = position
+        scores[enters, -1] = new[enters]
+        block[scores <= 0] = -1
+        scores[scores <= 0] = 0
+        order = np.argsort(-scores, axis=1, kind="stable")
+        self.neighbours[rows] = np.take_along_axis(block, order, axis=1)
+        self.similarity[rows] = np.take_along_axis(scores, order, axis=1)
@@ -0,0 +1,177 @@
+"""Map-reduce execution of the Watch_History GROUP BYs (queries 1, 7, 9, 10).
+
+Those four plans are per-title sums over Watch_History finished on small
+tables (``frames.WATCH_TOTALS``). ``MapReduce`` splits the Watch_History parts
+of a ``columnar`` store into row ranges, has a pool of worker processes
+memory-map their ranges and compute ``frames.watch_totals`` for them, adds
+the partial totals up and finishes the plan in the parent. What each user
+paid (for query 10) is computed once and handed to the workers through
+shared memory. The other queries run on the parent's frames as usual.
+
+    python parallel.py --users 200000 --workers 1,2,4,8
+    python parallel.py --store big.columnar --query "QUERY 10"
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import columnar
+import datagen
+from bench import same_rows
+from catalog import queries, query_number
+from frames import COLUMNS, WATCH_TOTALS, Frames, key_positions, paid_by_user, watch_totals
+
+
+CHUNKS_PER_WORKER = 4
+
+_worker = {}
+
+
+def split_rows(parts, chunks):
+    """Cut ``[(path, rows)]`` into ``chunks`` lists of ``(path, offset, length)`` of about equal size."""
+    total = sum(rows for _, rows in parts)
+    size = max(1, -(-total // max(1, chunks)))
+    result, current, room = [], [], size
+    for path, rows in parts:
+        offset = 0
+        while offset < rows:
+            length = min(room, rows - offset)
+            current.append((path, offset, length))
+            offset += length
+            room -= length
+            if room == 0:
+                result.append(current)
+                current, room = [], size
+    if current or not result:
+        result.append(current)
+    return result
+
+
+def _start(content_keys, user_keys, paid_name):
+    _worker["content_keys"] = content_keys
+    _worker["user_keys"] = user_keys
+    _worker["memory"] = SharedMemory(paid_name)
+    _worker["paid"] = np.ndarray((2, len(user_keys)), np.float64, _worker["memory"].buf)
+
+
+def _totals(chunk, needs):
+    """``watch_totals`` of the Watch_History row ranges in ``chunk`` (runs in a worker)."""
+    progress, viewer = "progress" in needs, "viewer" in needs
+    wanted = ["content_id"] + ["progress"] * progress + ["user_id"] * viewer
+    none = np.empty(0, np.int64)
+    summed = watch_totals(len(_worker["content_keys"]), none, none if progress else None, none if viewer else None,
+                          _worker["paid"])
+    for path, offset, length in chunk:
+        rows = columnar.read(path, "Watch_History", wanted).slice(offset, length)
+        totals = watch_totals(
+            len(_worker["content_keys"]),
+            key_positions(rows.column("content_id").to_numpy(), _worker["content_keys"]),
+            progress=rows.column("progress").to_numpy() if progress else None,
+            viewer=key_positions(rows.column("user_id").to_numpy(), _worker["user_keys"]) if viewer else None,
+            paid=_worker["paid"])
+        summed = {name: summed[name] + totals[name] for name in summed}
+    return summed
+
+
+class MapReduce:
+    """Queries over a ``columnar`` store, with the Watch_History aggregates spread over ``workers`` processes."""
+
+    def __init__(self, directory, workers):
+        self.directory = directory
+        self.workers = workers
+        columns = {}
+        for number, plan_columns in COLUMNS.items():
+            for table, names in plan_columns.items():
+                if not (number in WATCH_TOTALS and table == "Watch_History"):
+                    columns.setdefault(table, set()).update(names)
+        columns.setdefault("User1", set())
+        self.frames = Frames(columnar.load(directory, columns), stored=True)
+        t = self.frames.tables
+
+        parts = []
+        for month in columnar.months(directory, "Watch_History"):
+            parts += [(path, columnar.read(path).num_rows)
+                      for path in columnar.part_paths(directory, "Watch_History", month)]
+        self.chunks = split_rows(parts, workers * CHUNKS_PER_WORKER)
+
+        spent, payments = paid_by_user(t)
+        self.memory = SharedMemory(create=True, size=max(1, 2 * len(spent) * 8))
+        paid = np.ndarray((2, len(spent)), np.float64, self.memory.buf)
+        paid[0], paid[1] = spent, payments
+        self.pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_start,
+                                        initargs=(t["Content"].index.to_numpy(), t["User1"].index.to_numpy(),
+                                                  self.memory.name))
+
+    def query(self, title, today=None):
+        number = query_number(title)
+        if number not in WATCH_TOTALS:
+            return self.frames.query(title, today)
+        needs, finish = WATCH_TOTALS[number]
+        summed = None
+        for totals in self.pool.map(_totals, self.chunks, [needs] * len(self.chunks)):
+            summed = totals if summed is None else {name: summed[name] + totals[name] for name in summed}
+        return finish(self.frames.tables, summed)
+
+    def close(self):
+        self.pool.shutdown()
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speedup of the map-reduce Watch_History queries by worker count")
+    parser.add_argument("--store", help="columnar store to read; by default one is generated")
+    parser.add_argument("--users", type=int, default=100_000, help="users to generate when no --store is given")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--query", default="", help="only run queries whose title contains this text")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.store
+        if directory is None:
+            directory = os.path.join(scratch, "store")
+            columnar.save(Frames.from_rows(datagen.generate(
+                users=args.users, contents=max(100, args.users // 5), actors=max(50, args.users // 10),
+                seed=args.seed)), directory)
+        titles = [t for t in queries if query_number(t) in WATCH_TOTALS and args.query.lower() in t.lower()]
+        expected = columnar.open_frames(directory, titles)
+        print(f"{os.cpu_count()} CPUs; p50 of {args.repeat} runs", file=sys.stderr)
+        for title in titles:
+            start = time.perf_counter()
+            expected.query(title)
+            print(f"{title[:48]:<48} in-process  {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        timings = {}
+        for workers in (int(w) for w in args.workers.split(",")):
+            with MapReduce(directory, workers) as runner:
+                runner.query(titles[0])  # start the workers
+                for title in titles:
+                    samples = []
+                    for _ in range(args.repeat):
+                        start = time.perf_counter()
+                        result = runner.query(title)
+                        samples.append(time.perf_counter() - start)
+                    timings[title, workers] = float(np.median(samples))
+                    base = timings[title, min(w for t, w in timings if t == title)]
+                    same = same_rows(expected.query(title), result)
+                    print(f"{title[:48]:<48} {workers:>2} workers  p50 {timings[title, workers] * 1000:>9.1f} ms  "
+                          f"speedup {base / timings[title, workers]:>5.2f}x{'' if same else '  RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Opt-in timing of the dashboard's hot paths on every rerun.
+
+Turn it on with ``STREAMING_PROFILE=1`` or the "Profile reruns" toggle in the
+sidebar. Each rerun then records how long its tab spent in each stage (data
+construction, query evaluation, ``st.dataframe``, ``st.image``, ``px.pie``),
+the memory allocated per stage and the highest traced total seen at a stage
+boundary, and appends one JSON line to ``profile.jsonl``. The log rolls over to
+``profile.jsonl.1`` once it passes ``MAX_LOG_BYTES``.
+
+tracemalloc is process-wide, so allocation figures include whatever other
+sessions were doing at the same time; timings are per session. Tracing runs
+while at least one session is profiling, and no session resets the shared peak.
+
+    python profiler.py [profile.jsonl ...]   # p50/p99 per tab and stage
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+LOG_PATH = "profile.jsonl"
+MAX_LOG_BYTES = 5 * 1024 * 1024
+
+_log_lock = threading.Lock()
+_trace_lock = threading.Lock()
+_tracing = 0  # profiles holding tracemalloc on
+_started = False  # whether tracemalloc was started here rather than by the caller
+
+
+def enabled_by_default():
+    return os.environ.get("STREAMING_PROFILE", "") not in ("", "0")
+
+
+def _hold_tracing():
+    global _tracing, _started
+    with _trace_lock:
+        if _tracing == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started = True
+        _tracing += 1
+
+
+def _release_tracing():
+    """Stop tracemalloc once the last profile using it is finished (or collected)."""
+    global _tracing, _started
+    with _trace_lock:
+        _tracing -= 1
+        if _tracing == 0 and _started:
+            tracemalloc.stop()
+            _started = False
+
+
+class RerunProfile:
+    """Stage timings and allocations for a single rerun of one tab."""
+
+    def __init__(self, tab, enabled, log_path=LOG_PATH):
+        self.tab = tab
+        self.enabled = enabled
+        self.log_path = log_path
+        self.stages = defaultdict(lambda: {"ms": 0.0, "calls": 0, "alloc_kb": 0.0})
+        self.record = None
+        if enabled:
+            _hold_tracing()
+            # Released by finish(), or when a rerun that stopped early drops the profile
+            self.release = weakref.finalize(self, _release_tracing)
+            self.base = self.peak = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+
+    def span(self, stage):
+        """Context manager adding the time spent inside it to ``stage``."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(stage)
+
+    @contextlib.contextmanager
+    def _span(self, stage):
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            after = tracemalloc.get_traced_memory()[0]
+            entry = self.stages[stage]
+            entry["ms"] += (time.perf_counter() - start) * 1000
+            entry["calls"] += 1
+            entry["alloc_kb"] += (after - before) / 1024
+            self.peak = max(self.peak, before, after)
+
+    def finish(self):
+        """Close the rerun, append it to the log and return the record (None when disabled)."""
+        if not self.enabled or self.record is not None:
+            return self.record
+        current = tracemalloc.get_traced_memory()[0]
+        self.release()
+        self.record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "tab": self.tab,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "stages": {name: {"ms": round(s["ms"], 3), "calls": s["calls"], "alloc_kb": round(s["alloc_kb"], 1)}
+                       for name, s in self.stages.items()},
+            "alloc_kb": round((current - self.base) / 1024, 1),
+            "peak_kb": round((max(self.peak, current) - self.base) / 1024, 1),
+        }
+        append(self.log_path, self.record)
+        return self.record
+
+
+def append(path, record, max_bytes=MAX_LOG_BYTES):
+    """Append ``record`` as a JSON line, rolling the file over when it is full."""
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _log_lock:
+        try:
+            if os.path.getsize(path) + len(line) > max_bytes:
+                os.replace(path, path + ".1")
+        except OSError:
+            pass
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read(paths):
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def summarize(records):
+    """p50/p99 in ms per tab for the whole rerun and each stage."""
+    samples = defaultdict(list)
+    for record in records:
+        samples[(record["tab"], "total")].append(record["total_ms"])
+        for stage, entry in record["stages"].items():
+            samples[(record["tab"], stage)].append(entry["ms"])
+    return {key: {"n": len(values),
+                  "p50_ms": float(np.percentile(values, 50)),
+                  "p99_ms": float(np.percentile(values, 99))}
+            for key, values in sorted(samples.items())}
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [LOG_PATH + ".1", LOG_PATH]
+    summary = summarize(read(paths))
+    if not summary:
+        print("No profiled reruns found in " + ", ".join(paths))
+        return
+    print(f"{'tab':<32} {'stage':<14} {'n':>6} {'p50 ms':>10} {'p99 ms':>10}")
+    for (tab, stage), row in summary.items():
+        print(f"{tab:<32} {stage:<14} {row['n']:>6} {row['p50_ms']:>10.2f} {row['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Shared, versioned cache of query results.
+
+Entries are keyed on the normalized SQL text and its parameters, and remember
+the version of every table the query reads. SQL that reads the clock (SYSDATE,
+``DATE('now')``) is also keyed on the current UTC date, which is what SQLite's
+'now' is, so its result is not served on a later day. A write to a table (see
+``Engine.touch``) drops only the entries that read it; everything else keeps
+being served. Memory is bounded by an entry count and a byte budget, with
+least-recently-used eviction.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from engine import referenced_tables
+
+
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+CLOCK = re.compile(r"\bSYSDATE\b|'now'|\bCURRENT_(?:DATE|TIME|TIMESTAMP)\b", re.IGNORECASE)
+
+
+def normalize(sql):
+    """Collapse whitespace and a trailing semicolon outside string literals."""
+    parts = STRING_LITERAL.split(sql.strip().rstrip(";"))
+    return "".join(p if i % 2 else re.sub(r"\s+", " ", p) for i, p in enumerate(parts)).strip()
+
+
+def cache_key(sql, params=()):
+    """Key of a result: normalized SQL and parameters, plus today's date if the SQL reads the clock."""
+    key = (normalize(sql), tuple(params))
+    if CLOCK.search(sql):
+        key += (datetime.now(timezone.utc).date().isoformat(),)
+    return key
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class QueryCache:
+    """LRU cache of DataFrame results in front of an ``Engine``.
+
+    Results are shared between sessions and must be treated as read-only.
+    """
+
+    def __init__(self, engine, max_entries=128, max_bytes=64 * 1024 * 1024):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (tables, versions, frame, size)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.lock = threading.Lock()
+        engine.listeners.append(self.invalidate)
+
+    def query(self, sql, params=()):
+        key = cache_key(sql, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                tables, versions, frame, _ = entry
+                if versions == self.engine.version(tables):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return frame
+                self._drop(key)
+            self.misses += 1
+
+        tables = referenced_tables(sql)
+        versions = self.engine.version(tables)
+        frame = self.engine.query(sql, params)
+        size = frame_bytes(frame)
+        if size > self.max_bytes:
+            return frame
+
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (tables, versions, frame, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+        return frame
+
+    def invalidate(self, tables):
+        """Drop every cached result that reads one of ``tables``."""
+        tables = {t.lower() for t in tables}
+        with self.lock:
+            stale = [k for k, entry in self.entries.items() if tables.intersection(entry[0])]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _drop(self, key):
+        self.bytes -= self.entries.pop(key)[3]
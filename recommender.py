@@ -0,0 +1,151 @@
+"""Item-item recommendations and cast lookups for the user dashboard.
+
+Recommendations come from the persisted top-K neighbour index in
+``neighbour_index``: a user's ratings and watches are read by user_id and
+scored against the neighbours of each title, top-k by argpartition. When that
+gives fewer than ``k`` titles (new users, or catalogues too sparse for titles
+to share viewers), the rest are filled with the most watched titles, those in
+the user's genres first. The same index answers "lead actor of a title" and
+"more titles from an actor".
+
+The index is opened (or built) once at startup. Writes to Review and
+Watch_History are patched into it on a background thread; writes to Content
+or the cast trigger a background rebuild. Pages keep reading the current
+index in the meantime.
+"""
+
+import threading
+import time
+import traceback
+
+import numpy as np
+
+import neighbour_index
+from neighbour_index import NEIGHBOURS, NeighbourIndex
+
+
+PATCHED = {"review", "watch_history"}
+REBUILT = {"content", "content_actor"}
+DEBOUNCE_S = 0.5
+
+
+class Recommender:
+    """Serves lookups from a ``NeighbourIndex`` and keeps it current in the background."""
+
+    def __init__(self, engine, path, k=NEIGHBOURS):
+        self.engine = engine
+        self.path = path
+        self.k = k
+        neighbour_index.install(engine)
+        self.index = NeighbourIndex.open(engine, path, k)
+        self.builds = self.patches = 0
+        self.rebuild = False
+        self.stale = threading.Event()
+        self.lock = threading.Lock()
+        self.worker_lock = threading.Lock()
+        self.worker = None
+        engine.listeners.append(self.invalidate)
+
+    def recommend(self, user_id, k=3):
+        """Top ``k`` unseen titles for ``user_id`` with their scores and the title they mostly follow from."""
+        _, rows = self.engine.execute(neighbour_index.USER_ITEMS, (user_id, user_id))
+        with self.lock:
+            index = self.index
+            seen = index.positions([r[0] for r in rows])
+            weights = np.array([r[1] for r in rows], np.float32)
+            seen, weights = seen[seen >= 0], weights[seen >= 0]
+
+            neighbours = np.asarray(index.neighbours[seen])
+            contribution = np.asarray(index.similarity[seen]) * weights[:, None]
+            valid = neighbours >= 0
+            scores = np.bincount(neighbours[valid], contribution[valid], minlength=len(index.content_ids))
+            scores[seen] = 0
+            picks = np.flatnonzero(scores > 0)
+            if len(picks) > k:
+                picks = picks[np.argpartition(-scores[picks], k - 1)[:k]]
+            picks = picks[np.argsort(-scores[picks], kind="stable")]
+            if len(picks) < k:
+                popularity = np.array(index.popularity, np.float64)
+                popularity[seen] = popularity[picks] = -1
+                in_genre = np.isin(index.genres, index.genres[seen])
+                ranked = np.lexsort((-popularity, ~in_genre))
+                picks = np.concatenate([picks, ranked[popularity[ranked] >= 0][:k - len(picks)]])
+
+            ids = [int(i) for i in index.content_ids[picks]]
+            because = int(index.content_ids[seen[np.argmax(weights)]]) if len(seen) else None
+        titles = self.titles(ids + [because])
+        return {
+            "content_ids": ids,
+            "titles": [titles.get(i, f"Content {i}") for i in ids],
+            "scores": [float(scores[i]) for i in picks],
+            "because": titles.get(because),
+        }
+
+    def lead_actor(self, content_id):
+        """``{"actor_id", "actor_name"}`` of the first-billed actor of a title, or None."""
+        with self.lock:
+            [position] = self.index.positions([content_id])
+            cast = self.index.cast(position) if position >= 0 else []
+        if not cast:
+            return None
+        _, rows = self.engine.execute("SELECT actor_id, actor_name FROM Actor WHERE actor_id = ?", (cast[0],))
+        return dict(zip(("actor_id", "actor_name"), rows[0])) if rows else None
+
+    def more_from(self, actor_id, exclude=None, k=3):
+        """Titles of the ``k`` most watched other titles ``actor_id`` appears in."""
+        with self.lock:
+            index = self.index
+            titles = index.filmography(actor_id)
+            titles = titles[index.content_ids[titles] != exclude]
+            best = titles[np.argsort(-np.asarray(index.popularity[titles]), kind="stable")[:k]]
+            ids = [int(i) for i in index.content_ids[best]]
+        names = self.titles(ids)
+        return [names.get(i, f"Content {i}") for i in ids]
+
+    def titles(self, content_ids):
+        """content_id -> title for the given ids (None entries are ignored)."""
+        content_ids = [i for i in content_ids if i is not None]
+        if not content_ids:
+            return {}
+        marks = ", ".join("?" * len(content_ids))
+        _, rows = self.engine.execute(f"SELECT content_id, title FROM Content WHERE content_id IN ({marks})",
+                                      tuple(content_ids))
+        return dict(rows)
+
+    def invalidate(self, tables):
+        tables = {t.lower() for t in tables}
+        if not tables & (PATCHED | REBUILT):
+            return
+        if tables & REBUILT:
+            self.rebuild = True
+        self.stale.set()
+        with self.worker_lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._update_loop, name="recommender", daemon=True)
+                self.worker.start()
+
+    def _update_loop(self):
+        while True:
+            self.stale.wait()
+            time.sleep(DEBOUNCE_S)  # let a burst of writes settle into one update
+            self.stale.clear()
+            try:
+                self._update()
+            except Exception:
+                traceback.print_exc()  # keep serving the current index
+
+    def _update(self):
+        if not self.rebuild:
+            changed = neighbour_index.drain(self.engine)
+            if not changed:
+                return
+            if self.index.patch(self.engine, changed, self.lock):
+                self.patches += 1
+                return
+        self.rebuild = False
+        source = neighbour_index.fingerprint(self.engine)
+        neighbour_index.save(self.path, neighbour_index.build(self.engine, self.k), self.k, source)
+        index = NeighbourIndex(self.path)
+        with self.lock:
+            self.index = index
+        self.builds += 1
@@ -0,0 +1,291 @@
+"""Server-side paging of query results for the SQL tab.
+
+A result is run once into a temporary table in the engine, whose rowids keep
+the query's row order; later reruns only read one page of it. Pages are
+keyset-paginated on ``(sort column, rowid)``, so reading page k is an index
+seek rather than an OFFSET skip, and the sort and filter are applied by
+SQLite before anything is turned into a DataFrame. An index on a sort column
+is created the first time that column is sorted on.
+
+The SQL tab's summary and chart are computed from the same table: one
+aggregate pass for counts, means and extremes, a walk of the column's index up
+to each quartile's rank, and index seeks for the rows holding each extreme and
+the largest bars. They are kept with the result, so the query runs once and no
+full DataFrame is built.
+
+Results are keyed like ``QueryCache`` entries and rebuilt when a table they
+read has been written since. They are bounded like them too: by a result
+count and a budget of rows across all results, with least-recently-used
+eviction, and ``stats`` reports hits, misses and what is held.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import charts
+from engine import referenced_tables, translate
+from query_cache import cache_key
+from summary import QUANTILES
+
+
+# "> 4", "<= 10.5", ">= 2025-01-01": a comparison; anything else is a substring match
+COMPARISON = re.compile(r"^\s*(>=|<=|>|<|=)\s*(.+?)\s*$")
+NUMBER = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+
+def quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def filter_clause(column, text):
+    """SQL predicate and parameters for filtering ``column`` by the user's ``text``.
+
+    Numbers are compared with numeric values and anything else with text, as
+    SQLite would otherwise order every number before every string.
+    """
+    match = COMPARISON.match(text)
+    if match:
+        operator, value = match.groups()
+        if NUMBER.match(value):
+            return f"typeof({quote(column)}) IN ('integer', 'real') AND {quote(column)} {operator} ?", [float(value)]
+        return f"typeof({quote(column)}) = 'text' AND {quote(column)} {operator} ?", [value]
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"CAST({quote(column)} AS TEXT) LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+
+
+def after_clause(column, descending, cursor):
+    """Rows following ``cursor`` (the sort value and rowid of the last row shown).
+
+    SQLite sorts NULLs first, so they lead an ascending page order and trail a
+    descending one.
+    """
+    if column is None:
+        return "rowid > ?", [cursor[1]]
+    value, rowid = cursor
+    name = quote(column)
+    if value is None:
+        if descending:
+            return f"{name} IS NULL AND rowid < ?", [rowid]
+        return f"(({name} IS NULL AND rowid > ?) OR {name} IS NOT NULL)", [rowid]
+    if descending:
+        return f"(({name}, rowid) < (?, ?) OR {name} IS NULL)", [value, rowid]
+    return f"({name}, rowid) > (?, ?)", [value, rowid]
+
+
+class ResultGrid:
+    """Pages of query results held in temporary tables of an ``Engine``.
+
+    Shared between sessions; each session keeps its own cursors.
+    """
+
+    def __init__(self, engine, page_size=50, max_results=8, max_rows=1_000_000):
+        self.engine = engine
+        self.page_size = page_size
+        self.max_results = max_results
+        self.max_rows = max_rows
+        # key -> {"table", "versions", "columns", "rows", "indexed", "counts", "derived"}
+        self.results = OrderedDict()
+        self.rows = 0
+        self.serial = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.lock = threading.RLock()
+
+    def columns(self, sql, params=()):
+        """The result's column names; this is the call ``stats`` counts as a lookup.
+
+        A held result is a hit. Every run of the query, whichever method
+        triggers it, is a miss.
+        """
+        with self.lock:
+            return self._result(sql, params, lookup=True)["columns"]
+
+    def count(self, sql, params=(), where=None):
+        """Rows in the result, or in the part of it matching ``where`` (a ``(column, text)`` filter)."""
+        with self.lock:
+            result = self._result(sql, params)
+            if where not in result["counts"]:
+                clause, values = filter_clause(*where) if where else ("1", [])
+                _, rows = self.engine.execute(f"SELECT COUNT(*) FROM temp.{result['table']} WHERE {clause}", values)
+                result["counts"][where] = rows[0][0]
+            return result["counts"][where]
+
+    def page(self, sql, params=(), sort=None, descending=False, where=None, after=None, limit=None):
+        """One page of the result as ``(DataFrame, cursor)``.
+
+        ``sort`` is a result column, ``where`` a ``(column, text)`` filter and
+        ``after`` the cursor returned with the previous page. The returned
+        cursor is None on the last page.
+        """
+        limit = limit or self.page_size
+        clauses = ([filter_clause(*where)] if where else []) + \
+            ([after_clause(sort, descending, after)] if after is not None else [])
+        values = [value for _, more in clauses for value in more]
+        direction = " DESC" if descending else ""
+        order = f"{quote(sort)}{direction}, rowid{direction}" if sort is not None else "rowid"
+        # Held until the page is read, so another session cannot evict or rebuild the table meanwhile
+        with self.lock:
+            result = self._result(sql, params)
+            table = result["table"]
+            if sort is not None:
+                self._index(result, sort)
+            columns = ", ".join(quote(c) for c in result["columns"])
+            _, rows = self.engine.execute(
+                f"SELECT rowid, {columns} FROM temp.{table} WHERE {' AND '.join(c for c, _ in clauses) or '1'} "
+                f"ORDER BY {order} LIMIT ?", values + [limit + 1])
+
+        cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            cursor = (last[1 + result["columns"].index(sort)] if sort is not None else None, last[0])
+        frame = pd.DataFrame.from_records([row[1:] for row in rows], columns=result["columns"])
+        return frame, cursor
+
+    def summary(self, sql, params=()):
+        """``summary.summarize`` of the result, computed by SQLite on its table."""
+        with self.lock:
+            result = self._result(sql, params)
+            if "summary" not in result["derived"]:
+                result["derived"]["summary"] = self._summary(result)
+            return result["derived"]["summary"]
+
+    def chart(self, sql, params, label, value, how="sum"):
+        """``charts.reduce`` of the result's ``value`` column (a numeric one) by ``label``."""
+        with self.lock:
+            result = self._result(sql, params)
+            key = ("chart", label, value, how)
+            if key not in result["derived"]:
+                stats = self.summary(sql, params).loc[value]
+                result["derived"][key] = self._chart(result, label, value, how, stats)
+            return result["derived"][key]
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.results):
+                self._drop(key)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.results),
+                "rows": self.rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _result(self, sql, params, lookup=False):
+        key = cache_key(sql, params)
+        tables = referenced_tables(sql)
+        with self.lock:
+            result = self.results.get(key)
+            if result is not None and result["versions"] == self.engine.version(tables):
+                self.results.move_to_end(key)
+                self.hits += lookup
+                return result
+            if result is not None:
+                self._drop(key)
+                self.invalidations += 1
+            self.misses += 1
+
+            self.serial += 1
+            table = f"result_{self.serial}"
+            versions = self.engine.version(tables)
+            with self.engine.lock, self.engine.conn:
+                # CREATE TABLE AS inserts in the query's own order, so rowid is its row number
+                self.engine.conn.execute(f"CREATE TEMP TABLE {table} AS {translate(sql)}", params)
+                cursor = self.engine.conn.execute(f"SELECT * FROM temp.{table} LIMIT 0")
+                columns = [d[0] for d in cursor.description]
+                # The last rowid is the row count, read off the end of the table's B-tree
+                rows = self.engine.conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM temp.{table}").fetchone()[0]
+            result = {"table": table, "versions": versions, "columns": columns, "rows": rows, "indexed": [],
+                      "counts": {None: rows}, "derived": {}}
+            self.results[key] = result
+            self.rows += rows
+            # A result over the row budget on its own is still kept, alone, so it can be paged
+            while len(self.results) > self.max_results or (self.rows > self.max_rows and len(self.results) > 1):
+                self._drop(next(iter(self.results)))
+                self.evictions += 1
+            return result
+
+    def _index(self, result, column):
+        if column not in result["indexed"]:
+            table = result["table"]
+            with self.engine.lock, self.engine.conn:
+                self.engine.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS temp.{table}_{len(result['indexed'])} ON {table} ({quote(column)})")
+            result["indexed"].append(column)
+
+    def _summary(self, result):
+        table, columns = f"temp.{result['table']}", result["columns"]
+        _, rows = self.engine.execute("SELECT " + ", ".join(
+            f"COUNT({c}), SUM(typeof({c}) = 'integer'), SUM(typeof({c}) = 'real'), AVG({c}), MIN({c}), MAX({c})"
+            for c in map(quote, columns)) + f" FROM {table}")
+        label = quote(columns[0])
+        stats = {}
+        for i, column in enumerate(columns):
+            count, integers, reals, mean, lowest, highest = rows[0][6 * i:6 * i + 6]
+            # Numeric the way pandas types a column: every value a number, and at least one
+            if not count or integers + reals != count:
+                continue
+            if reals:
+                lowest, highest = float(lowest), float(highest)
+            self._index(result, column)
+            name = quote(column)
+            at = [self.engine.execute(f"SELECT {label} FROM {table} WHERE {name} = ? ORDER BY rowid LIMIT 1",
+                                      (extreme,))[1][0][0] for extreme in (lowest, highest)]
+            quantiles = []
+            for q in QUANTILES:
+                # Linear interpolation between the closest ranks, as numpy's quantile. SQLite reaches
+                # an OFFSET by stepping through the index entries before it, so each quantile is a
+                # linear walk of the column's index (no sort, no table rows), not a seek
+                position = q * (count - 1)
+                below = int(position)
+                _, values = self.engine.execute(
+                    f"SELECT {name} FROM {table} WHERE {name} IS NOT NULL ORDER BY {name} LIMIT 2 OFFSET ?", (below,))
+                low, high = values[0][0], values[-1][0]
+                quantiles.append(low + (high - low) * (position - below))
+            stats[column] = (count, mean, lowest, *quantiles, highest, *at)
+        names = ["count", "mean", "min", *(f"p{q * 100:.0f}" for q in QUANTILES), "max", "min_at", "max_at"]
+        return pd.DataFrame({name: [row[k] for row in stats.values()] for k, name in enumerate(names)},
+                            index=pd.Index(list(stats), dtype=object))
+
+    def _chart(self, result, label, value, how, stats):
+        table, x, y = f"temp.{result['table']}", quote(label), quote(value)
+        _, ((rows, labels, dates, total),) = self.engine.execute(
+            f"SELECT COUNT(*), COUNT({x}), "
+            f"SUM(typeof({x}) = 'text' AND {x} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'), TOTAL({y}) "
+            f"FROM {table}")
+        extent = {"rows": rows, "min": stats["min"], "max": stats["max"]}
+        if rows <= charts.MAX_BARS or (labels and labels == dates):
+            # Few enough rows to chart whole, or a time series, which LTTB needs all of
+            _, pairs = self.engine.execute(f"SELECT {x}, {y} FROM {table} ORDER BY rowid")
+            data, kind, _ = charts.reduce(pd.DataFrame.from_records(pairs, columns=[label, value]), label, value, how)
+            return data, kind, extent
+
+        self._index(result, value)
+        _, top = self.engine.execute(
+            f"SELECT {x}, {y} FROM {table} WHERE {y} IS NOT NULL ORDER BY {y} DESC, rowid LIMIT ?",
+            (charts.MAX_BARS - 1,))
+        # The "Other" bar from the column total, as in charts.top_n (NULLs count as rows but not values)
+        rest = total - sum(v for _, v in top)
+        if how == "mean":
+            count = int(stats["count"])
+            rest = rest / (count - len(top)) if count > len(top) else float("nan")
+        data = pd.Series([v for _, v in top] + [rest],
+                         index=pd.Index([str(l) for l, _ in top] + [f"Other ({rows - len(top):,})"], name=label),
+                         name=value)
+        return data, "bar", extent
+
+    def _drop(self, key):
+        result = self.results.pop(key)
+        self.rows -= result["rows"]
+        table = result["table"]
+        with self.engine.lock, self.engine.conn:
+            self.engine.conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
@@ -0,0 +1,329 @@
+"""Mergeable sketches behind the approximate mode of the SQL dashboard.
+
+HyperLogLog replaces the exact distinct counts of Query 5 (paying users) and
+Query 11 (titles per content type), and a t-digest summarizes watch progress
+for percentiles. Sums and plain counts stay exact. Sketches of disjoint
+partitions merge into the sketch of their union: ``Sketches.from_store``
+builds one per month partition of a ``columnar`` store and merges them, and
+``Sketches(engine)`` folds rows appended since the last ``refresh`` into the
+sketches it holds, rebuilding only after an UPDATE or DELETE (recorded by
+triggers) on a source table.
+
+Approximate columns come with a ``<column>_error`` column: the half-width of
+an interval of about two standard errors (HyperLogLog) or of the rank error
+of the nearest centroid (t-digest).
+
+    python sketches.py --users 200000
+"""
+
+import argparse
+import math
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import datagen
+from catalog import query_number
+from frames import Frames, key_positions, scale
+
+
+HLL_PRECISION = 14  # 16384 registers, 0.8% standard error
+TDIGEST_COMPRESSION = 100
+PERCENTILES = (0.5, 0.9)
+
+SOURCES = ("payment", "subscription", "user1", "review", "content", "watch_history")
+EVENTS = "CREATE TABLE IF NOT EXISTS sketch_events (table_name TEXT PRIMARY KEY)"
+
+PAYMENTS = """
+SELECT s.user_id, pay.amount
+FROM Payment pay
+JOIN Subscription s ON s.subscription_id = pay.subscription_id
+JOIN User1 u ON u.user_id = s.user_id
+WHERE pay.rowid > ? AND pay.rowid <= ?"""
+
+REVIEWS = """
+SELECT c.type, r.content_id, r.rating
+FROM Review r
+JOIN Content c ON c.content_id = r.content_id
+WHERE r.rowid > ? AND r.rowid <= ?"""
+
+WATCHES = "SELECT progress FROM Watch_History WHERE progress IS NOT NULL AND rowid > ? AND rowid <= ?"
+
+FACTS = {"Payment": PAYMENTS, "Review": REVIEWS, "Watch_History": WATCHES}
+
+
+def hash64(values):
+    """splitmix64 of integer keys."""
+    x = np.asarray(values).astype(np.int64).view(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class HyperLogLog:
+    """Distinct-count sketch over integer keys; relative standard error 1.04 / sqrt(2 ** p)."""
+
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, np.uint8)
+
+    def add(self, keys):
+        keys = np.asarray(keys, dtype=float)
+        h = hash64(keys[~np.isnan(keys)])
+        index = (h >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = (h << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))  # caps the rank at 65 - p
+        high, low = (rest >> np.uint64(32)).astype(float), (rest & np.uint64(0xFFFFFFFF)).astype(float)
+        bits = np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])  # highest set bit, 1-based
+        np.maximum.at(self.registers, index, (65 - bits).astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.ldexp(1.0, -self.registers.astype(int)).sum()
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return float(estimate)
+
+    def error(self):
+        """Half-width of a ~95% interval around ``count()``."""
+        return 2 * 1.04 / math.sqrt(len(self.registers)) * self.count()
+
+
+class TDigest:
+    """Quantile sketch: weighted centroids, finer towards both tails."""
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+            self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if len(other.weights):
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        # each centroid spans at most one unit of the arcsine scale function
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        _, cluster = np.unique(np.floor(k + self.compression / 4), return_inverse=True)
+        self.weights = np.bincount(cluster, weights)
+        self.means = np.bincount(cluster, means * weights) / self.weights
+
+    def quantile(self, q):
+        if not len(self.weights):
+            return math.nan
+        total = self.weights.sum()
+        centres = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * total, np.r_[0, centres, total], np.r_[self.min, self.means, self.max]))
+
+    def error(self, q):
+        """Half the spread of the quantiles within the rank error of the centroid nearest ``q``."""
+        if not len(self.weights):
+            return math.nan
+        total = self.weights.sum()
+        nearest = np.argmin(np.abs(np.cumsum(self.weights) - self.weights / 2 - q * total))
+        half = self.weights[nearest] / total / 2
+        return (self.quantile(min(1.0, q + half)) - self.quantile(max(0.0, q - half))) / 2
+
+
+def trigger_statements():
+    for table in SOURCES:
+        for event in ("UPDATE", "DELETE"):
+            name = f"sketches_{table}_{event.lower()}"
+            yield f"DROP TRIGGER IF EXISTS {name}"
+            yield (f"CREATE TRIGGER {name} AFTER {event} ON {table}\nBEGIN\n"
+                   f"    INSERT OR IGNORE INTO sketch_events VALUES ('{table}');\nEND")
+
+
+def install(engine):
+    with engine.lock, engine.conn:
+        engine.conn.execute(EVENTS)
+        for statement in trigger_statements():
+            engine.conn.execute(statement)
+
+
+def drain(engine):
+    """Source tables updated or deleted from since the last call."""
+    with engine.lock, engine.conn:
+        tables = [r[0] for r in engine.conn.execute("SELECT table_name FROM sketch_events")]
+        engine.conn.execute("DELETE FROM sketch_events")
+    return tables
+
+
+class Sketches:
+    """Approximate Query 5, Query 11 and watch-progress percentiles, kept current from ``engine`` if given."""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.versions = None
+        self.reset()
+        if engine is not None:
+            install(engine)
+            drain(engine)
+
+    def reset(self):
+        self.payers = HyperLogLog()
+        self.revenue = 0.0
+        self.types = {}  # content type -> [titles HyperLogLog, rating sum, ratings, reviews]
+        self.progress = TDigest()
+        self.seen = dict.fromkeys(FACTS, 0)  # last rowid folded in per fact table
+
+    def merge(self, other):
+        self.payers.merge(other.payers)
+        self.revenue += other.revenue
+        for kind, (titles, rating_sum, ratings, reviews) in other.types.items():
+            mine = self.types.setdefault(kind, [HyperLogLog(), 0.0, 0, 0])
+            mine[0].merge(titles)
+            mine[1:] = [mine[1] + rating_sum, mine[2] + ratings, mine[3] + reviews]
+        self.progress.merge(other.progress)
+        return self
+
+    def add_payments(self, users, amounts):
+        self.payers.add(users)
+        self.revenue += float(np.nansum(np.asarray(amounts, dtype=float)))
+
+    def add_reviews(self, kinds, content, ratings):
+        kinds = pd.Series(kinds, dtype=object)
+        content, ratings = np.asarray(content, dtype=float), np.asarray(ratings, dtype=float)
+        for kind, rows in kinds.groupby(kinds.fillna("\0"), sort=False).groups.items():
+            rows = np.asarray(rows)
+            entry = self.types.setdefault(None if kind == "\0" else kind, [HyperLogLog(), 0.0, 0, 0])
+            entry[0].add(content[rows])
+            rated = ratings[rows][~np.isnan(ratings[rows])]
+            entry[1:] = [entry[1] + float(rated.sum()), entry[2] + len(rated), entry[3] + len(rows)]
+
+    def refresh(self):
+        """Fold in rows appended to the engine since the last call; rebuild after updates or deletes."""
+        if self.engine is None:
+            return self
+        versions = self.engine.version(SOURCES)
+        with self.lock:
+            if versions == self.versions:
+                return self
+            if drain(self.engine):
+                self.reset()
+            for table, sql in FACTS.items():
+                _, [(last,)] = self.engine.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}")
+                _, rows = self.engine.execute(sql, (self.seen[table], last))
+                if rows:
+                    columns = list(zip(*rows))
+                    if table == "Payment":
+                        self.add_payments(*columns)
+                    elif table == "Review":
+                        self.add_reviews(*columns)
+                    else:
+                        self.progress.add(columns[0])
+                self.seen[table] = last
+            self.versions = versions
+        return self
+
+    @classmethod
+    def from_store(cls, directory):
+        """Sketches of a ``columnar`` store, built per month partition and merged."""
+        tables = columnar.load(directory, {"Subscription": ["user_id"], "User1": [], "Content": ["type"],
+                                           "Review": ["content_id", "rating"]})
+        subscriptions, users = tables["Subscription"], tables["User1"].index.to_numpy()
+        payer = subscriptions["user_id"].cat.codes.to_numpy()
+        sketches = cls()
+        for month in columnar.months(directory, "Payment"):
+            for path in columnar.part_paths(directory, "Payment", month):
+                part = columnar.read(path, "Payment", ["subscription_id", "amount"]).to_pandas()
+                at = key_positions(part["subscription_id"].to_numpy(dtype=float), subscriptions.index.to_numpy())
+                user = np.where(at >= 0, payer[at], -1)
+                partial = cls()
+                partial.add_payments(users[user[user >= 0]],
+                                     part["amount"].to_numpy(dtype=float)[user >= 0] / scale("Payment", "amount"))
+                sketches.merge(partial)
+        for month in columnar.months(directory, "Watch_History"):
+            for path in columnar.part_paths(directory, "Watch_History", month):
+                partial = cls()
+                partial.progress.add(columnar.read(path, "Watch_History", ["progress"]).column("progress").to_numpy())
+                sketches.merge(partial)
+        reviews, content = tables["Review"], tables["Content"]
+        title = reviews["content_id"].cat.codes.to_numpy()
+        found = title >= 0
+        sketches.add_reviews(np.asarray(content["type"].array.take(title[found]), dtype=object),
+                             content.index.to_numpy()[title[found]], reviews["rating"].to_numpy(dtype=float)[found])
+        return sketches
+
+    def query(self, title):
+        """Approximate result of Query 5 or 11, with ``<column>_error`` columns; None for other queries."""
+        number = query_number(title)
+        if number == 5:
+            users = self.payers.count()
+            if users < 0.5:
+                return pd.DataFrame({"avg_revenue_per_user": [None], "avg_revenue_per_user_error": [None]})
+            relative = self.payers.error() / users
+            arpu = self.revenue / users
+            return pd.DataFrame({"avg_revenue_per_user": [arpu],
+                                 "avg_revenue_per_user_error": [arpu * relative / max(1e-9, 1 - relative ** 2)]})
+        if number == 11:
+            rows = [{"content_type": kind,
+                     "avg_rating": rating_sum / ratings if ratings else None,
+                     "total_titles": round(titles.count()),
+                     "total_titles_error": round(titles.error(), 1),
+                     "total_reviews": reviews}
+                    for kind, (titles, rating_sum, ratings, reviews) in self.types.items() if reviews]
+            result = pd.DataFrame(rows, columns=["content_type", "avg_rating", "total_titles", "total_titles_error",
+                                                 "total_reviews"])
+            return result.sort_values("avg_rating", ascending=False, kind="stable", ignore_index=True)
+        return None
+
+    def percentiles(self, quantiles=PERCENTILES):
+        """``{q: (estimate, error)}`` of watch progress."""
+        return {q: (self.progress.quantile(q), self.progress.error(q)) for q in quantiles}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sketch estimates with exact answers on generated data")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frames = Frames.from_rows(datagen.generate(users=args.users, contents=max(100, args.users // 5),
+                                               actors=max(50, args.users // 10), seed=args.seed))
+    with tempfile.TemporaryDirectory() as directory:
+        columnar.save(frames, directory)
+        start = time.perf_counter()
+        sketches = Sketches.from_store(directory)
+        print(f"Sketched {args.users:,} users' data in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+    exact = frames.query("QUERY 5")["avg_revenue_per_user"][0]
+    estimate = sketches.query("QUERY 5").iloc[0]
+    print(f"ARPU exact {exact:,.2f}  approx {estimate.iloc[0]:,.2f} ± {estimate.iloc[1]:,.2f}")
+    exact = frames.query("QUERY 11").set_index("content_type")
+    for row in sketches.query("QUERY 11").itertuples(index=False):
+        print(f"{row.content_type}: titles exact {exact.loc[row.content_type, 'total_titles']:,}  "
+              f"approx {row.total_titles:,} ± {row.total_titles_error:,.0f}")
+    progress = frames.tables["Watch_History"]["progress"].dropna().to_numpy()
+    for q, (value, error) in sketches.percentiles().items():
+        print(f"progress p{q * 100:.0f}: exact {np.percentile(progress, q * 100):.2f}  "
+              f"approx {value:.2f} ± {error:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Subscription expiry windows, answered from an index on end_date.
+
+``Subscription (end_date, user_id)`` is a B-tree that SQLite keeps current on
+every insert and renewal, so "expires between X and Y" is a range seek,
+O(log n + k), whose rows already come out in end_date order. Query 6 (the
+next two months from SYSDATE) uses the same index. The SQL tab runs
+``EXPIRING`` through its result grid, which caches and pages the rows.
+"""
+
+from datetime import datetime, timezone
+
+from engine import add_months
+
+
+INDEX = "CREATE INDEX IF NOT EXISTS idx_subscription_end ON Subscription (end_date, user_id)"
+
+EXPIRING = """
+SELECT u.user_id, u.name, s.end_date
+FROM Subscription s
+JOIN User1 u ON u.user_id = s.user_id
+WHERE s.end_date BETWEEN ? AND ?
+ORDER BY s.end_date"""
+
+RENEW = """
+UPDATE Subscription
+SET end_date = ADD_MONTHS(end_date, (SELECT p.duration FROM Plan p WHERE p.plan_id = Subscription.plan_id))
+WHERE subscription_id = ?"""
+
+
+def install(engine):
+    with engine.lock, engine.conn:
+        engine.conn.execute(INDEX)
+
+
+def default_window(today=None):
+    """Query 6's window: SYSDATE to ADD_MONTHS(SYSDATE, 2), as ISO dates.
+
+    SYSDATE is SQLite's DATE('now'), a UTC date, so today is taken in UTC too.
+    """
+    today = (today or datetime.now(timezone.utc).date()).isoformat()
+    return today, add_months(today, 2)
+
+
+def renew(engine, subscription_id):
+    """Extend a subscription by its plan's duration in months; returns the rows changed."""
+    return engine.write(RENEW, (subscription_id,))
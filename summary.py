@@ -0,0 +1,52 @@
+"""Per-column summary of a query result, for the SQL tab's metrics.
+
+``summarize`` describes every numeric column of a result at once: the numeric
+columns are stacked into one float matrix and each statistic is a single
+column-wise numpy reduction, instead of a max, a filter and a lookup per
+column and per metric. The row label (the result's first column) at the
+highest and lowest value is found by position. ``ResultGrid.summary``
+computes the same table in SQLite for results the grid already holds.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def summarize(frame):
+    """One row per numeric column of ``frame``.
+
+    Columns: count, mean, min, p25, p50, p75, max, and ``min_at``/``max_at``,
+    the first column's value on the first row holding the min/max (None for a
+    column with no values).
+    """
+    numeric = frame.select_dtypes(include="number").columns.tolist()
+    columns = ["count", "mean", "min", *(f"p{q * 100:.0f}" for q in QUANTILES), "max", "min_at", "max_at"]
+    if not numeric or frame.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index(numeric, dtype=object))
+
+    values = frame[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values)
+    count = present.sum(axis=0)
+    empty = count == 0
+    # argmax/argmin over +-inf stand-ins for NaN, so empty columns do not raise
+    highest = np.where(present, values, -np.inf).argmax(axis=0)
+    lowest = np.where(present, values, np.inf).argmin(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(present, values, 0).sum(axis=0) / count
+    quantiles = np.full((len(QUANTILES), len(numeric)), np.nan)
+    if not empty.all():
+        quantiles[:, ~empty] = np.nanquantile(values[:, ~empty], QUANTILES, axis=0)
+
+    labels = frame.iloc[:, 0].to_numpy()
+    return pd.DataFrame({
+        "count": count,
+        "mean": mean,
+        "min": [None if e else frame[c].iloc[i] for c, i, e in zip(numeric, lowest, empty)],
+        **{f"p{q * 100:.0f}": quantiles[k] for k, q in enumerate(QUANTILES)},
+        "max": [None if e else frame[c].iloc[i] for c, i, e in zip(numeric, highest, empty)],
+        "min_at": [None if e else labels[i] for i, e in zip(lowest, empty)],
+        "max_at": [None if e else labels[i] for i, e in zip(highest, empty)],
+    }, index=pd.Index(numeric, dtype=object))
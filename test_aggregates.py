@@ -0,0 +1,30 @@
+"""The trigger-maintained rollups answer their catalog queries like the SQL does.
+
+    python -m pytest test_aggregates.py
+"""
+
+import aggregates
+from catalog import queries, query_number, sql_scripts
+from engine import Engine
+
+
+def query(number):
+    return next(sql for title, sql in queries.items() if query_number(title) == number)
+
+
+def rows(engine, sql):
+    return sorted(engine.execute(sql)[1])
+
+
+def test_cast_link_for_unwatched_title_matches_query_9():
+    engine = Engine.from_scripts(sql_scripts)
+    aggregates.install(engine)
+    engine.write("INSERT INTO Actor (actor_id, actor_name, dob) VALUES (9001, 'New Face', '1990-01-01')")
+    engine.write("INSERT INTO Content (content_id, title, genre_id, release_date, type) "
+                 "VALUES (9001, 'Unreleased', 11, '2030-01-01', 'movie')")
+    engine.write("INSERT INTO Content_Actor (content_id, actor_id) VALUES (9001, 9001)")
+    engine.write("INSERT INTO Content_Actor (content_id, actor_id) VALUES (9001, 301)")
+
+    assert rows(engine, aggregates.MATERIALIZED[9]) == rows(engine, query(9))
+    _, found = engine.execute("SELECT views FROM agg_actor_watch WHERE actor_name = 'New Face'")
+    assert found == []
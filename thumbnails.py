@@ -0,0 +1,115 @@
+"""Resized image variants for the dashboard.
+
+Every ``st.image`` call used to ship the full-size JPEG, even for a 150 px
+headshot. ``thumbnail(path, size)`` returns a pre-encoded variant sized for
+where the image is shown instead. Variants live in ``.image_cache/`` under a
+name that includes a hash of the source bytes, so an edited image gets new
+variants and unchanged images are never re-encoded.
+
+    python thumbnails.py            # pre-generate variants for images/
+"""
+
+import glob
+import hashlib
+import os
+import sys
+import threading
+
+from PIL import Image, ImageOps, features
+
+
+CACHE_DIR = ".image_cache"
+
+# Encoded width per display slot, about 2x the rendered CSS width for HiDPI screens
+SIZES = {
+    "headshot": 300,   # st.image(..., width=150)
+    "poster": 480,     # posters in a 3-column row
+    "feature": 720,    # the "Currently Watching" poster column
+    "diagram": 1600,   # ER diagrams and table screenshots at full page width
+}
+
+FORMAT, EXTENSION = ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+QUALITY = 80
+
+_lock = threading.Lock()
+_resolved = {}  # (path, size, mtime_ns, bytes) -> variant path
+
+
+def source_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def variant_path(path, size, digest):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{digest}-{SIZES[size]}.{EXTENSION}")
+
+
+def encode(path, target, width):
+    """Write ``path`` scaled down to at most ``width`` pixels wide to ``target``."""
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        if FORMAT == "WEBP":
+            image.save(tmp, FORMAT, quality=QUALITY, method=4)
+        else:
+            image.save(tmp, FORMAT, quality=QUALITY, optimize=True, progressive=True)
+        os.replace(tmp, target)
+
+
+def thumbnail(path, size):
+    """Path of the ``size`` variant of local image ``path``, creating it on first use.
+
+    URLs and missing files are returned unchanged.
+    """
+    if "://" in path:
+        return path
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    key = (path, size, stat.st_mtime_ns, stat.st_size)
+    cached = _resolved.get(key)
+    if cached is not None:
+        return cached
+    with _lock:
+        target = variant_path(path, size, source_hash(path))
+        if not os.path.exists(target):
+            encode(path, target, SIZES[size])
+        _resolved[key] = target
+    return target
+
+
+def build(pattern="images/*.jpeg", sizes=SIZES):
+    """Create any missing variants for every image matching ``pattern``; returns the number encoded."""
+    encoded = 0
+    for path in sorted(glob.glob(pattern)):
+        digest = source_hash(path)
+        for size in sizes:
+            target = variant_path(path, size, digest)
+            if not os.path.exists(target):
+                encode(path, target, SIZES[size])
+                encoded += 1
+    return encoded
+
+
+def prune(pattern="images/*.jpeg"):
+    """Delete cached variants whose source image has changed or been removed."""
+    live = {variant_path(p, s, source_hash(p)) for p in glob.glob(pattern) for s in SIZES}
+    removed = 0
+    for path in glob.glob(os.path.join(CACHE_DIR, f"*.{EXTENSION}")):
+        if path not in live:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    pattern = sys.argv[1] if len(sys.argv) > 1 else "images/*.jpeg"
+    print(f"Encoded {build(pattern)} variants, pruned {prune(pattern)} stale ones ({FORMAT})")
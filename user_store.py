@@ -0,0 +1,132 @@
+"""User lookups for the login portal and the user dashboard.
+
+Login goes through an in-memory hash index of email -> user_id built once from
+User1, and everything shown after login (profile, plan, favourite genre,
+stats) is fetched by user_id through indexes on the database, so no request
+scans a whole table. Rating and progress stats, the favourite genre and the
+users sharing it come from the rollups in ``aggregates``, which must be
+installed on the engine. The store is shared by every session and updated in
+place on sign-up.
+"""
+
+import threading
+
+
+PAGE_SIZE = 20
+
+# A user's subscriptions by start date; the cube triggers in ``cubes`` look plans up through it too
+SUBSCRIPTION_INDEX = "CREATE INDEX IF NOT EXISTS idx_subscription_user ON Subscription (user_id, start_date)"
+
+INDEXES = [
+    SUBSCRIPTION_INDEX,
+    "CREATE INDEX IF NOT EXISTS idx_watch_history_user ON Watch_History (user_id, content_id)",
+    "CREATE INDEX IF NOT EXISTS idx_review_user ON Review (user_id)",
+]
+
+
+class UserStore:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.lock = threading.Lock()
+        with engine.lock, engine.conn:
+            for statement in INDEXES:
+                engine.conn.execute(statement)
+        _, rows = engine.execute("SELECT email, user_id FROM User1")
+        self.by_email = dict(rows)
+
+    def authenticate(self, email, password):
+        """Return the user_id for matching credentials, else None."""
+        user_id = self.by_email.get(email)
+        if user_id is None:
+            return None
+        _, rows = self.engine.execute("SELECT password FROM User1 WHERE user_id = ?", (user_id,))
+        return user_id if rows and rows[0][0] == password else None
+
+    def email_exists(self, email):
+        return email in self.by_email
+
+    def create_user(self, name, email, password, age):
+        """Insert a new account and return its user_id; raises ValueError for a taken email."""
+        with self.lock:
+            if email in self.by_email:
+                raise ValueError("Email already exists.")
+            _, rows = self.engine.execute("SELECT COALESCE(MAX(user_id), 0) + 1 FROM User1")
+            user_id = rows[0][0]
+            self.engine.write("INSERT INTO User1 VALUES (?, ?, ?, ?, ?)", (user_id, name, email, password, age))
+            self.by_email[email] = user_id
+        return user_id
+
+    def profile(self, user_id):
+        _, rows = self.engine.execute("SELECT user_id, name, email, age FROM User1 WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None
+        return dict(zip(("user_id", "name", "email", "age"), rows[0]))
+
+    def plan(self, user_id):
+        """Name of the plan on the user's most recent subscription."""
+        _, rows = self.engine.execute("""
+SELECT p.plan_name
+FROM Subscription s
+JOIN Plan p ON s.plan_id = p.plan_id
+WHERE s.user_id = ?
+ORDER BY s.start_date DESC
+LIMIT 1""", (user_id,))
+        return rows[0][0] if rows else None
+
+    def favourite_genre(self, user_id):
+        """The genre the user has watched most often, from ``agg_favourite_genre``."""
+        _, rows = self.engine.execute("SELECT genre_name FROM agg_favourite_genre WHERE user_id = ?", (user_id,))
+        return rows[0][0] if rows else None
+
+    def currently_watching(self, user_id):
+        """``{"content_id", "title"}`` of the user's most recent watch, or None."""
+        _, rows = self.engine.execute("""
+SELECT c.content_id, c.title
+FROM Watch_History wh
+JOIN Content c ON wh.content_id = c.content_id
+WHERE wh.user_id = ?
+ORDER BY wh.watch_date DESC, wh.history_id DESC
+LIMIT 1""", (user_id,))
+        return dict(zip(("content_id", "title"), rows[0])) if rows else None
+
+    def stats(self, user_id):
+        """The user's average rating and watch completion (None when they have none).
+
+        Read from the trigger-maintained ``agg_user_stats`` row, see ``aggregates``.
+        """
+        _, rows = self.engine.execute("""
+SELECT CAST(rating_sum AS REAL) / NULLIF(rating_count, 0),
+       CAST(progress_sum AS REAL) / NULLIF(progress_count, 0)
+FROM agg_user_stats
+WHERE user_id = ?""", (user_id,))
+        rating, progress = rows[0] if rows else (None, None)
+        return {"rating": rating, "progress": progress}
+
+    def global_stats(self):
+        _, rows = self.engine.execute("""
+SELECT CAST(rating_sum AS REAL) / NULLIF(rating_count, 0),
+       CAST(progress_sum AS REAL) / NULLIF(progress_count, 0)
+FROM agg_global_stats""")
+        rating, progress = rows[0] if rows else (None, None)
+        return {"rating": rating, "progress": progress}
+
+    def same_genre_users(self, genre, after=0, limit=PAGE_SIZE):
+        """One page of the users whose favourite genre is ``genre``: user_id, name and age.
+
+        Pages are keyed on user_id: pass the last user_id of a page as
+        ``after`` to get the next one. Each page is a range of the
+        (genre_name, user_id) index plus ``limit`` primary-key lookups in User1.
+        """
+        return self.engine.query("""
+SELECT f.user_id, u.name, u.age
+FROM agg_favourite_genre f
+JOIN User1 u ON u.user_id = f.user_id
+WHERE f.genre_name = ? AND f.user_id > ?
+ORDER BY f.user_id
+LIMIT ?""", (genre, after, limit))
+
+    def same_genre_count(self, genre):
+        """How many users have ``genre`` as their favourite, kept by the triggers in ``agg_genre_fans``."""
+        _, rows = self.engine.execute("SELECT users FROM agg_genre_fans WHERE genre_name = ?", (genre,))
+        return rows[0][0] if rows else 0